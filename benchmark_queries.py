@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Per-request Python overhead of building comment queries and mapping rows.
+
+Compares the old approach (string-concatenated SQL built separately for the
+count and the page, ``?`` rewritten one placeholder at a time, and column
+names re-read from cursor.description for every row) with query_builder
+(statements compiled once per filter combination, rows mapped through a
+precomputed column tuple). No database is involved; only the Python work
+done around each query is timed.
+
+Usage:
+    python benchmark_queries.py
+    python benchmark_queries.py --iterations 20000 --rows 50
+"""
+
+import argparse
+import sqlite3
+import timeit
+
+from query_builder import SelectQuery
+
+COLUMNS = [
+    'comment_id', 'video_id', 'parent_comment_id', 'author', 'text',
+    'published_ts', 'updated_at', 'like_count', 'is_reply', 'channel_owner_liked'
+]
+
+
+class FakeCursor:
+    """Stands in for a psycopg2 cursor: tuple rows plus a description"""
+
+    description = [(name, None, None, None, None, None, None) for name in COLUMNS]
+
+
+def legacy_adapt_query(query, use_postgres):
+    if use_postgres:
+        placeholder_count = query.count('?')
+        for i in range(placeholder_count):
+            query = query.replace('?', '%s', 1)
+    return query
+
+
+def legacy_dict_from_row(row, cursor, use_postgres):
+    if use_postgres and cursor:
+        columns = [desc[0] for desc in cursor.description]
+        return dict(zip(columns, row))
+    return dict(row)
+
+
+def legacy_request(rows, cursor, use_postgres):
+    select_columns = """
+        SELECT c.comment_id, c.video_id, c.parent_comment_id, c.author, c.text,
+               c.published_ts, c.updated_at, c.like_count, c.is_reply, c.channel_owner_liked
+    """
+    from_clause = " FROM comments c"
+    where_clause = " WHERE c.video_id = ? AND c.parent_comment_id IS NULL"
+    params = ['vxBMePfysQk']
+    where_clause += " AND (c.text LIKE ? OR c.author LIKE ?)"
+    params.extend(['%skinny%', '%skinny%'])
+    where_clause += " AND c.like_count >= ?"
+    params.append(5)
+    count_query = legacy_adapt_query("SELECT COUNT(*)" + from_clause + where_clause, use_postgres)
+    base_query = select_columns + from_clause + where_clause
+    base_query += " ORDER BY c.published_ts DESC, c.comment_id DESC"
+    base_query = legacy_adapt_query(base_query, use_postgres)
+    paginated_query = legacy_adapt_query(base_query + " LIMIT ? OFFSET ?", use_postgres)
+    return count_query, paginated_query, [legacy_dict_from_row(row, cursor, use_postgres) for row in rows]
+
+
+def builder_request(rows, dialect):
+    query = SelectQuery(dialect, "FROM comments c", ['c.' + column for column in COLUMNS])
+    query.where("c.video_id = ?", ['vxBMePfysQk'])
+    query.where("c.parent_comment_id IS NULL")
+    query.where("(c.text LIKE ? OR c.author LIKE ?)", ['%skinny%', '%skinny%'])
+    query.where("c.like_count >= ?", [5])
+    query.order_by("c.published_ts DESC, c.comment_id DESC")
+    compiled, params = query.rows(limit=51, offset=0)
+    return compiled.count_sql, compiled.rows_sql, compiled.to_dicts(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark query building and row mapping')
+    parser.add_argument('--iterations', type=int, default=20000)
+    parser.add_argument('--rows', type=int, default=50, help='Rows mapped per request')
+    args = parser.parse_args()
+
+    # psycopg2 returns plain tuples; the web app's SQLite connections return sqlite3.Row
+    tuple_rows = [tuple(f'{column}-{i}' for column in COLUMNS) for i in range(args.rows)]
+    conn = sqlite3.connect(':memory:')
+    conn.row_factory = sqlite3.Row
+    select = 'SELECT ' + ', '.join(f'? AS {column}' for column in COLUMNS)
+    sqlite_rows = [conn.execute(select, row).fetchone() for row in tuple_rows]
+    cursor = FakeCursor()
+
+    print(f"{args.rows} rows per request, {args.iterations} requests")
+    print(f"{'dialect':>8} {'legacy us':>10} {'builder us':>11} {'speedup':>8}")
+    for use_postgres, dialect, rows in ((False, 'sqlite', sqlite_rows), (True, 'postgres', tuple_rows)):
+        # Both approaches must produce the same statements and rows
+        old_count, old_rows_sql, old_rows = legacy_request(rows, cursor, use_postgres)
+        new_count, new_rows_sql, new_rows = builder_request(rows, dialect)
+        assert old_rows == new_rows
+        assert ' '.join(old_count.split()) == ' '.join(new_count.split())
+        assert ' '.join(old_rows_sql.split()) == ' '.join(new_rows_sql.split())
+
+        legacy = timeit.timeit(lambda: legacy_request(rows, cursor, use_postgres), number=args.iterations)
+        builder = timeit.timeit(lambda: builder_request(rows, dialect), number=args.iterations)
+        legacy_us = legacy / args.iterations * 1e6
+        builder_us = builder / args.iterations * 1e6
+        print(f"{dialect:>8} {legacy_us:>10.1f} {builder_us:>11.1f} {legacy_us / builder_us:>7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
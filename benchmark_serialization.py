@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Per-comment JSON encode cost, before and after the serialization module.
+
+"Before" is the old JSONL adapter path: model_dump(), an isoformat() loop
+over the fields, then json.dumps(). "After" is model_dump() straight into
+ytscraper.serialization, timed once for each installed backend, plus the
+web API shape: a page of comment rows, with timestamps already stored as
+text as SQLite returns them, encoded as one response.
+
+Usage:
+    python benchmark_serialization.py
+    python benchmark_serialization.py --comments 20000
+"""
+
+import argparse
+import importlib
+import json
+import os
+import timeit
+from datetime import datetime, timedelta
+
+from ytscraper.models.data_models import Comment
+
+
+def make_comments(count):
+    started = datetime(2025, 6, 1, 12, 0, 0)
+    return [
+        Comment(
+            comment_id=f'Ugz{i:020d}AaABAg',
+            video_id='vxBMePfysQk',
+            parent_comment_id=None if i % 5 else f'Ugz{i - 1:020d}AaABAg',
+            author=f'@viewer{i % 700}',
+            author_channel_id=f'UC{i:022d}',
+            text='Loved this video 😍 — the part about “what I eat in a day” was eye-opening. ' * (1 + i % 3),
+            published_at=started + timedelta(minutes=i),
+            like_count=i % 97,
+            is_reply=i % 5 == 0,
+        )
+        for i in range(count)
+    ]
+
+
+def legacy_encode(comments):
+    lines = []
+    for comment in comments:
+        data = comment.model_dump()
+        for key, value in data.items():
+            if isinstance(value, datetime):
+                data[key] = value.isoformat()
+        lines.append(json.dumps(data) + '\n')
+    return lines
+
+
+def load_backend(name):
+    os.environ['JSON_BACKEND'] = name
+    import ytscraper.serialization as serialization
+    serialization = importlib.reload(serialization)
+    return serialization if serialization.BACKEND == name else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark per-comment JSON encoding')
+    parser.add_argument('--comments', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    comments = make_comments(args.comments)
+    page = [comment.model_dump(mode='json') for comment in comments[:50]]
+
+    def best(fn):
+        return min(timeit.repeat(fn, number=1, repeat=args.repeat))
+
+    legacy = best(lambda: legacy_encode(comments)) / args.comments * 1e6
+    legacy_page = min(timeit.repeat(
+        lambda: json.dumps({'comments': page}), number=200, repeat=args.repeat
+    )) / 200 * 1e6
+
+    print(f"{args.comments} comments")
+    print(f"{'path':<22} {'us/comment':>10} {'us/50-row page':>15}")
+    print(f"{'legacy json':<22} {legacy:>10.2f} {legacy_page:>15.1f}")
+    for name in ('json', 'ujson', 'orjson'):
+        serialization = load_backend(name)
+        if serialization is None:
+            print(f"{name:<22} {'not installed':>10}")
+            continue
+
+        def encode():
+            return [serialization.dumpb(comment.model_dump()) + b'\n' for comment in comments]
+
+        per_comment = best(encode) / args.comments * 1e6
+        per_page = min(timeit.repeat(
+            lambda: serialization.dumpb({'comments': page}), number=200, repeat=args.repeat
+        )) / 200 * 1e6
+        print(f"{'serialization/' + name:<22} {per_comment:>10.2f} {per_page:>15.1f}")
+
+
+if __name__ == '__main__':
+    main()
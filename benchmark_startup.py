@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for the web app.
+
+Each run starts a fresh interpreter and times `import webapp` (which must
+not touch the database or the filesystem) and the first request, which
+pays for the once-per-process startup checks. A separate
+`python -X importtime` run lists the imports that dominate the import.
+
+Exits with status 1 when the median import plus first request goes over
+--budget-ms, so it can guard deploys and bundle builds.
+
+Usage:
+    python benchmark_startup.py
+    python benchmark_startup.py --runs 10 --budget-ms 400 --top 15
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent
+
+# Runs in the child interpreter; prints one JSON line of timings in ms
+PROBE = """
+import json, time
+started = time.perf_counter()
+import webapp
+imported = time.perf_counter()
+client = webapp.app.test_client()
+status = client.get({path!r}).status_code
+first = time.perf_counter()
+client.get({path!r}).status_code
+second = time.perf_counter()
+print(json.dumps({{
+    'import': (imported - started) * 1000,
+    'first_request': (first - imported) * 1000,
+    'warm_request': (second - first) * 1000,
+    'status': status,
+}}))
+"""
+
+
+def run_probe(path: str) -> dict:
+    output = subprocess.run(
+        [sys.executable, '-c', PROBE.format(path=path)],
+        cwd=BASE_DIR, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def import_profile(module: str):
+    """Run `python -X importtime` and return (total ms, [(cumulative ms, self ms, module)])"""
+    stderr = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=BASE_DIR, capture_output=True, text=True, check=True
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((int(cumulative_us) / 1000, int(self_us) / 1000, name.rstrip()))
+    total = next((row[0] for row in rows if row[2].strip() == module), 0.0)
+    return total, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark web app cold start')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--path', default='/api/videos', help='First request to time')
+    parser.add_argument('--budget-ms', type=float, default=None,
+                        help='Fail if median import + first request exceeds this')
+    parser.add_argument('--top', type=int, default=10, help='Slowest top-level imports to list')
+    args = parser.parse_args()
+
+    runs = [run_probe(args.path) for _ in range(args.runs)]
+    median = {key: statistics.median(run[key] for run in runs)
+              for key in ('import', 'first_request', 'warm_request')}
+    cold_start = median['import'] + median['first_request']
+
+    print(f"{args.runs} cold starts, first request {args.path} -> {runs[0]['status']}")
+    print(f"{'phase':<16} {'median ms':>10} {'min ms':>8} {'max ms':>8}")
+    for key, value in median.items():
+        values = [run[key] for run in runs]
+        print(f"{key:<16} {value:>10.1f} {min(values):>8.1f} {max(values):>8.1f}")
+    print(f"{'cold start':<16} {cold_start:>10.1f}")
+
+    total, rows = import_profile('webapp')
+    # Direct imports of webapp are indented by three spaces in importtime output
+    direct = sorted((row for row in rows if row[2].startswith('   ') and not row[2].startswith('    ')),
+                    reverse=True)
+    own = next((row[1] for row in rows if row[2].strip() == 'webapp'), 0.0)
+    print(f"\n-X importtime: import webapp {total:.1f} ms, module body {own:.1f} ms")
+    for cumulative, _, name in direct[:args.top]:
+        print(f"  {cumulative:>8.1f} ms  {name.strip()}")
+
+    if args.budget_ms is not None and cold_start > args.budget_ms:
+        print(f"\nOver budget: {cold_start:.1f} ms > {args.budget_ms:.1f} ms")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Read-throughput benchmark for the gunicorn worker model.
+
+Starts the web app under gunicorn once per workers x threads combination,
+replays a mix of read requests from concurrent clients and prints
+requests/second and latency percentiles for each.
+
+Usage:
+    python benchmark_workers.py
+    python benchmark_workers.py --workers 1 2 4 --threads 1 4 --requests 2000 --concurrency 16
+"""
+
+import argparse
+import http.client
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent
+
+# Browsing mix: listings, comment pages with different sorts, search and stats
+DEFAULT_PATHS = [
+    '/api/videos',
+    '/api/videos/{video_id}/comments?per_page=50',
+    '/api/videos/{video_id}/comments?per_page=50&sort=like_count',
+    '/api/videos/{video_id}/comments?per_page=50&page=3',
+    '/api/videos/{video_id}/comments?per_page=50&min_likes=5&count=estimate',
+    '/api/search?q=skinny',
+    '/api/videos/{video_id}/stats',
+]
+
+
+def wait_for_server(port: int, timeout: float = 30.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            conn.request('GET', '/api/health')
+            if conn.getresponse().status == 200:
+                return True
+        except OSError:
+            pass
+        time.sleep(0.2)
+    return False
+
+
+def run_load(port: int, paths, total_requests: int, concurrency: int):
+    """Fire requests from `concurrency` keep-alive clients; return (elapsed, latencies, errors)"""
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    per_client = total_requests // concurrency
+
+    def client(index):
+        nonlocal errors
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        local = []
+        failed = 0
+        for i in range(per_client):
+            path = paths[(index + i) % len(paths)]
+            started = time.perf_counter()
+            try:
+                conn.request('GET', path)
+                response = conn.getresponse()
+                response.read()
+                if response.status != 200:
+                    failed += 1
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            local.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(local)
+            errors += failed
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(client, range(concurrency)))
+    return time.perf_counter() - started, sorted(latencies), errors
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark gunicorn worker/thread settings')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 4])
+    parser.add_argument('--requests', type=int, default=2000, help='Requests per run')
+    parser.add_argument('--concurrency', type=int, default=16, help='Concurrent clients')
+    parser.add_argument('--port', type=int, default=9291)
+    parser.add_argument('--video-id', default='vxBMePfysQk')
+    parser.add_argument('--read-write', action='store_true',
+                        help='Serve SQLite read-write instead of SQLITE_READ_ONLY=1')
+    args = parser.parse_args()
+
+    paths = [path.format(video_id=args.video_id) for path in DEFAULT_PATHS]
+
+    # Extra workers can only run in parallel on extra cores; label every run with its host
+    cores = os.cpu_count() or 1
+    print(f"{cores} CPU core{'s' if cores != 1 else ''}, {args.concurrency} clients, {args.requests} requests per run")
+    if cores == 1:
+        print("Single core: worker counts can't show multi-core scaling here")
+    print(f"{'workers':>7} {'threads':>7} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>6}")
+    for workers in args.workers:
+        for threads in args.threads:
+            env = dict(os.environ, PORT=str(args.port), WEB_CONCURRENCY=str(workers),
+                       GUNICORN_THREADS=str(threads))
+            if not args.read_write:
+                env['SQLITE_READ_ONLY'] = '1'
+            # Cache hits would measure the cache rather than the worker model
+            env['QUERY_CACHE_MAX_ENTRIES'] = '0'
+
+            server = subprocess.Popen(
+                [sys.executable, '-m', 'gunicorn', 'webapp:app', '-c', 'gunicorn.conf.py',
+                 '--log-level', 'warning'],
+                cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+            try:
+                if not wait_for_server(args.port):
+                    print(f"{workers:>7} {threads:>7}  server did not start")
+                    continue
+                # Warm the OS page cache and each worker's connections
+                run_load(args.port, paths, max(len(paths) * workers * threads, 100), args.concurrency)
+                elapsed, latencies, errors = run_load(args.port, paths, args.requests, args.concurrency)
+                print(f"{workers:>7} {threads:>7} {len(latencies) / elapsed:>9.1f} "
+                      f"{percentile(latencies, 50) * 1000:>8.1f} {percentile(latencies, 95) * 1000:>8.1f} "
+                      f"{percentile(latencies, 99) * 1000:>8.1f} {errors:>6}")
+            finally:
+                server.terminate()
+                server.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,250 @@
+import sqlite3
+import threading
+import time
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(Exception):
+    """Raised when no pooled connection becomes free within the wait timeout"""
+
+
+class PostgresConnectionPool:
+    """Thread-safe psycopg2 connection pool with health checks and recycling.
+
+    Connections are opened lazily up to max_size and kept open between
+    requests, so the connect-and-auth handshake is paid once per connection
+    instead of once per request. Callers block for up to `timeout` seconds
+    when every connection is checked out.
+    """
+
+    def __init__(self, connect_kwargs: Dict, min_size: int = 1, max_size: int = 10,
+                 timeout: float = 30.0, max_age: float = 1800.0, ping_after: float = 30.0):
+        import psycopg2
+        self._psycopg2 = psycopg2
+        self.connect_kwargs = connect_kwargs
+        self.min_size = max(0, min_size)
+        self.max_size = max(1, max_size, self.min_size)
+        self.timeout = timeout
+        self.max_age = max_age
+        self.ping_after = ping_after
+
+        self._lock = threading.Condition()
+        self._idle: List[Tuple[object, float, float]] = []  # (conn, created_at, last_used)
+        self._created_at: Dict[int, float] = {}
+        self._in_use = 0
+
+        # Monitoring counters
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+        self._discarded = 0
+
+        for _ in range(self.min_size):
+            try:
+                conn = self._connect()
+                self._idle.append((conn, self._created_at[id(conn)], time.monotonic()))
+            except Exception as e:
+                logger.warning(f"⚠️  Could not pre-open pooled connection: {e}")
+                break
+
+    def _connect(self):
+        conn = self._psycopg2.connect(**self.connect_kwargs)
+        # The web app only reads; autocommit keeps idle connections out of open transactions
+        conn.autocommit = True
+        self._created_at[id(conn)] = time.monotonic()
+        return conn
+
+    def _discard(self, conn) -> None:
+        self._created_at.pop(id(conn), None)
+        self._discarded += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _is_healthy(self, conn, created_at: float, last_used: float) -> bool:
+        now = time.monotonic()
+        if conn.closed or now - created_at > self.max_age:
+            return False
+        if now - last_used > self.ping_after:
+            # Idle long enough that the server or a proxy may have dropped it
+            try:
+                cursor = conn.cursor()
+                cursor.execute("SELECT 1")
+                cursor.close()
+            except Exception:
+                return False
+        return True
+
+    def getconn(self):
+        """Check out a healthy connection, waiting if the pool is exhausted.
+
+        Returns:
+            psycopg2 connection
+
+        Raises:
+            PoolTimeout: If no connection is free within the timeout
+        """
+        started = time.monotonic()
+        waited = False
+        with self._lock:
+            while not self._idle and self._in_use >= self.max_size:
+                waited = True
+                remaining = self.timeout - (time.monotonic() - started)
+                if remaining <= 0:
+                    raise PoolTimeout(f"No database connection free after {self.timeout:.1f}s")
+                self._lock.wait(remaining)
+
+            wait_time = time.monotonic() - started
+            self._checkouts += 1
+            if waited:
+                self._waits += 1
+                self._wait_time_total += wait_time
+                self._wait_time_max = max(self._wait_time_max, wait_time)
+
+            candidate = self._idle.pop() if self._idle else None
+            self._in_use += 1
+
+        try:
+            # Health checks and connects happen outside the lock
+            while candidate is not None:
+                conn, created_at, last_used = candidate
+                if self._is_healthy(conn, created_at, last_used):
+                    return conn
+                with self._lock:
+                    self._discard(conn)
+                    candidate = self._idle.pop() if self._idle else None
+            return self._connect()
+        except Exception:
+            with self._lock:
+                self._in_use -= 1
+                self._lock.notify()
+            raise
+
+    def putconn(self, conn, discard: bool = False) -> None:
+        """Return a connection to the pool.
+
+        Connections that are closed, broken or left mid-transaction are
+        rolled back or discarded so the next borrower gets a clean one.
+
+        Args:
+            conn: Connection obtained from getconn
+            discard: Close the connection instead of keeping it
+        """
+        extensions = self._psycopg2.extensions
+        if not discard and not conn.closed:
+            try:
+                status = conn.get_transaction_status()
+                if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                    discard = True
+                elif status != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except Exception:
+                discard = True
+
+        with self._lock:
+            self._in_use -= 1
+            if discard or conn.closed:
+                self._discard(conn)
+            else:
+                created_at = self._created_at.get(id(conn), time.monotonic())
+                self._idle.append((conn, created_at, time.monotonic()))
+            self._lock.notify()
+
+    def stats(self) -> Dict:
+        """Get pool occupancy and wait statistics"""
+        with self._lock:
+            return {
+                'backend': 'postgres',
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'checkouts': self._checkouts,
+                'waits': self._waits,
+                'wait_time_total_ms': round(self._wait_time_total * 1000, 2),
+                'wait_time_max_ms': round(self._wait_time_max * 1000, 2),
+                'discarded': self._discarded
+            }
+
+    def close(self) -> None:
+        """Close all idle connections"""
+        with self._lock:
+            for conn, _, _ in self._idle:
+                self._discard(conn)
+            self._idle = []
+
+
+class SQLiteConnectionCache:
+    """Per-thread reusable SQLite connections with pragmas applied once.
+
+    Each serving thread keeps one connection open for its lifetime instead
+    of reconnecting and re-reading the schema on every request. In read-only
+    mode connections are opened with a ``mode=ro`` URI, so many worker
+    processes can share one file without ever taking its write lock.
+    """
+
+    def __init__(self, db_path: str, pragmas: Optional[Dict[str, object]] = None,
+                 read_only: bool = False):
+        self.db_path = db_path
+        self.pragmas = pragmas or {}
+        self.read_only = read_only
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._opened = 0
+        self._checkouts = 0
+        self._discarded = 0
+
+    def _connect(self):
+        if self.read_only:
+            uri = Path(self.db_path).resolve().as_uri() + '?mode=ro'
+            conn = sqlite3.connect(uri, uri=True)
+        else:
+            conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        with self._lock:
+            self._opened += 1
+        return conn
+
+    def getconn(self):
+        """Get this thread's connection, opening it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        with self._lock:
+            self._checkouts += 1
+        return conn
+
+    def putconn(self, conn, discard: bool = False) -> None:
+        """Release the thread's connection, closing it if it errored"""
+        if conn.in_transaction:
+            try:
+                conn.rollback()
+            except sqlite3.Error:
+                discard = True
+        if discard:
+            with self._lock:
+                self._discarded += 1
+            try:
+                conn.close()
+            finally:
+                self._local.conn = None
+
+    def stats(self) -> Dict:
+        """Get connection reuse statistics"""
+        with self._lock:
+            return {
+                'backend': 'sqlite',
+                'read_only': self.read_only,
+                'connections_opened': self._opened,
+                'checkouts': self._checkouts,
+                'discarded': self._discarded,
+                'pragmas': dict(self.pragmas)
+            }
@@ -0,0 +1,340 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Job states; queued and running jobs count towards the concurrency limit
+QUEUED = 'queued'
+RUNNING = 'processing'
+COMPLETED = 'completed'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+ACTIVE_STATES = (QUEUED, RUNNING)
+
+JOB_COLUMNS = [
+    'job_id', 'kind', 'params', 'status', 'progress', 'total', 'current_item',
+    'detail', 'output_path', 'error', 'cancel_requested', 'owner_pid',
+    'created_at', 'updated_at', 'finished_at'
+]
+
+# Minimum seconds between progress writes from a running job
+REPORT_INTERVAL = 0.5
+
+
+class ExportLimitReached(Exception):
+    """Raised when too many export jobs are already queued or running"""
+
+
+class ExportCancelled(Exception):
+    """Raised inside a job when a cancel was requested"""
+
+
+def _process_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class ExportJobStore:
+    """Export job table in its own SQLite file.
+
+    Every gunicorn worker on the host opens the same file, so a job started
+    through one worker can be polled, downloaded or cancelled through any
+    other. It is kept apart from the comments database, which may be
+    read-only or on Postgres.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = str(db_path)
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        # Wakes watch() callers in this process whenever a job changes
+        self._changed = threading.Condition()
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS export_jobs (
+                job_id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                params TEXT NOT NULL,
+                status TEXT NOT NULL,
+                progress INTEGER NOT NULL DEFAULT 0,
+                total INTEGER NOT NULL DEFAULT 0,
+                current_item TEXT,
+                detail TEXT,
+                output_path TEXT,
+                error TEXT,
+                cancel_requested INTEGER NOT NULL DEFAULT 0,
+                owner_pid INTEGER,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                finished_at REAL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_export_jobs_status ON export_jobs (status, updated_at)")
+        conn.commit()
+
+    def _conn(self):
+        # One connection per thread; WAL lets pollers read while a job writes
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _update(self, job_id: str, **fields) -> None:
+        fields['updated_at'] = time.time()
+        assignments = ', '.join(f"{column} = ?" for column in fields)
+        conn = self._conn()
+        conn.execute(f"UPDATE export_jobs SET {assignments} WHERE job_id = ?", list(fields.values()) + [job_id])
+        conn.commit()
+        self._notify()
+
+    def _notify(self) -> None:
+        with self._changed:
+            self._changed.notify_all()
+
+    def create(self, kind: str, params: Dict, max_active: int) -> str:
+        """Insert a queued job, enforcing the limit on active jobs.
+
+        The count and insert run under the database write lock, so workers
+        racing to start jobs can't overshoot the limit.
+
+        Raises:
+            ExportLimitReached: If max_active jobs are already queued or running
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            placeholders = ', '.join(['?'] * len(ACTIVE_STATES))
+            active = conn.execute(
+                f"SELECT COUNT(*) FROM export_jobs WHERE status IN ({placeholders})", ACTIVE_STATES
+            ).fetchone()[0]
+            if active >= max_active:
+                raise ExportLimitReached(f"{active} exports already in progress")
+            conn.execute(
+                "INSERT INTO export_jobs (job_id, kind, params, status, owner_pid, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, json.dumps(params), QUEUED, os.getpid(), now, now)
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Get a job as a dict, with its detail fields merged in, or None"""
+        row = self._conn().execute(
+            f"SELECT {', '.join(JOB_COLUMNS)} FROM export_jobs WHERE job_id = ?", (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job['params'] = json.loads(job['params'])
+        job['cancel_requested'] = bool(job['cancel_requested'])
+        detail = job.pop('detail')
+        if detail:
+            job.update(json.loads(detail))
+        return job
+
+    def start(self, job_id: str) -> bool:
+        """Move a queued job to running; False if it was cancelled while queued"""
+        conn = self._conn()
+        cursor = conn.execute(
+            "UPDATE export_jobs SET status = ?, updated_at = ? "
+            "WHERE job_id = ? AND status = ? AND cancel_requested = 0",
+            (RUNNING, time.time(), job_id, QUEUED)
+        )
+        conn.commit()
+        self._notify()
+        return cursor.rowcount == 1
+
+    def report(self, job_id: str, progress: int, total: int,
+               current_item: Optional[str] = None, detail: Optional[Dict] = None) -> bool:
+        """Store progress; returns False once a cancel has been requested"""
+        fields = {'progress': progress, 'total': total, 'current_item': current_item}
+        if detail is not None:
+            fields['detail'] = json.dumps(detail)
+        self._update(job_id, **fields)
+        row = self._conn().execute(
+            "SELECT cancel_requested FROM export_jobs WHERE job_id = ?", (job_id,)
+        ).fetchone()
+        return not (row and row[0])
+
+    def finish(self, job_id: str, status: str, output_path: Optional[str] = None,
+               error: Optional[str] = None) -> None:
+        """Record a job's final state"""
+        self._update(job_id, status=status, output_path=output_path, error=error, finished_at=time.time())
+
+    def request_cancel(self, job_id: str) -> None:
+        """Flag a job for cancellation; queued jobs are cancelled at once"""
+        conn = self._conn()
+        now = time.time()
+        conn.execute(
+            "UPDATE export_jobs SET cancel_requested = 1, updated_at = ? WHERE job_id = ?",
+            (now, job_id)
+        )
+        conn.execute(
+            "UPDATE export_jobs SET status = ?, finished_at = ? WHERE job_id = ? AND status = ?",
+            (CANCELLED, now, job_id, QUEUED)
+        )
+        conn.commit()
+        self._notify()
+
+    def fail_stale(self, max_idle: float) -> int:
+        """Fail jobs whose worker process is gone or that stopped reporting.
+
+        Queued jobs don't report, so they are only failed when the process
+        that queued them has exited, e.g. after a gunicorn worker restart.
+        """
+        conn = self._conn()
+        placeholders = ', '.join(['?'] * len(ACTIVE_STATES))
+        now = time.time()
+        rows = conn.execute(
+            f"SELECT job_id, status, owner_pid, updated_at FROM export_jobs WHERE status IN ({placeholders})",
+            ACTIVE_STATES
+        ).fetchall()
+        stale = [
+            (FAILED, 'Export interrupted', now, row['job_id']) for row in rows
+            if not _process_alive(row['owner_pid'])
+            or (row['status'] == RUNNING and row['updated_at'] < now - max_idle)
+        ]
+        conn.executemany(
+            "UPDATE export_jobs SET status = ?, error = ?, finished_at = ? WHERE job_id = ?", stale
+        )
+        conn.commit()
+        if stale:
+            self._notify()
+        return len(stale)
+
+    def watch(self, job_id: str, since: Optional[float], timeout: float,
+              poll_interval: float = REPORT_INTERVAL) -> Optional[Dict]:
+        """Wait for a job to change after its updated_at value since, or for timeout.
+
+        Changes made in this process wake the caller at once. Jobs run by
+        other workers are re-read every poll_interval, a cheap local read
+        rather than a request to the app.
+
+        Returns:
+            The job as from get(), changed or not, or None if it no longer exists
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            if job is None or since is None or job['updated_at'] > since:
+                return job
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return job
+            with self._changed:
+                self._changed.wait(min(poll_interval, remaining))
+
+    def expire(self, max_age: float) -> List[str]:
+        """Delete finished jobs older than max_age, returning their output paths"""
+        conn = self._conn()
+        placeholders = ', '.join(['?'] * len(ACTIVE_STATES))
+        cutoff = time.time() - max_age
+        rows = conn.execute(
+            f"SELECT job_id, output_path FROM export_jobs "
+            f"WHERE status NOT IN ({placeholders}) AND updated_at < ?",
+            ACTIVE_STATES + (cutoff,)
+        ).fetchall()
+        conn.executemany("DELETE FROM export_jobs WHERE job_id = ?", [(row[0],) for row in rows])
+        conn.commit()
+        return [row[1] for row in rows if row[1]]
+
+
+class ExportRunner:
+    """Runs export jobs on a bounded thread pool.
+
+    Each worker process runs at most max_workers jobs at once, and the job
+    store caps queued plus running jobs across all processes at max_active.
+    Job functions receive a report(progress, total, current_item, detail)
+    callback, which raises ExportCancelled once the job is cancelled.
+    """
+
+    def __init__(self, store: ExportJobStore, output_dir: str, max_workers: int = 2,
+                 max_active: int = 4, stale_after: float = 600.0, keep_for: float = 86400.0):
+        self.store = store
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.max_active = max_active
+        self.stale_after = stale_after
+        self.keep_for = keep_for
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='export')
+
+    def submit(self, kind: str, params: Dict, job: Callable) -> str:
+        """Queue a job and return its ID.
+
+        Args:
+            kind: Job type, stored for display
+            params: JSON-serializable job parameters
+            job: Callable taking (params, output_path, report) and returning
+                the path of the file it wrote
+
+        Raises:
+            ExportLimitReached: If too many exports are active
+        """
+        self.cleanup()
+        job_id = self.store.create(kind, params, self.max_active)
+        self._executor.submit(self._run, job_id, params, job)
+        return job_id
+
+    def _run(self, job_id: str, params: Dict, job: Callable) -> None:
+        if not self.store.start(job_id):
+            return
+        output_path = self.output_dir / f"export_{job_id}.zip"
+
+        last_report = [0.0]
+
+        def report(progress, total, current_item=None, detail=None):
+            # Throttled so per-item calls don't turn into per-item writes
+            now = time.monotonic()
+            if progress < total and now - last_report[0] < REPORT_INTERVAL:
+                return
+            last_report[0] = now
+            if not self.store.report(job_id, progress, total, current_item, detail):
+                raise ExportCancelled()
+
+        try:
+            path = job(params, str(output_path), report)
+            self.store.finish(job_id, COMPLETED, output_path=path)
+        except ExportCancelled:
+            output_path.unlink(missing_ok=True)
+            self.store.finish(job_id, CANCELLED)
+        except Exception as e:
+            logger.error(f"❌ Export job {job_id} failed: {e}")
+            output_path.unlink(missing_ok=True)
+            self.store.finish(job_id, FAILED, error=str(e))
+
+    def cleanup(self) -> None:
+        """Fail stalled jobs and delete expired jobs and their files"""
+        try:
+            self.store.fail_stale(self.stale_after)
+            for path in self.store.expire(self.keep_for):
+                Path(path).unlink(missing_ok=True)
+        except Exception as e:
+            logger.warning(f"⚠️  Export cleanup failed: {e}")
+
+    def shutdown(self) -> None:
+        """Stop accepting jobs; running ones finish in the background"""
+        self._executor.shutdown(wait=False)
@@ -1,22 +1,20 @@
-import os
-import json
 import sqlite3
 import zipfile
-import tempfile
 import threading
-import hashlib
 import re
-from datetime import datetime
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
+from typing import Callable, Iterable, Dict, Optional, Tuple
 import uuid
 
 class ExportService:
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, temp_dir: str = "temp_exports"):
         self.db_path = db_path
-        self.temp_dir = Path("temp_exports")
-        self.temp_dir.mkdir(exist_ok=True)
-        self.export_tasks = {}  # In-memory task tracking
+        self.temp_dir = Path(temp_dir)
+        self.temp_dir.mkdir(exist_ok=True, parents=True)
+        self._renderer = None
+        self._renderer_checked = False
+        self._renderer_lock = threading.Lock()
         
         # For now, we'll create HTML files that can be manually converted to PNG
         # using browser screenshot tools (right-click -> "Save as image" or screenshot)
@@ -42,9 +40,11 @@ class ExportService:
         avatar_color = self.generate_avatar_color(comment['author'])
         first_letter = comment['author'][0].upper() if comment['author'] else 'U'
         
-        # Format date - handle various timestamp formats from database
+        # Format date from the epoch column when the row has it, else parse the stored text
         try:
-            if isinstance(comment['published_at'], str):
+            if comment.get('published_ts') is not None:
+                published_date = datetime.fromtimestamp(comment['published_ts'], timezone.utc)
+            elif isinstance(comment['published_at'], str):
                 # Try different date formats
                 if 'T' in comment['published_at']:
                     # ISO format
@@ -288,168 +288,69 @@ class ExportService:
             print(f"Error exporting single comment: {e}")
             return None
     
-    def export_video_comments(self, video_id: str, task_id: str = None) -> Optional[str]:
-        """Export all comments from a video as ZIP file"""
-        try:
-            if not task_id:
-                task_id = str(uuid.uuid4())
-            
-            conn = self.get_db_connection()
-            cursor = conn.cursor()
-            
-            # Get video info
-            cursor.execute("SELECT title FROM videos WHERE video_id = ?", (video_id,))
-            video_row = cursor.fetchone()
-            if not video_row:
-                return None
-                
-            video_title = video_row['title']
-            
-            # Get all comments for video
-            cursor.execute("""
-                SELECT * FROM comments 
-                WHERE video_id = ? 
-                ORDER BY published_at DESC
-            """, (video_id,))
-            
-            comments = [dict(row) for row in cursor.fetchall()]
-            conn.close()
-            
-            if not comments:
-                return None
-            
-            # Initialize progress tracking
-            if task_id:
-                self.export_tasks[task_id] = {
-                    'status': 'processing',
-                    'progress': 0,
-                    'total': len(comments),
-                    'current_item': f"Processing {len(comments)} comments"
-                }
-            
-            # Create temporary directory for this export
-            export_dir = self.temp_dir / f"export_{task_id}"
-            export_dir.mkdir(parents=True, exist_ok=True)
-            
-            # Generate PNGs for each comment
-            png_files = []
-            for i, comment in enumerate(comments):
-                html_content = self.generate_comment_html(comment, video_title)
-                filename = self.generate_export_filename(
-                    video_title,
-                    comment['author'],
-                    comment['text']
-                )
-                
-                png_path = export_dir / filename
-                if self.html_to_png(html_content, str(png_path)):
-                    # The html_to_png function creates the file with the given path
-                    # so we add the file that was actually created
-                    if png_path.exists():
-                        png_files.append(png_path)
-                    else:
-                        print(f"Warning: Expected file not found: {png_path}")
-                
-                # Update progress
-                if task_id:
-                    self.export_tasks[task_id]['progress'] = i + 1
-                    self.export_tasks[task_id]['current_item'] = f"Creating PNG {i+1}/{len(comments)}"
-            
-            # Create ZIP file
-            timestamp = datetime.now().strftime('%Y-%m-%d %H-%M')
-            safe_video_title = self.sanitize_filename(video_title, 30)
-            zip_filename = f"{safe_video_title}_CommentExport_{timestamp}.zip"
-            zip_path = self.temp_dir / zip_filename
-            
-            with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                for png_file in png_files:
-                    zipf.write(png_file, png_file.name)
-            
-            # Cleanup temporary PNG files
-            for png_file in png_files:
-                png_file.unlink()
-            export_dir.rmdir()
-            
-            # Mark task as completed
-            if task_id:
-                self.export_tasks[task_id]['status'] = 'completed'
-                self.export_tasks[task_id]['file_path'] = str(zip_path)
-            
-            return str(zip_path)
-            
-        except Exception as e:
-            if task_id:
-                self.export_tasks[task_id]['status'] = 'failed'
-                self.export_tasks[task_id]['error'] = str(e)
-            print(f"Error exporting video comments: {e}")
-            return None
+    def _png_renderer(self):
+        """Get the html2image renderer, or None if no headless browser is available"""
+        if not self._renderer_checked:
+            self._renderer_checked = True
+            # html2image renders cards to PNG when a Chrome/Chromium binary is
+            # installed; imported here so importing this module stays cheap
+            try:
+                from html2image import Html2Image
+                self._renderer = Html2Image(output_path=str(self.temp_dir), size=(640, 400))
+            except ImportError:
+                pass
+            except Exception as e:
+                print(f"PNG rendering unavailable, exporting HTML cards: {e}")
+        return self._renderer
     
-    def export_channel_comments(self, task_id: str = None) -> Optional[List[str]]:
-        """Export all comments from all videos in the channel"""
-        try:
-            if not task_id:
-                task_id = str(uuid.uuid4())
-            
-            conn = self.get_db_connection()
-            cursor = conn.cursor()
-            
-            # Get all videos
-            cursor.execute("SELECT video_id, title FROM videos ORDER BY published_at DESC")
-            videos = [dict(row) for row in cursor.fetchall()]
-            conn.close()
-            
-            if not videos:
-                return None
-            
-            # Initialize progress tracking
-            if task_id:
-                self.export_tasks[task_id] = {
-                    'status': 'processing',
-                    'video_progress': 0,
-                    'video_total': len(videos),
-                    'comment_progress': 0,
-                    'comment_total': 0,
-                    'current_video': '',
-                    'zip_files': []
-                }
-            
-            zip_files = []
-            
-            for video_index, video in enumerate(videos):
-                # Update video progress
-                if task_id:
-                    self.export_tasks[task_id]['video_progress'] = video_index
-                    self.export_tasks[task_id]['current_video'] = video['title']
-                
-                # Create video-specific task for comment tracking
-                video_task_id = f"{task_id}_video_{video_index}"
-                zip_path = self.export_video_comments(video['video_id'], video_task_id)
-                
-                if zip_path:
-                    zip_files.append(zip_path)
-                    if task_id:
-                        self.export_tasks[task_id]['zip_files'].append(zip_path)
-                
-                # Update video progress
-                if task_id:
-                    self.export_tasks[task_id]['video_progress'] = video_index + 1
-            
-            # Mark task as completed
-            if task_id:
-                self.export_tasks[task_id]['status'] = 'completed'
-            
-            return zip_files
-            
-        except Exception as e:
-            if task_id:
-                self.export_tasks[task_id]['status'] = 'failed'
-                self.export_tasks[task_id]['error'] = str(e)
-            print(f"Error exporting channel comments: {e}")
-            return None
+    def card_format(self) -> str:
+        """File type of rendered comment cards: 'png' or 'html'"""
+        return 'png' if self._png_renderer() is not None else 'html'
+    
+    def render_comment_card(self, comment: Dict, video_title: str = "") -> Tuple[bytes, str]:
+        """Render a comment card, returning (content, extension)"""
+        html_content = self.generate_comment_html(comment, video_title)
+        renderer = self._png_renderer()
+        if renderer is not None:
+            # One browser instance is shared, so screenshots are taken one at a time
+            with self._renderer_lock:
+                name = f"card_{uuid.uuid4().hex}.png"
+                renderer.screenshot(html_str=html_content, save_as=name)
+                path = self.temp_dir / name
+                try:
+                    return path.read_bytes(), 'png'
+                finally:
+                    path.unlink(missing_ok=True)
+        return html_content.encode('utf-8'), 'html'
     
-    def get_task_status(self, task_id: str) -> Optional[Dict]:
-        """Get the status of an export task"""
-        return self.export_tasks.get(task_id)
+    def add_comment_cards(self, zipf: zipfile.ZipFile, comments: Iterable[Dict], video_title: str,
+                          folder: str = "", on_progress: Optional[Callable[[int], None]] = None) -> int:
+        """Render comments into an open ZIP file, one card per comment.
+        
+        Cards are written straight into the archive without temporary files.
+        Names are prefixed with a sequence number so comments sharing an
+        author and opening words don't collide.
+        
+        Args:
+            zipf: ZIP file open for writing
+            comments: Comment dicts, consumed lazily
+            video_title: Title shown on each card
+            folder: Directory inside the archive
+            on_progress: Called with the number of cards written so far
+            
+        Returns:
+            Number of cards written
+        """
+        count = 0
+        for comment in comments:
+            content, extension = self.render_comment_card(comment, video_title)
+            filename = self.generate_export_filename(video_title, comment['author'] or '', comment['text'] or '')
+            filename = f"{count + 1:05d}_{filename.rsplit('.', 1)[0]}.{extension}"
+            zipf.writestr(f"{folder}/{filename}" if folder else filename, content)
+            count += 1
+            if on_progress:
+                on_progress(count)
+        return count
     
     def cleanup_old_files(self, hours_old: int = 24):
         """Clean up temporary files older than specified hours"""
@@ -0,0 +1,53 @@
+"""Gunicorn settings for the web app.
+
+Worker model: WEB_CONCURRENCY processes, each serving GUNICORN_THREADS
+requests at a time with the gthread worker. The app is preloaded, and the
+startup checks run once in the master (when_ready) before forking, so
+workers boot without repeating them; each worker then opens its own
+database connections in post_fork. Postgres schema migrations are a
+separate release step: `python webapp.py migrate`.
+
+With SQLite, run with SQLITE_READ_ONLY=1 so every worker reads the file
+through read-only, mmap-backed connections and the page cache is shared
+through the OS. Measure throughput on the deployment host with
+benchmark_workers.py before tuning the defaults.
+
+Server-sent event streams each hold a thread for their lifetime; the app
+caps them per worker below GUNICORN_THREADS (EXPORT_EVENT_STREAMS and
+LIVE_EVENT_STREAMS), which this file exports so the app sees the thread
+count actually in use.
+"""
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 9191)}"
+
+# Processes can serve reads on every core; threads overlap I/O waits in each
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+# The app sizes its event stream cap from this; unset, it assumes Flask's server
+os.environ['GUNICORN_THREADS'] = str(threads)
+worker_class = 'gthread'
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+keepalive = 5
+
+# Import webapp once, then fork
+preload_app = True
+
+# Recycle workers now and then so memory growth can't accumulate
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 5000))
+max_requests_jitter = 500
+
+
+def when_ready(server):
+    """Run the startup checks once, before any worker is forked"""
+    import webapp
+    webapp.ensure_initialized()
+
+
+def post_fork(server, worker):
+    """Give each worker its own connection pool and cache"""
+    import webapp
+    webapp.init_worker()
+    server.log.info(f"Worker {worker.pid} initialized database connections")
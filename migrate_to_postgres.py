@@ -12,6 +12,8 @@ from urllib.parse import urlparse
 import sys
 from datetime import datetime
 
+from ytscraper.storage import analytics, author_stats, change_log, data_version, migrations, reply_counts, timestamps, video_stats
+
 def export_sqlite_data(sqlite_path):
     """Export data from SQLite database to JSON files"""
     print(f"📂 Connecting to SQLite database: {sqlite_path}")
@@ -141,6 +143,7 @@ def import_to_postgres(pg_conn):
         for i in range(0, len(comments), batch_size):
             batch = comments[i:i + batch_size]
             
+            change_log.log_new_comments(cursor, batch, 'postgres')
             for comment in batch:
                 cursor.execute("""
                     INSERT INTO comments (comment_id, video_id, parent_comment_id, 
@@ -153,7 +156,7 @@ def import_to_postgres(pg_conn):
                         channel_owner_liked = EXCLUDED.channel_owner_liked
                 """, (
                     comment['comment_id'], comment['video_id'], 
-                    comment.get('parent_comment_id'), comment['author'],
+                    comment.get('parent_comment_id') or None, comment['author'],
                     comment['text'], comment['published_at'], 
                     comment['like_count'], comment.get('is_reply', False),
                     comment.get('channel_owner_liked', False)
@@ -164,6 +167,20 @@ def import_to_postgres(pg_conn):
         
         print(f"✅ Imported {len(comments)} comments")
     
+    # Fill the epoch timestamp columns, then recompute reply counts and
+    # per-video and per-author totals from the imported rows
+    for table in timestamps.EPOCH_COLUMNS:
+        timestamps.backfill_epoch_columns(cursor, table, 'postgres')
+    reply_counts.rebuild_reply_counts(cursor, 'postgres')
+    video_stats.rebuild_video_stats(cursor, 'postgres')
+    author_stats.rebuild_authors(cursor, 'postgres')
+    
+    # Let web app caches know the data changed
+    data_version.bump_data_version(cursor, 'postgres')
+    
+    # Materialize comment statistics for the stats endpoints
+    cursor.execute("SELECT DISTINCT video_id FROM comments")
+    analytics.refresh_rollups(cursor, [row[0] for row in cursor.fetchall()], 'postgres')
     pg_conn.commit()
 
 def main():
@@ -195,6 +212,9 @@ def main():
             # Create tables
             create_postgres_tables(pg_conn)
             
+            # Bring indexes, search columns and the data version table up to date
+            migrations.migrate_postgres(pg_conn)
+            
             # Import data
             import_to_postgres(pg_conn)
             
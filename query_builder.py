@@ -0,0 +1,169 @@
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+_COLUMN_NAME_RE = re.compile(r'(?:\bAS\s+|\.|^\s*)(\w+)\s*$', re.IGNORECASE)
+
+# Quoted string literals and identifiers, whose text isn't placeholders
+_QUOTED_RE = re.compile(r"""('(?:[^']|'')*'|"(?:[^"]|"")*")""")
+
+
+@lru_cache(maxsize=2048)
+def compile_sql(sql: str, dialect: str) -> str:
+    """Translate ``?`` placeholders for the target dialect.
+
+    A ``?`` inside a quoted literal or identifier is left alone. Results
+    are cached, so each distinct statement is rewritten once per process
+    rather than on every request.
+
+    Args:
+        sql: Statement written with ``?`` placeholders
+        dialect: 'sqlite' or 'postgres'
+
+    Returns:
+        Statement text ready for cursor.execute
+    """
+    if dialect != 'postgres' or '?' not in sql:
+        return sql
+    # split() with a group keeps the quoted parts at the odd indexes
+    parts = _QUOTED_RE.split(sql)
+    return ''.join(part if i % 2 else part.replace('?', '%s') for i, part in enumerate(parts))
+
+
+def column_name(expression: str) -> str:
+    """Get the result column name of a select-list expression.
+
+    ``c.comment_id`` gives ``comment_id`` and ``v.title AS video_title``
+    gives ``video_title``.
+    """
+    match = _COLUMN_NAME_RE.search(expression)
+    if match is None:
+        raise ValueError(f"Select expression needs an alias: {expression!r}")
+    return match.group(1)
+
+
+class CompiledSelect(NamedTuple):
+    """Statement texts generated from one filter spec for one dialect."""
+
+    rows_sql: str
+    count_sql: str
+    capped_count_sql: str
+    explain_sql: str
+    columns: Tuple[str, ...]
+
+    def to_dicts(self, rows: Iterable) -> List[Dict]:
+        """Map row tuples to dicts using the precomputed column names"""
+        columns = self.columns
+        return [dict(zip(columns, row)) for row in rows]
+
+
+def _from_where(from_clause: str, joins: Sequence[str], conditions: Sequence[str]) -> str:
+    sql = from_clause + ''.join(' ' + join for join in joins)
+    if conditions:
+        sql += ' WHERE ' + ' AND '.join(conditions)
+    return sql
+
+
+@lru_cache(maxsize=512)
+def _compile_select(dialect: str, columns: Tuple[str, ...], from_clause: str,
+                    joins: Tuple[str, ...], conditions: Tuple[str, ...],
+                    seek: Tuple[str, ...], order_by: str, limit: bool, offset: bool) -> CompiledSelect:
+    from_where = _from_where(from_clause, joins, conditions)
+    rows_sql = 'SELECT ' + ', '.join(columns) + ' ' + _from_where(from_clause, joins, conditions + seek)
+    if order_by:
+        rows_sql += ' ORDER BY ' + order_by
+    if limit:
+        rows_sql += ' LIMIT ?'
+    if offset:
+        rows_sql += ' OFFSET ?'
+
+    return CompiledSelect(
+        rows_sql=compile_sql(rows_sql, dialect),
+        count_sql=compile_sql('SELECT COUNT(*) ' + from_where, dialect),
+        capped_count_sql=compile_sql('SELECT COUNT(*) FROM (SELECT 1 ' + from_where + ' LIMIT ?) capped', dialect),
+        explain_sql=compile_sql('EXPLAIN (FORMAT JSON) SELECT 1 ' + from_where, dialect),
+        columns=tuple(column_name(column) for column in columns)
+    )
+
+
+class SelectQuery:
+    """A SELECT assembled from filter pieces, compiled once per combination.
+
+    Callers add joins and conditions as SQL fragments with ``?`` placeholders
+    and pass the values separately, so the fragments only vary with which
+    filters are active. The row and count statements are both generated
+    from the same spec and cached per dialect. Seek conditions (keyset
+    pagination) restrict the rows but not the count.
+    """
+
+    def __init__(self, dialect: str, from_clause: str, columns: Sequence[str] = ()):
+        self.dialect = dialect
+        self.from_clause = from_clause
+        self._columns: List[str] = list(columns)
+        self._joins: List[str] = []
+        self._join_params: List = []
+        self._conditions: List[str] = []
+        self._condition_params: List = []
+        self._seek: List[str] = []
+        self._seek_params: List = []
+        self._order_by = ''
+
+    def select(self, *columns: str) -> 'SelectQuery':
+        """Add select-list expressions; each needs a plain column or an alias"""
+        self._columns.extend(columns)
+        return self
+
+    def join(self, sql: str, params: Sequence = ()) -> 'SelectQuery':
+        """Add a JOIN clause and its parameters"""
+        self._joins.append(sql)
+        self._join_params.extend(params)
+        return self
+
+    def where(self, sql: str, params: Sequence = ()) -> 'SelectQuery':
+        """Add a filter condition applied to both rows and count"""
+        self._conditions.append(sql)
+        self._condition_params.extend(params)
+        return self
+
+    def seek(self, sql: str, params: Sequence = ()) -> 'SelectQuery':
+        """Add a condition applied to the rows only, e.g. a keyset cursor"""
+        self._seek.append(sql)
+        self._seek_params.extend(params)
+        return self
+
+    def order_by(self, sql: str) -> 'SelectQuery':
+        """Set the ORDER BY expression list"""
+        self._order_by = sql
+        return self
+
+    def compile(self, limit: bool = False, offset: bool = False) -> CompiledSelect:
+        """Get the cached statements for this filter combination"""
+        return _compile_select(
+            self.dialect, tuple(self._columns), self.from_clause, tuple(self._joins),
+            tuple(self._conditions), tuple(self._seek), self._order_by, limit, offset
+        )
+
+    def filter_params(self) -> List:
+        """Parameters of the joins and conditions, as used by the count statements"""
+        return self._join_params + self._condition_params
+
+    def rows(self, limit: Optional[int] = None, offset: Optional[int] = None) -> Tuple[CompiledSelect, List]:
+        """Get the compiled statements and the parameters for the row query.
+
+        Args:
+            limit: Row limit, or None for all rows
+            offset: Rows to skip, or None
+
+        Returns:
+            (compiled, params) for compiled.rows_sql
+        """
+        params = self.filter_params() + self._seek_params
+        if limit is not None:
+            params.append(limit)
+        if offset is not None:
+            params.append(offset)
+        return self.compile(limit is not None, offset is not None), params
+
+    def from_where(self) -> Tuple[str, List]:
+        """Get the uncompiled FROM ... WHERE text and its parameters, for custom statements"""
+        return _from_where(self.from_clause, self._joins, self._conditions), self.filter_params()
@@ -0,0 +1,123 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+MISSING = object()
+
+
+class QueryCache:
+    """In-process LRU cache for query results with TTL and version invalidation.
+
+    Entries are keyed by the caller (typically endpoint, SQL and parameters)
+    plus the data version. When a newer data version is seen the whole cache
+    is dropped, so results from before a scrape are never served after it.
+
+    Memory is bounded by entry count and by total weight, where a result's
+    weight is its row count (scalars weigh 1). Expiry is measured with
+    clock, time.monotonic unless a test supplies its own.
+    """
+
+    def __init__(self, max_entries: int = 1000, max_weight: int = 50000, ttl: float = 300.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.max_weight = max_weight
+        self.ttl = ttl
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int, float]]" = OrderedDict()
+        self._weight = 0
+        self._version: Optional[int] = None
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def _sync_version(self, version: int) -> None:
+        # Caller holds the lock
+        if self._version is None or version > self._version:
+            if self._entries:
+                self._invalidations += 1
+            self._entries.clear()
+            self._weight = 0
+            self._version = version
+
+    def get(self, key: Hashable, version: int) -> Any:
+        """Look up a cached result.
+
+        Args:
+            key: Cache key
+            version: Current data version
+
+        Returns:
+            Cached value, or MISSING
+        """
+        with self._lock:
+            self._sync_version(version)
+            entry = self._entries.get((version, key))
+            if entry is None:
+                self._misses += 1
+                return MISSING
+            value, weight, expires_at = entry
+            if expires_at < self.clock():
+                del self._entries[(version, key)]
+                self._weight -= weight
+                self._misses += 1
+                return MISSING
+            self._entries.move_to_end((version, key))
+            self._hits += 1
+            return value
+
+    def put(self, key: Hashable, version: int, value: Any) -> None:
+        """Store a result, evicting least recently used entries to fit.
+
+        Args:
+            key: Cache key
+            version: Data version the value was computed under
+            value: Result to cache; lists weigh their length
+        """
+        weight = len(value) if isinstance(value, (list, tuple)) else 1
+        if weight > self.max_weight:
+            return
+
+        with self._lock:
+            self._sync_version(version)
+            if version < self._version:
+                # Computed before a newer scrape landed; don't keep it
+                return
+            full_key = (version, key)
+            previous = self._entries.pop(full_key, None)
+            if previous is not None:
+                self._weight -= previous[1]
+            self._entries[full_key] = (value, weight, self.clock() + self.ttl)
+            self._weight += weight
+            while self._entries and (len(self._entries) > self.max_entries or self._weight > self.max_weight):
+                _, (_, evicted_weight, _) = self._entries.popitem(last=False)
+                self._weight -= evicted_weight
+                self._evictions += 1
+
+    def clear(self) -> None:
+        """Drop every cached entry"""
+        with self._lock:
+            self._entries.clear()
+            self._weight = 0
+
+    def stats(self) -> Dict:
+        """Get hit/miss counters and current occupancy"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'entries': len(self._entries),
+                'weight': self._weight,
+                'max_entries': self.max_entries,
+                'max_weight': self.max_weight,
+                'ttl_seconds': self.ttl,
+                'data_version': self._version,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': round(self._hits / lookups, 4) if lookups else 0.0,
+                'evictions': self._evictions,
+                'invalidations': self._invalidations
+            }
@@ -6,12 +6,14 @@ A tool to search comments in the SQLite database.
 """
 
 import argparse
-import json
 import os
 import sqlite3
 from datetime import datetime
 from pathlib import Path
 
+from ytscraper import serialization
+from ytscraper.storage import fulltext, trigram
+
 def parse_args():
     """Parse command line arguments."""
     parser = argparse.ArgumentParser(
@@ -44,6 +46,12 @@ def parse_args():
         "-o", "--output",
         help="Output results to JSON file"
     )
+    parser.add_argument(
+        "-s", "--sort",
+        choices=["date", "relevance"],
+        default="date",
+        help="Result ordering; relevance needs the full-text index (default: date)"
+    )
     parser.add_argument(
         "--format",
         choices=["text", "json"],
@@ -76,21 +84,50 @@ def search_comments(args):
     SELECT 
         c.comment_id, c.video_id, c.parent_comment_id, c.author, 
         c.text, c.published_at, c.like_count, c.is_reply,
-        v.title as video_title, v.published_at as video_published_at
+        v.title as video_title, v.published_at as video_published_at{extra_columns}
     FROM 
         comments c
     JOIN 
-        videos v ON c.video_id = v.video_id
+        videos v ON c.video_id = v.video_id{fts_join}
     WHERE 
-        c.text LIKE ?
+        {match}
     """
     
-    params = [f"%{query}%"]
+    try:
+        conn = sqlite3.connect(db_path, detect_types=sqlite3.PARSE_DECLTYPES)
+        use_fts = fulltext.sqlite_search_index_exists(conn)
+        use_trigram = trigram.sqlite_trigram_index_exists(conn)
+    except sqlite3.Error as e:
+        print(f"Database error: {e}")
+        return []
     
-    # Add author filter if provided
+    match_expression = fulltext.fts5_match_expression(fulltext.parse_search_query(query))
+    if use_fts and match_expression:
+        # Ranked full-text match with highlighted excerpts
+        sql = sql.format(
+            extra_columns=(
+                f",\n        snippet(comments_fts, 0, '{fulltext.SNIPPET_MATCH_START}', "
+                f"'{fulltext.SNIPPET_MATCH_END}', '…', 16) as snippet"
+            ),
+            fts_join="\n    JOIN\n        comments_fts ON comments_fts.rowid = c.rowid",
+            match="comments_fts MATCH ?"
+        )
+        params = [match_expression]
+    else:
+        # Substring fallback when the index is missing or can't serve the term
+        sql = sql.format(extra_columns="", fts_join="", match="c.text LIKE ?")
+        params = [f"%{query}%"]
+    
+    # Add author filter if provided, matching the name anywhere
     if args.author:
-        sql += " AND c.author LIKE ?"
-        params.append(f"%{args.author}%")
+        author_match = trigram.substring_clause('authors', 'a', args.author, 'sqlite') if use_trigram else None
+        if author_match:
+            # Find the names in the trigram index, then their comments by author
+            sql += f" AND c.author IN (SELECT a.author FROM authors a WHERE {author_match[0]})"
+            params.extend(author_match[1])
+        else:
+            sql += " AND c.author LIKE ? ESCAPE '\\'"
+            params.append(trigram.like_pattern(args.author))
     
     # Add video filter if provided
     if args.video:
@@ -98,12 +135,14 @@ def search_comments(args):
         params.append(args.video)
     
     # Add order and limit
-    sql += " ORDER BY c.published_at DESC LIMIT ?"
+    if args.sort == "relevance" and use_fts and match_expression:
+        sql += " ORDER BY bm25(comments_fts) LIMIT ?"
+    else:
+        sql += " ORDER BY c.published_ts DESC, c.comment_id DESC LIMIT ?"
     params.append(limit)
     
     # Execute query
     try:
-        conn = sqlite3.connect(db_path, detect_types=sqlite3.PARSE_DECLTYPES)
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
@@ -113,13 +152,8 @@ def search_comments(args):
         results = []
         for row in cursor.fetchall():
             result = dict(row)
-            
-            # Convert datetime objects to strings for JSON serialization
-            if isinstance(result['published_at'], datetime):
-                result['published_at'] = result['published_at'].isoformat()
-            if isinstance(result['video_published_at'], datetime):
-                result['video_published_at'] = result['video_published_at'].isoformat()
-                
+            if 'snippet' in result:
+                result['snippet'] = fulltext.highlight_snippet(result['snippet'])
             results.append(result)
         
         conn.close()
@@ -141,7 +175,7 @@ def display_results(results, output_format="text"):
         return
     
     if output_format == "json":
-        print(json.dumps(results, indent=2))
+        print(serialization.dumps(results, indent=True))
         return
     
     # Text format
@@ -173,8 +207,8 @@ def save_to_file(results, filename):
         filename: Output filename
     """
     try:
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(results, f, ensure_ascii=False, indent=2)
+        with open(filename, 'wb') as f:
+            f.write(serialization.dumpb(results, indent=True))
         print(f"Results saved to {filename}")
     except Exception as e:
         print(f"Error saving results: {e}")
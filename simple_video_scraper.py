@@ -16,6 +16,8 @@ from datetime import datetime
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
+from ytscraper.storage import analytics, author_stats, change_log, data_version, migrations, reply_counts, timestamps, video_stats
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -40,6 +42,8 @@ class SkinniVideoScraper:
         """Initialize the scraper with YouTube API key."""
         self.youtube = build('youtube', 'v3', developerKey=api_key)
         self.db_path = Path("data/youtube_comments.db")
+        # Videos saved since the rollups were last refreshed
+        self._touched_video_ids = set()
         self.setup_database()
     
     def setup_database(self):
@@ -47,46 +51,12 @@ class SkinniVideoScraper:
         self.db_path.parent.mkdir(exist_ok=True)
         
         conn = sqlite3.connect(str(self.db_path))
-        cursor = conn.cursor()
-        
-        # Create videos table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS videos (
-                video_id TEXT PRIMARY KEY,
-                title TEXT,
-                description TEXT,
-                published_at TEXT,
-                duration TEXT,
-                view_count INTEGER,
-                like_count INTEGER,
-                comment_count INTEGER,
-                tags TEXT,
-                category_id TEXT,
-                channel_title TEXT,
-                thumbnail_url TEXT,
-                language TEXT
-            )
-        """)
-        
-        # Create comments table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS comments (
-                comment_id TEXT PRIMARY KEY,
-                video_id TEXT,
-                parent_comment_id TEXT,
-                author TEXT,
-                text TEXT,
-                published_at TEXT,
-                updated_at TEXT,
-                like_count INTEGER,
-                is_reply INTEGER DEFAULT 0,
-                channel_owner_liked INTEGER DEFAULT 0,
-                FOREIGN KEY (video_id) REFERENCES videos (video_id)
-            )
-        """)
         
-        conn.commit()
+        # Create or upgrade tables, indexes and the full-text index
+        applied = migrations.migrate_sqlite(conn)
         conn.close()
+        if applied:
+            logger.info(f"Applied {applied} schema migrations")
         logger.info("Database initialized successfully")
     
     def get_video_details(self, video_id):
@@ -131,18 +101,28 @@ class SkinniVideoScraper:
         cursor = conn.cursor()
         
         cursor.execute("""
-            INSERT OR REPLACE INTO videos 
-            (video_id, title, description, published_at, duration, view_count, 
+            INSERT INTO videos 
+            (video_id, title, description, published_at, published_ts, duration, view_count, 
              like_count, comment_count, tags, category_id, channel_title, 
              thumbnail_url, language)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(video_id) DO UPDATE SET
+                title = excluded.title, description = excluded.description,
+                published_at = excluded.published_at, published_ts = excluded.published_ts,
+                duration = excluded.duration,
+                view_count = excluded.view_count, like_count = excluded.like_count,
+                comment_count = excluded.comment_count, tags = excluded.tags,
+                category_id = excluded.category_id, channel_title = excluded.channel_title,
+                thumbnail_url = excluded.thumbnail_url, language = excluded.language
         """, (
             video_data['video_id'], video_data['title'], video_data['description'],
-            video_data['published_at'], video_data['duration'], video_data['view_count'],
+            video_data['published_at'], timestamps.to_epoch(video_data['published_at']),
+            video_data['duration'], video_data['view_count'],
             video_data['like_count'], video_data['comment_count'], video_data['tags'],
             video_data['category_id'], video_data['channel_title'], 
             video_data['thumbnail_url'], video_data['language']
         ))
+        data_version.bump_data_version(cursor)
         
         conn.commit()
         conn.close()
@@ -216,47 +196,79 @@ class SkinniVideoScraper:
         conn = sqlite3.connect(str(self.db_path))
         cursor = conn.cursor()
         
+        change_log.log_new_comments(cursor, comments)
         for comment in comments:
             cursor.execute("""
-                INSERT OR REPLACE INTO comments 
+                INSERT INTO comments 
                 (comment_id, video_id, parent_comment_id, author, text, 
-                 published_at, updated_at, like_count, is_reply, channel_owner_liked)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                 published_at, published_ts, updated_at, like_count, is_reply, channel_owner_liked)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(comment_id) DO UPDATE SET
+                    video_id = excluded.video_id, parent_comment_id = excluded.parent_comment_id,
+                    author = excluded.author, text = excluded.text,
+                    published_at = excluded.published_at, published_ts = excluded.published_ts,
+                    updated_at = excluded.updated_at,
+                    like_count = excluded.like_count, is_reply = excluded.is_reply,
+                    channel_owner_liked = excluded.channel_owner_liked
             """, (
                 comment['comment_id'], comment['video_id'], comment['parent_comment_id'],
                 comment['author'], comment['text'], comment['published_at'],
+                timestamps.to_epoch(comment['published_at']),
                 comment['updated_at'], comment['like_count'], comment['is_reply'],
                 comment['channel_owner_liked']
             ))
+        reply_counts.refresh_reply_counts(cursor, reply_counts.thread_ids(comments))
+        video_stats.refresh_video_stats(cursor, (comment['video_id'] for comment in comments))
+        author_stats.refresh_authors(cursor, (comment['author'] for comment in comments))
+        data_version.bump_data_version(cursor)
+        self._touched_video_ids.update(comment['video_id'] for comment in comments)
         
         conn.commit()
         conn.close()
         logger.info(f"Saved {len(comments)} comments to database")
     
+    def refresh_rollups(self):
+        """Materialize statistics for the videos saved since the last refresh.
+        
+        Called once at the end of a run rather than per batch, since the
+        channel rollup re-reads every comment.
+        """
+        if not self._touched_video_ids:
+            return
+        conn = sqlite3.connect(str(self.db_path))
+        analytics.refresh_rollups(conn.cursor(), self._touched_video_ids)
+        conn.commit()
+        conn.close()
+        self._touched_video_ids.clear()
+    
     def scrape_videos(self):
         """Scrape all target videos."""
         logger.info("Starting Skinni Societie video scraping...")
         total_comments = 0
         
-        for i, video_id in enumerate(VIDEO_IDS, 1):
-            logger.info(f"Processing video {i}/{len(VIDEO_IDS)}: {video_id}")
-            
-            # Get video details
-            video_data = self.get_video_details(video_id)
-            if not video_data:
-                logger.error(f"Skipping video {video_id} - could not fetch details")
-                continue
-            
-            # Save video data
-            self.save_video(video_data)
-            
-            # Get and save comments
-            comments = self.get_video_comments(video_id)
-            if comments:
-                self.save_comments(comments)
-                total_comments += len(comments)
-            
-            logger.info(f"Completed video {video_id}: {len(comments)} comments")
+        try:
+            for i, video_id in enumerate(VIDEO_IDS, 1):
+                logger.info(f"Processing video {i}/{len(VIDEO_IDS)}: {video_id}")
+                
+                # Get video details
+                video_data = self.get_video_details(video_id)
+                if not video_data:
+                    logger.error(f"Skipping video {video_id} - could not fetch details")
+                    continue
+                
+                # Save video data
+                self.save_video(video_data)
+                
+                # Get and save comments
+                comments = self.get_video_comments(video_id)
+                if comments:
+                    self.save_comments(comments)
+                    total_comments += len(comments)
+                
+                logger.info(f"Completed video {video_id}: {len(comments)} comments")
+        finally:
+            # Whatever was saved before a failure still gets its statistics
+            self.refresh_rollups()
         
         logger.info(f"Scraping complete! Total comments: {total_comments}")
         return total_comments
@@ -0,0 +1,99 @@
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class FlightTimeout(Exception):
+    """Raised when an identical in-flight call doesn't finish within the wait timeout"""
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Coalesces identical concurrent calls into one execution.
+
+    The first caller for a key runs the function; callers arriving with the
+    same key while it runs wait for it and get the same result, or the same
+    exception. Nothing is kept once the call finishes, so this complements
+    a result cache rather than replacing one: it covers the cold misses
+    that arrive together, e.g. right after a data version change.
+    """
+
+    def __init__(self, timeout: float = 30.0):
+        self.timeout = timeout
+
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+        # Monitoring counters
+        self._executions = 0
+        self._shared = 0
+        self._timeouts = 0
+        self._errors = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any], timeout: Optional[float] = None) -> Any:
+        """Run fn, or wait for the call already running under key.
+
+        Args:
+            key: Identifies calls that would produce the same result
+            fn: Zero-argument function computing the result
+            timeout: Seconds a waiting caller waits, default self.timeout;
+                the caller running fn is not limited
+
+        Returns:
+            fn's result, shared by every caller of that flight
+
+        Raises:
+            FlightTimeout: If a waiting caller's timeout expires first
+            Exception: Whatever fn raised, in every caller of that flight
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._executions += 1
+
+        if leader:
+            try:
+                call.result = fn()
+            except BaseException as e:
+                call.error = e
+                with self._lock:
+                    self._errors += 1
+                raise
+            finally:
+                # Later callers start a new flight rather than reuse this one
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+            return call.result
+
+        wait = self.timeout if timeout is None else timeout
+        if not call.done.wait(wait):
+            with self._lock:
+                self._timeouts += 1
+            raise FlightTimeout(f"Identical call still running after {wait}s")
+        with self._lock:
+            self._shared += 1
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def stats(self) -> Dict:
+        """Get execution and sharing counters"""
+        with self._lock:
+            return {
+                'in_flight': len(self._calls),
+                'executions': self._executions,
+                'shared': self._shared,
+                'timeouts': self._timeouts,
+                'errors': self._errors,
+                'timeout_seconds': self.timeout
+            }
@@ -0,0 +1,96 @@
+import sqlite3
+
+import pytest
+
+import webapp
+from ytscraper.storage import (author_stats, change_log, data_version, migrations, reply_counts,
+                               timestamps, video_stats)
+
+VIDEO_COLUMNS = ['video_id', 'title', 'published_at', 'published_ts', 'view_count', 'like_count', 'comment_count']
+COMMENT_COLUMNS = [
+    'comment_id', 'video_id', 'parent_comment_id', 'author', 'text', 'published_at', 'published_ts',
+    'updated_at', 'like_count', 'is_reply', 'channel_owner_liked'
+]
+
+
+def make_video(video_id, title=None, published_at='2025-06-01T00:00:00Z', **fields):
+    return {'video_id': video_id, 'title': title or f'Video {video_id}', 'published_at': published_at,
+            'view_count': 0, 'like_count': 0, 'comment_count': 0, **fields}
+
+
+def make_comment(comment_id, video_id='vid', parent=None, author='@ann', text='hello',
+                 published_at='2025-06-01T12:00:00Z', like_count=0, **fields):
+    return {
+        'comment_id': comment_id, 'video_id': video_id, 'parent_comment_id': parent,
+        'author': author, 'text': text, 'published_at': published_at, 'updated_at': published_at,
+        'like_count': like_count, 'is_reply': 1 if parent else 0, 'channel_owner_liked': 0, **fields
+    }
+
+
+class AppDatabase:
+    """A migrated SQLite file the web app serves, with writers like the scraper's"""
+
+    def __init__(self, path):
+        self.path = path
+        self.client = webapp.app.test_client()
+
+    def connect(self):
+        return sqlite3.connect(str(self.path))
+
+    def save_videos(self, videos):
+        conn = self.connect()
+        for video in videos:
+            row = {**video, 'published_ts': timestamps.to_epoch(video['published_at'])}
+            conn.execute(
+                f"INSERT INTO videos ({', '.join(VIDEO_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(VIDEO_COLUMNS))})",
+                [row[column] for column in VIDEO_COLUMNS]
+            )
+        data_version.bump_data_version(conn.cursor())
+        conn.commit()
+        conn.close()
+
+    def save_comments(self, comments):
+        """Store comments the way the scrapers do, keeping every aggregate current"""
+        conn = self.connect()
+        cursor = conn.cursor()
+        change_log.log_new_comments(cursor, comments)
+        updates = ', '.join(f"{column} = excluded.{column}" for column in COMMENT_COLUMNS[1:])
+        for comment in comments:
+            row = {**comment, 'published_ts': timestamps.to_epoch(comment['published_at'])}
+            cursor.execute(
+                f"INSERT INTO comments ({', '.join(COMMENT_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(COMMENT_COLUMNS))}) "
+                f"ON CONFLICT(comment_id) DO UPDATE SET {updates}",
+                [row[column] for column in COMMENT_COLUMNS]
+            )
+        reply_counts.refresh_reply_counts(cursor, reply_counts.thread_ids(comments))
+        video_stats.refresh_video_stats(cursor, (comment['video_id'] for comment in comments))
+        author_stats.refresh_authors(cursor, (comment['author'] for comment in comments))
+        data_version.bump_data_version(cursor)
+        conn.commit()
+        conn.close()
+
+    def get(self, url, **kwargs):
+        return self.client.get(url, **kwargs)
+
+
+@pytest.fixture
+def app_db(tmp_path, monkeypatch):
+    """The web app running its startup checks against an empty, migrated SQLite file"""
+    path = tmp_path / 'comments.db'
+    conn = sqlite3.connect(str(path))
+    migrations.migrate_sqlite(conn)
+    conn.close()
+
+    monkeypatch.setattr(webapp, 'USE_POSTGRES', False)
+    monkeypatch.setattr(webapp, 'DB_DIALECT', 'sqlite')
+    monkeypatch.setattr(webapp, 'DB_PATH', str(path))
+    monkeypatch.setattr(webapp, '_db_pool', None)
+    # The startup checks set these; restore them afterwards
+    for name in ('FULLTEXT_ENABLED', 'TRIGRAM_ENABLED', 'CHANGE_SEQ_ENABLED'):
+        monkeypatch.setattr(webapp, name, getattr(webapp, name))
+    monkeypatch.setattr(webapp, '_initialized', False)
+    webapp.QUERY_CACHE.clear()
+    yield AppDatabase(path)
+    webapp.QUERY_CACHE.clear()
@@ -0,0 +1,69 @@
+import sqlite3
+
+import pytest
+
+from ytscraper.storage import author_stats, video_stats
+from ytscraper.storage.sql_helpers import batched
+
+COMMENTS = [
+    # comment_id, video_id, parent_comment_id, author, like_count, channel_owner_liked, published_ts
+    ('c1', 'v1', None, '@ann', 3, 1, 1717200000),
+    ('c2', 'v1', 'c1', '@bob', 1, 0, 1717300000),
+    ('c3', 'v1', None, '@bob', None, 0, 1717100000),
+    ('c4', 'v2', None, '@ann', 7, 0, 1717400000),
+    ('c5', 'v2', None, None, 2, 0, None),
+]
+
+
+@pytest.fixture
+def cursor():
+    conn = sqlite3.connect(':memory:')
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TABLE comments (
+            comment_id TEXT PRIMARY KEY, video_id TEXT, parent_comment_id TEXT, author TEXT,
+            like_count INTEGER, channel_owner_liked INTEGER, published_ts INTEGER
+        )
+    """)
+    cursor.executemany("INSERT INTO comments VALUES (?, ?, ?, ?, ?, ?, ?)", COMMENTS)
+    video_stats.create_stats_table(cursor)
+    cursor.execute(author_stats.AUTHORS_TABLE_SQL['sqlite'])
+    return cursor
+
+
+def _rows(cursor, table, columns):
+    # refreshed_at is the last column and differs between runs
+    cursor.execute(f"SELECT {', '.join(columns[:-1])} FROM {table} ORDER BY {columns[0]}")
+    return cursor.fetchall()
+
+
+def test_batched_splits_in_order():
+    assert list(batched(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(batched([])) == []
+
+
+def test_video_stats_refresh_matches_rebuild(cursor):
+    video_stats.refresh_video_stats(cursor, ['v1', 'v2', 'v1'])
+    refreshed = _rows(cursor, 'video_stats', video_stats.STATS_COLUMNS)
+    video_stats.rebuild_video_stats(cursor)
+
+    assert refreshed == _rows(cursor, 'video_stats', video_stats.STATS_COLUMNS)
+    assert refreshed[0] == ('v1', 2, 1, 4, 1, '2024-05-30T20:13:20Z', '2024-06-02T03:46:40Z')
+    assert video_stats.get_video_stats(cursor, 'v2')['top_level_count'] == 2
+
+
+def test_author_refresh_matches_rebuild_and_skips_none(cursor):
+    author_stats.refresh_authors(cursor, ['@ann', '@bob', None])
+    refreshed = _rows(cursor, 'authors', author_stats.AUTHOR_COLUMNS)
+    author_stats.rebuild_authors(cursor)
+
+    assert refreshed == _rows(cursor, 'authors', author_stats.AUTHOR_COLUMNS)
+    assert [row[0] for row in refreshed] == ['@ann', '@bob']
+    assert author_stats.get_author(cursor, '@ann')['video_count'] == 2
+
+
+def test_refresh_removes_rows_without_comments(cursor):
+    video_stats.rebuild_video_stats(cursor)
+    cursor.execute("DELETE FROM comments WHERE video_id = 'v2'")
+    video_stats.refresh_video_stats(cursor, ['v2'])
+    assert video_stats.get_video_stats(cursor, 'v2') is None
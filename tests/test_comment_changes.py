@@ -0,0 +1,49 @@
+import pytest
+
+from conftest import make_comment, make_video
+
+
+@pytest.fixture
+def video(app_db):
+    app_db.save_videos([make_video('vid'), make_video('other')])
+    app_db.save_comments([make_comment(f'c{i}', text=f'comment {i}') for i in range(5)])
+    return app_db
+
+
+def _sync(app_db, token='', limit=2, video_id='vid'):
+    """Fetch pages until has_more is false; returns (comment IDs and texts, token)"""
+    changes = []
+    while True:
+        body = app_db.get(f'/api/videos/{video_id}/comments/changes?limit={limit}&since={token}').get_json()
+        changes += [(c['comment_id'], c['text']) for c in body['changes']]
+        token = body['token']
+        if not body['has_more']:
+            return changes, token
+
+
+def test_first_sync_pages_through_every_comment(video):
+    changes, _ = _sync(video)
+
+    assert sorted(changes) == [(f'c{i}', f'comment {i}') for i in range(5)]
+
+
+def test_token_returns_only_later_inserts_and_edits(video):
+    _, token = _sync(video)
+    assert _sync(video, token) == ([], token)
+
+    video.save_comments([make_comment('c1', text='edited once')])
+    video.save_comments([make_comment('c1', text='edited twice'), make_comment('new', text='new one')])
+    video.save_comments([make_comment('elsewhere', video_id='other')])
+    changes, next_token = _sync(video, token)
+
+    # An edited comment appears once, in its latest state
+    assert changes == [('c1', 'edited twice'), ('new', 'new one')]
+    assert _sync(video, next_token) == ([], next_token)
+
+
+@pytest.mark.parametrize('token', ['bogus', 'other'])
+def test_tokens_are_checked_against_the_video(video, token):
+    if token == 'other':
+        _, token = _sync(video, video_id='other')
+
+    assert video.get(f'/api/videos/vid/comments/changes?since={token}').status_code == 400
@@ -0,0 +1,54 @@
+import pytest
+
+import webapp
+from conftest import make_comment, make_video
+from ytscraper.storage.sql_helpers import batched
+
+
+def _reply(comment_id, parent, day):
+    return make_comment(comment_id, parent=parent, published_at=f'2025-06-{day:02d}T12:00:00Z')
+
+
+@pytest.fixture
+def threads(app_db, monkeypatch):
+    app_db.save_videos([make_video('vid'), make_video('other')])
+    app_db.save_comments([
+        make_comment('t1', published_at='2025-06-03T00:00:00Z'),
+        make_comment('t2', published_at='2025-06-02T00:00:00Z'),
+        make_comment('t3', published_at='2025-06-01T00:00:00Z'),
+        _reply('t1-b', 't1', 12), _reply('t1-a', 't1', 11), _reply('t1-c', 't1', 13),
+        _reply('t2-a', 't2', 15), _reply('t3-a', 't3', 20),
+        make_comment('elsewhere', video_id='other'),
+    ])
+    # Parent IDs are queried two at a time, so one page needs several IN lists
+    batches = []
+    def small_batches(values):
+        chunks = list(batched(values, 2))
+        batches.extend(chunks)
+        return chunks
+    monkeypatch.setattr(webapp, 'batched', small_batches)
+    return app_db, batches
+
+
+def _threads(body):
+    return {c['comment_id']: [r['comment_id'] for r in c['replies']] for c in body['comments']}
+
+
+def test_replies_for_a_page_are_loaded_together_and_grouped_by_parent(threads):
+    app_db, batches = threads
+
+    body = app_db.get('/api/videos/vid/comments?sort=published_at&order=desc').get_json()
+
+    assert _threads(body) == {'t1': ['t1-a', 't1-b', 't1-c'], 't2': ['t2-a'], 't3': ['t3-a']}
+    assert batches == [['t1', 't2'], ['t3']]
+
+
+def test_max_replies_caps_each_thread_and_flags_the_rest(threads):
+    app_db, _ = threads
+
+    body = app_db.get('/api/videos/vid/comments?max_replies=2').get_json()
+
+    assert _threads(body) == {'t1': ['t1-a', 't1-b'], 't2': ['t2-a'], 't3': ['t3-a']}
+    assert {c['comment_id']: c['has_more_replies'] for c in body['comments']} == {
+        't1': True, 't2': False, 't3': False
+    }
@@ -0,0 +1,56 @@
+import gzip
+import json
+
+import pytest
+
+import webapp
+from conftest import make_comment, make_video
+
+URL = '/api/videos/vid/comments.ndjson?sort=like_count&order=desc'
+
+
+@pytest.fixture
+def video(app_db, monkeypatch):
+    app_db.save_videos([make_video('vid')])
+    app_db.save_comments([
+        make_comment('low', like_count=1),
+        make_comment('high', like_count=9),
+        make_comment('high-2', parent='high', published_at='2025-06-03T00:00:00Z'),
+        make_comment('high-1', parent='high', published_at='2025-06-02T00:00:00Z'),
+        make_comment('low-1', parent='low', published_at='2025-06-02T00:00:00Z'),
+        make_comment('mid', like_count=5),
+        make_comment('other', video_id='other', like_count=7),
+    ])
+    # Small batches, so the stream is written in several chunks
+    rows = webapp.iter_row_batches
+    monkeypatch.setattr(webapp, 'iter_row_batches', lambda db, query, params: rows(db, query, params, 2))
+    return app_db
+
+
+def _lines(body):
+    assert body.endswith(b'\n')
+    return [json.loads(line) for line in body.splitlines()]
+
+
+def test_threads_stream_in_sort_order_with_replies_after_their_parent(video):
+    response = video.get(URL + '&compress=0')
+
+    assert response.mimetype == 'application/x-ndjson'
+    assert [c['comment_id'] for c in _lines(response.get_data())] == [
+        'high', 'high-1', 'high-2', 'mid', 'low', 'low-1'
+    ]
+
+
+def test_gzipped_stream_decodes_to_the_same_lines(video):
+    plain = video.get(URL + '&compress=0').get_data()
+
+    response = video.get(URL, headers={'Accept-Encoding': 'gzip'})
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.get_data()) == plain
+
+
+def test_filters_apply_to_the_threads_streamed(video):
+    body = video.get(URL + '&compress=0&min_likes=5').get_data()
+
+    assert [c['comment_id'] for c in _lines(body)] == ['high', 'high-1', 'high-2', 'mid']
@@ -0,0 +1,58 @@
+import pytest
+
+from conftest import make_comment, make_video
+
+URL = '/api/videos/vid/comments?sort=like_count&order=desc'
+
+
+@pytest.fixture
+def served(app_db):
+    app_db.save_videos([make_video('vid')])
+    app_db.save_comments([make_comment('c1')])
+    return app_db
+
+
+def test_responses_carry_validators_and_must_revalidate(served):
+    response = served.get(URL)
+
+    assert response.status_code == 200
+    assert response.headers['ETag'].startswith('W/"v')
+    assert response.headers['Last-Modified']
+    assert response.headers['Cache-Control'] == 'no-cache'
+
+
+def test_matching_etag_or_date_gets_304_without_a_body(served):
+    first = served.get(URL)
+
+    by_etag = served.get(URL, headers={'If-None-Match': first.headers['ETag']})
+    by_date = served.get(URL, headers={'If-Modified-Since': first.headers['Last-Modified']})
+
+    for response in (by_etag, by_date):
+        assert response.status_code == 304
+        assert response.get_data() == b''
+        assert response.headers['ETag'] == first.headers['ETag']
+
+
+def test_a_write_invalidates_the_etag(served):
+    etag = served.get(URL).headers['ETag']
+    served.save_comments([make_comment('c2')])
+
+    response = served.get(URL, headers={'If-None-Match': etag})
+
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert len(response.get_json()['comments']) == 2
+
+
+def test_etag_depends_on_the_query_not_its_parameter_order(served):
+    etag = served.get(URL).headers['ETag']
+
+    assert served.get('/api/videos/vid/comments?order=desc&sort=like_count').headers['ETag'] == etag
+    assert served.get('/api/videos/vid/comments?sort=like_count&order=asc').headers['ETag'] != etag
+
+
+def test_error_responses_are_not_tagged(served):
+    response = served.get('/api/comments/missing/replies')
+
+    assert response.status_code == 404
+    assert 'ETag' not in response.headers
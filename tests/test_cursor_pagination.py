@@ -0,0 +1,67 @@
+import pytest
+
+from conftest import make_comment, make_video
+
+
+def _walk(app_db, url, key, per_page, page_cursor=''):
+    """Follow next_cursor to the last page, collecting IDs"""
+    ids = []
+    for _ in range(100):
+        body = app_db.get(f"{url}&per_page={per_page}&cursor={page_cursor}").get_json()
+        ids += [row[key] for row in body[key.split('_')[0] + 's']]
+        page_cursor = body['pagination']['next_cursor']
+        if not page_cursor:
+            return ids
+    pytest.fail('cursor walk did not end')
+
+
+@pytest.fixture
+def comments(app_db):
+    app_db.save_videos([make_video('vid')])
+    # Ties on every sort key, plus NULL dates, likes and authors
+    app_db.save_comments([
+        make_comment(f'c{i:02d}', author=[None, '@ann', '@bob'][i % 3],
+                     published_at=None if i % 7 == 0 else f'2025-06-{1 + i % 4:02d}T12:00:00Z',
+                     like_count=None if i % 5 == 0 else i % 3)
+        for i in range(23)
+    ])
+    return app_db
+
+
+@pytest.mark.parametrize('order', ['asc', 'desc'])
+@pytest.mark.parametrize('sort', ['published_at', 'like_count', 'author'])
+def test_comment_cursor_walk_matches_one_big_page(comments, sort, order):
+    url = f'/api/videos/vid/comments?sort={sort}&order={order}&include_replies=none'
+
+    walked = _walk(comments, url, 'comment_id', per_page=4)
+
+    assert len(walked) == len(set(walked)) == 23
+    assert walked == _walk(comments, url, 'comment_id', per_page=100)
+
+
+def test_comments_stored_mid_walk_cause_no_duplicates(comments):
+    url = '/api/videos/vid/comments?sort=published_at&order=desc&include_replies=none'
+    first = comments.get(f'{url}&per_page=5').get_json()
+    comments.save_comments([make_comment('newest', published_at='2025-07-01T00:00:00Z')])
+
+    walked = [c['comment_id'] for c in first['comments']]
+    walked += _walk(comments, url, 'comment_id', 5, first['pagination']['next_cursor'])
+
+    assert len(walked) == len(set(walked)) == 23
+
+
+@pytest.mark.parametrize('order', ['asc', 'desc'])
+@pytest.mark.parametrize('sort', ['published_at', 'title', 'view_count', 'like_count', 'comment_count'])
+def test_video_cursor_walk_matches_one_big_page(app_db, sort, order):
+    app_db.save_videos([
+        {**make_video(f'v{i:02d}', published_at=None if i % 6 == 0 else f'2025-05-{1 + i % 3:02d}T00:00:00Z',
+                      view_count=None if i % 5 == 0 else i % 2, like_count=i % 3, comment_count=None),
+         'title': None if i % 4 == 0 else f'Title {i % 3}'}
+        for i in range(17)
+    ])
+    url = f'/api/videos?sort={sort}&order={order}'
+
+    walked = _walk(app_db, url, 'video_id', per_page=3)
+
+    assert len(walked) == len(set(walked)) == 17
+    assert walked == _walk(app_db, url, 'video_id', per_page=100)
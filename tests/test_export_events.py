@@ -0,0 +1,55 @@
+import types
+
+import pytest
+
+import webapp
+from export_jobs import ExportJobStore
+
+
+@pytest.fixture
+def running_job(tmp_path, monkeypatch):
+    store = ExportJobStore(tmp_path / 'jobs.db')
+    job_id = store.create('video', {}, max_active=1)
+    store.start(job_id)
+    monkeypatch.setattr(webapp, '_export_runner', types.SimpleNamespace(store=store))
+    # Skip the startup schema check, which would migrate the app's own database
+    monkeypatch.setattr(webapp, '_initialized', True)
+    monkeypatch.setattr(webapp, 'EVENT_HEARTBEAT', 0.05)
+    monkeypatch.setattr(webapp, 'EVENT_STREAM_MAX_AGE', 0.3)
+    return store, job_id
+
+
+def _events(job_id, headers):
+    with webapp.app.test_client().get(f'/api/export/events/{job_id}', headers=headers) as response:
+        assert response.status_code == 200
+        body = response.get_data(as_text=True)
+    return [line.split(': ', 1)[1] for line in body.splitlines() if line.startswith('event: ')]
+
+
+@pytest.mark.parametrize('last_event_id', ['nan', 'inf', '-inf', 'Infinity', 'bogus', ''])
+def test_invalid_last_event_id_is_treated_as_absent(running_job, last_event_id):
+    _, job_id = running_job
+
+    assert _events(job_id, {'Last-Event-ID': last_event_id}) == _events(job_id, {}) == ['progress']
+
+
+def test_last_event_id_skips_states_already_seen(running_job):
+    store, job_id = running_job
+    seen = webapp.event_time_id(store.get(job_id)['updated_at'])
+
+    assert _events(job_id, {'Last-Event-ID': seen}) == []
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('1718000000.250000', 1718000000.25),
+    ('nan', None),
+    ('-Infinity', None),
+    (None, None),
+])
+def test_parse_event_time(value, expected):
+    assert webapp.parse_event_time(value) == expected
+
+
+@pytest.mark.parametrize('updated_at', [1718000000.1234564, 1718000000.25, 1776345600.9999996])
+def test_event_ids_read_back_as_the_exact_update_time(updated_at):
+    assert webapp.parse_event_time(webapp.event_time_id(updated_at)) == updated_at
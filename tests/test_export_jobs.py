@@ -0,0 +1,175 @@
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+import export_jobs
+from export_jobs import (CANCELLED, COMPLETED, FAILED, QUEUED, RUNNING, ExportJobStore,
+                         ExportLimitReached, ExportRunner)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ExportJobStore(tmp_path / 'jobs.db')
+
+
+@pytest.fixture
+def runner(store, tmp_path, monkeypatch):
+    # Every report() reaches the store, so cancels are seen on the next call
+    monkeypatch.setattr(export_jobs, 'REPORT_INTERVAL', 0)
+    runner = ExportRunner(store, tmp_path / 'exports', max_workers=1, max_active=3)
+    yield runner
+    runner.shutdown()
+
+
+def _wait_for_status(store, job_id, statuses, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = store.get(job_id)
+        if job['status'] in statuses:
+            return job
+        store.watch(job_id, job['updated_at'], timeout=0.1)
+    raise AssertionError(f"job {job_id} still {store.get(job_id)['status']}")
+
+
+def _write_file(params, output_path, report):
+    for i in range(params['items']):
+        report(i, params['items'], current_item=f"item {i}")
+    Path(output_path).write_text('done')
+    report(params['items'], params['items'], detail={'files': 1})
+    return output_path
+
+
+def test_completed_job_records_progress_and_output(store, runner):
+    job_id = runner.submit('comments', {'items': 3}, _write_file)
+    job = _wait_for_status(store, job_id, (COMPLETED,))
+
+    assert (job['progress'], job['total']) == (3, 3)
+    assert job['files'] == 1
+    assert job['params'] == {'items': 3}
+    assert Path(job['output_path']).read_text() == 'done'
+    assert job['finished_at'] is not None
+
+
+def test_failed_job_keeps_error_and_removes_partial_file(store, runner):
+    def broken(params, output_path, report):
+        Path(output_path).write_text('partial')
+        raise RuntimeError('disk full')
+
+    job_id = runner.submit('comments', {}, broken)
+    job = _wait_for_status(store, job_id, (FAILED,))
+
+    assert job['error'] == 'disk full'
+    assert not list(runner.output_dir.iterdir())
+
+
+def test_states_move_from_queued_through_running(store, runner):
+    started = threading.Event()
+    release = threading.Event()
+
+    def blocking(params, output_path, report):
+        started.set()
+        release.wait(5)
+        return _write_file({'items': 1}, output_path, report)
+
+    first = runner.submit('comments', {}, blocking)
+    # The single worker is busy, so the second job waits in the queue
+    second = runner.submit('comments', {'items': 1}, _write_file)
+    assert started.wait(5)
+    assert store.get(first)['status'] == RUNNING
+    assert store.get(second)['status'] == QUEUED
+
+    release.set()
+    _wait_for_status(store, first, (COMPLETED,))
+    _wait_for_status(store, second, (COMPLETED,))
+
+
+def test_cancelling_a_running_job_stops_it_at_the_next_report(store, runner):
+    started = threading.Event()
+    reports = []
+
+    def endless(params, output_path, report):
+        Path(output_path).write_text('partial')
+        started.set()
+        while True:
+            reports.append(1)
+            report(len(reports), 1000)
+            time.sleep(0.01)
+
+    job_id = runner.submit('comments', {}, endless)
+    assert started.wait(5)
+    store.request_cancel(job_id)
+    job = _wait_for_status(store, job_id, (CANCELLED,))
+
+    assert job['cancel_requested']
+    assert not list(runner.output_dir.iterdir())
+
+
+def test_cancelling_a_queued_job_means_it_never_runs(store, runner):
+    release = threading.Event()
+    ran = []
+
+    def blocking(params, output_path, report):
+        release.wait(5)
+        return None
+
+    def should_not_run(params, output_path, report):
+        ran.append(1)
+
+    first = runner.submit('comments', {}, blocking)
+    second = runner.submit('comments', {}, should_not_run)
+    store.request_cancel(second)
+    assert store.get(second)['status'] == CANCELLED
+
+    release.set()
+    _wait_for_status(store, first, (COMPLETED,))
+    runner._executor.submit(lambda: None).result(5)
+    assert ran == []
+    assert store.get(second)['status'] == CANCELLED
+
+
+def test_active_job_limit(store):
+    store.create('comments', {}, max_active=2)
+    store.create('comments', {}, max_active=2)
+    with pytest.raises(ExportLimitReached):
+        store.create('comments', {}, max_active=2)
+
+
+def test_cleanup_deletes_expired_jobs_and_files(store, runner):
+    job_id = runner.submit('comments', {'items': 1}, _write_file)
+    job = _wait_for_status(store, job_id, (COMPLETED,))
+    output = Path(job['output_path'])
+    assert output.exists()
+
+    runner.cleanup()
+    assert store.get(job_id) is not None
+
+    _age(store, job_id, runner.keep_for + 1)
+    runner.cleanup()
+    assert store.get(job_id) is None
+    assert not output.exists()
+
+
+def test_cleanup_fails_stalled_and_orphaned_jobs(store, runner):
+    stalled = store.create('comments', {}, max_active=3)
+    assert store.start(stalled)
+    _age(store, stalled, runner.stale_after + 1)
+
+    orphaned = store.create('comments', {}, max_active=3)
+    conn = store._conn()
+    # A PID beyond the kernel's limit can't belong to a live process
+    conn.execute("UPDATE export_jobs SET owner_pid = ? WHERE job_id = ?", (2 ** 22 + 1, orphaned))
+    conn.commit()
+
+    runner.cleanup()
+    for job_id in (stalled, orphaned):
+        job = store.get(job_id)
+        assert job['status'] == FAILED
+        assert job['error'] == 'Export interrupted'
+
+
+def _age(store, job_id, seconds):
+    conn = store._conn()
+    conn.execute("UPDATE export_jobs SET updated_at = updated_at - ? WHERE job_id = ?", (seconds, job_id))
+    conn.commit()
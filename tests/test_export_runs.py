@@ -0,0 +1,134 @@
+import types
+
+import pytest
+
+import webapp
+from conftest import make_video
+from export_jobs import ExportCancelled
+from export_service import ExportService
+
+
+class FakeCursor:
+    def __init__(self, conn, rows):
+        self.conn = conn
+        self.rows = list(rows)
+        self.closed = False
+
+    def execute(self, query, params):
+        self.conn.in_transaction = not self.conn.autocommit
+
+    def fetchmany(self, size):
+        batch, self.rows = self.rows[:size], self.rows[size:]
+        return batch
+
+    def fetchall(self):
+        return self.fetchmany(len(self.rows))
+
+    def close(self):
+        self.closed = True
+
+
+class FakeConnection:
+    """Just enough of a psycopg2 connection to run a server-side cursor"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.autocommit = True
+        self.in_transaction = False
+        self.cursors = []
+
+    def cursor(self, name=None):
+        cursor = FakeCursor(self, self.rows)
+        self.cursors.append(cursor)
+        return cursor
+
+    def rollback(self):
+        self.in_transaction = False
+
+
+class FakePool:
+    def __init__(self, conn):
+        self.conn = conn
+        self.returned = None
+
+    def getconn(self):
+        return self.conn
+
+    def putconn(self, conn):
+        self.returned = {
+            'autocommit': conn.autocommit,
+            'in_transaction': conn.in_transaction,
+            'open_cursors': sum(not cursor.closed for cursor in conn.cursors),
+        }
+
+
+def _comment(i):
+    return (f'c{i}', f'@user{i}', f'comment {i}', '2024-06-10T12:00:00Z', 1718020800 + i, i, False)
+
+
+@pytest.fixture
+def postgres_export(tmp_path, monkeypatch):
+    conn = FakeConnection([_comment(i) for i in range(10)])
+    pool = FakePool(conn)
+    monkeypatch.setattr(webapp, 'USE_POSTGRES', True)
+    monkeypatch.setattr(webapp, 'get_db_pool', lambda: pool)
+    monkeypatch.setattr(webapp, 'export_comment_count', lambda db, video_id: 10)
+    monkeypatch.setattr(webapp, '_export_service', ExportService(None, tmp_path / 'exports'))
+    return pool
+
+
+def _cancel_after(cards):
+    def report(done, total, current_item=None, detail=None):
+        if done >= cards:
+            raise ExportCancelled()
+    return report
+
+
+def _assert_released_cleanly(pool):
+    assert pool.returned == {'autocommit': True, 'in_transaction': False, 'open_cursors': 0}
+
+
+def test_cancelled_video_export_releases_its_cursor_before_returning_the_connection(postgres_export, tmp_path):
+    params = {'video_id': 'vid', 'video_title': 'A video'}
+
+    # pytest.raises holds the traceback, and with it any unclosed row generator
+    with pytest.raises(ExportCancelled):
+        webapp.run_video_export(params, tmp_path / 'out.zip', _cancel_after(3))
+
+    _assert_released_cleanly(postgres_export)
+
+
+def test_cancelled_channel_export_releases_its_cursor_before_returning_the_connection(postgres_export, tmp_path, monkeypatch):
+    conn = postgres_export.conn
+    video_cursor = FakeCursor(conn, [('vid', 'A video')])
+    video_cursor.execute = lambda query, params=None: None
+    cursor = conn.cursor
+    monkeypatch.setattr(conn, 'cursor', lambda name=None: cursor(name) if name else video_cursor)
+
+    with pytest.raises(ExportCancelled):
+        webapp.run_channel_export({}, tmp_path / 'out.zip', _cancel_after(3))
+
+    _assert_released_cleanly(postgres_export)
+
+
+@pytest.fixture
+def export_routes(app_db, tmp_path, monkeypatch):
+    submitted = []
+    service = ExportService(None, tmp_path / 'exports')
+    runner = types.SimpleNamespace(submit=lambda kind, params, job: submitted.append(kind))
+    monkeypatch.setattr(webapp, '_export_runner', runner)
+    monkeypatch.setattr(webapp, '_export_service', service)
+    app_db.save_videos([make_video('vid')])
+    return app_db, service, submitted
+
+
+@pytest.mark.parametrize('url', ['/api/export/videos/vid', '/api/export/channel'])
+def test_server_exports_are_refused_without_a_png_renderer(export_routes, monkeypatch, url):
+    app_db, service, submitted = export_routes
+    monkeypatch.setattr(service, '_png_renderer', lambda: None)
+
+    response = app_db.client.post(url)
+
+    assert response.status_code == 503
+    assert response.get_json()['render_in_browser'] is True
+    assert submitted == []
@@ -0,0 +1,92 @@
+import bisect
+from collections import Counter
+
+import pytest
+
+from conftest import make_comment, make_video
+from ytscraper.storage.analytics import LIKE_BUCKETS
+
+# (comment_id, published_at, likes, hearted, replies)
+THREADS = [
+    ('a', '2025-05-03T10:00:00Z', 0, False, 2),
+    ('b', '2025-05-20T10:00:00Z', 3, True, 0),
+    ('c', '2025-06-01T00:30:00Z', 12, False, 1),
+    ('d', '2025-06-15T10:00:00Z', 1, False, 0),
+    ('e', '2025-06-30T23:59:00Z', 30, True, 3),
+    ('f', '2025-07-02T10:00:00Z', 7, False, 0),
+    ('g', '2025-07-09T10:00:00Z', 0, True, 1),
+]
+
+
+@pytest.fixture
+def video(app_db):
+    app_db.save_videos([make_video('vid')])
+    comments = []
+    for comment_id, published_at, likes, hearted, replies in THREADS:
+        comments.append(make_comment(comment_id, published_at=published_at, like_count=likes,
+                                     channel_owner_liked=int(hearted),
+                                     text='celery juice' if likes >= 10 else 'spinach'))
+        comments += [make_comment(f'{comment_id}-{n}', parent=comment_id, like_count=100)
+                     for n in range(replies)]
+    app_db.save_comments(comments)
+    return app_db
+
+
+def _expected(min_likes=0, start=None, end=None, has_replies=False):
+    """Facet counts worked out by hand from THREADS; each facet skips its own filter"""
+    buckets, months = [0] * len(LIKE_BUCKETS), Counter()
+    threads = {'with_replies': 0, 'without_replies': 0, 'replies': 0}
+    total = hearted_total = 0
+    for _, published_at, likes, hearted, replies in THREADS:
+        day = published_at[:10]
+        likes_ok = likes >= min_likes
+        dates_ok = (start is None or day >= start) and (end is None or day <= end)
+        replies_ok = replies > 0 or not has_replies
+        if dates_ok and replies_ok:
+            buckets[bisect.bisect_right(LIKE_BUCKETS, likes) - 1] += 1
+        if likes_ok and replies_ok:
+            months[published_at[:7]] += 1
+        if likes_ok and dates_ok:
+            threads['with_replies' if replies else 'without_replies'] += 1
+            threads['replies'] += replies
+        if likes_ok and dates_ok and replies_ok:
+            total += 1
+            hearted_total += hearted
+    return {
+        'total': total,
+        'likes': buckets,
+        'months': [{'month': month, 'count': count} for month, count in sorted(months.items())],
+        'threads': threads,
+        'hearted': {'hearted': hearted_total, 'not_hearted': total - hearted_total},
+    }
+
+
+FILTERS = [
+    {},
+    {'min_likes': 5},
+    {'start_date': '2025-06-01', 'end_date': '2025-06-30'},
+    {'has_replies': True},
+    {'min_likes': 1, 'start_date': '2025-05-10', 'has_replies': True},
+]
+
+
+@pytest.mark.parametrize('filters', FILTERS)
+def test_each_facet_counts_every_filter_but_its_own(video, filters):
+    query = '&'.join(f'{key}={"1" if value is True else value}' for key, value in filters.items())
+    expected = _expected(filters.get('min_likes', 0), filters.get('start_date'),
+                         filters.get('end_date'), filters.get('has_replies', False))
+
+    facets = video.get(f'/api/videos/vid/facets?{query}').get_json()['facets']
+    listing = video.get(f'/api/videos/vid/comments?include_replies=none&{query}').get_json()
+
+    assert {**facets, 'likes': [bucket['count'] for bucket in facets['likes']]} == expected
+    # The total is what the comment list shows under the same filters
+    assert facets['total'] == listing['pagination']['total']
+
+
+def test_facets_count_only_comments_matching_the_search(video):
+    facets = video.get('/api/videos/vid/facets?search=celery').get_json()['facets']
+
+    assert facets['total'] == 2
+    assert facets['months'] == [{'month': '2025-06', 'count': 2}]
+    assert facets['threads'] == {'with_replies': 2, 'without_replies': 0, 'replies': 4}
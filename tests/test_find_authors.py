@@ -0,0 +1,50 @@
+import sqlite3
+
+import pytest
+
+import webapp
+from ytscraper.storage import migrations, trigram
+
+AUTHORS = ['@jongkittae', '@laurajones1476', '@saraijones20', '@jonny', '@mia-pt4qn', '@bob']
+
+
+@pytest.fixture
+def conn(tmp_path, monkeypatch):
+    conn = sqlite3.connect(str(tmp_path / 'comments.db'), check_same_thread=False)
+    migrations.migrate_sqlite(conn)
+    if not trigram.sqlite_trigram_index_exists(conn):
+        pytest.skip('SQLite trigram tokenizer not available')
+    conn.executemany("INSERT INTO authors (author, comment_count) VALUES (?, 1)", [(a,) for a in AUTHORS])
+    conn.commit()
+    monkeypatch.setattr(webapp, 'get_db', lambda: conn)
+    monkeypatch.setattr(webapp, 'DB_DIALECT', 'sqlite')
+    webapp.QUERY_CACHE.clear()
+    yield conn
+    conn.close()
+
+
+def _find(conn, monkeypatch, name, trigram_enabled, limit=25):
+    monkeypatch.setattr(webapp, 'TRIGRAM_ENABLED', trigram_enabled)
+    with webapp.app.test_request_context('/api/authors'):
+        result = webapp.find_authors(conn.cursor(), name, limit)
+    assert result['search_mode'] == ('trigram' if trigram_enabled else 'like')
+    return [author['author'] for author in result['authors']]
+
+
+@pytest.mark.parametrize('name', ['jon', 'JONES', 'pt4'])
+def test_substring_matches_agree_in_both_modes(conn, monkeypatch, name):
+    like = _find(conn, monkeypatch, name, False)
+    fuzzy = _find(conn, monkeypatch, name, True)
+
+    assert like
+    assert all(name.lower() in author for author in like)
+    assert fuzzy[:len(like)] == like
+
+
+def test_trigram_mode_adds_similar_names_after_substring_hits(conn, monkeypatch):
+    assert _find(conn, monkeypatch, 'jonnie', False) == []
+    assert _find(conn, monkeypatch, 'jonnie', True) == ['@jonny']
+
+
+def test_limit_applies_to_merged_results(conn, monkeypatch):
+    assert len(_find(conn, monkeypatch, 'jon', True, limit=2)) == 2
@@ -0,0 +1,60 @@
+import pytest
+
+from conftest import make_comment, make_video
+
+
+def _reply(comment_id, day, parent='thread'):
+    return make_comment(comment_id, parent=parent, published_at=f'2025-06-{day:02d}T12:00:00Z')
+
+
+@pytest.fixture
+def thread(app_db):
+    app_db.save_videos([make_video('vid')])
+    app_db.save_comments([make_comment('thread'), make_comment('quiet')] +
+                         [_reply(f'r{day:02d}', day) for day in range(10, 15)])
+    return app_db
+
+
+def _comments(app_db, query):
+    return {c['comment_id']: c for c in app_db.get(f'/api/videos/vid/comments?{query}').get_json()['comments']}
+
+
+def test_listing_without_replies_carries_stored_counts(thread):
+    comments = _comments(thread, 'include_replies=none')
+
+    assert 'replies' not in comments['thread']
+    assert (comments['thread']['reply_count'], comments['thread']['has_more_replies']) == (5, True)
+    assert (comments['quiet']['reply_count'], comments['quiet']['has_more_replies']) == (0, False)
+
+
+def test_preview_shows_the_first_replies(thread):
+    comments = _comments(thread, 'include_replies=preview')
+
+    assert [r['comment_id'] for r in comments['thread']['replies']] == ['r10', 'r11', 'r12']
+    assert comments['thread']['has_more_replies'] is True
+
+
+def test_reply_pages_follow_the_cursor_oldest_first(thread):
+    pages, url = [], '/api/comments/thread/replies?limit=2'
+    while url:
+        body = thread.get(url).get_json()
+        pages.append([r['comment_id'] for r in body['replies']])
+        next_cursor = body['pagination']['next_cursor']
+        url = f'/api/comments/thread/replies?limit=2&cursor={next_cursor}' if next_cursor else None
+
+    assert pages == [['r10', 'r11'], ['r12', 'r13'], ['r14']]
+    assert body['reply_count'] == 5
+
+
+def test_new_replies_update_the_stored_count(thread):
+    thread.save_comments([_reply('r20', 20)])
+
+    body = thread.get('/api/comments/thread/replies?limit=1').get_json()
+
+    assert body['reply_count'] == 6
+    assert set(_comments(thread, 'include_replies=none&has_replies=1')) == {'thread'}
+
+
+def test_unknown_comment_and_bad_cursor(thread):
+    assert thread.get('/api/comments/missing/replies').status_code == 404
+    assert thread.get('/api/comments/thread/replies?cursor=bogus').status_code == 400
@@ -0,0 +1,57 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import webapp
+from conftest import make_video
+
+# Runs in a fresh interpreter: records I/O that importing webapp starts
+PROBE = """
+import json, sys
+events = []
+def audit(event, args):
+    if event in ('sqlite3.connect', 'socket.connect', 'os.mkdir', 'os.remove', 'shutil.rmtree'):
+        events.append(event)
+    elif event == 'open' and isinstance(args[1], str) and set(args[1]) & set('wax+'):
+        events.append(f'open {args[0]} {args[1]}')
+sys.addaudithook(audit)
+import webapp
+print(json.dumps(events))
+"""
+
+
+def test_importing_the_app_does_no_io():
+    output = subprocess.run(
+        [sys.executable, '-c', PROBE], cwd=Path(webapp.__file__).parent,
+        capture_output=True, text=True, check=True
+    ).stdout
+
+    assert json.loads(output.strip().splitlines()[-1]) == []
+
+
+@pytest.fixture
+def startup_checks(app_db, monkeypatch):
+    calls = []
+    check_schema = webapp.check_schema
+    def counted():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError('database not reachable yet')
+        check_schema()
+    monkeypatch.setattr(webapp, 'check_schema', counted)
+    app_db.save_videos([make_video('vid')])
+    return app_db, calls
+
+
+def test_startup_checks_run_on_first_request_and_retry_after_failure(startup_checks):
+    app_db, calls = startup_checks
+
+    assert app_db.get('/api/videos').status_code == 500
+    assert app_db.get('/api/videos').status_code == 200
+    assert app_db.get('/api/videos').status_code == 200
+
+    assert len(calls) == 2
+    assert webapp._initialized is True
@@ -0,0 +1,71 @@
+import threading
+import types
+
+import pytest
+
+import webapp
+from conftest import make_comment, make_video
+from export_jobs import ExportJobStore
+from ytscraper import serialization
+
+
+@pytest.fixture
+def live_app(app_db, tmp_path, monkeypatch):
+    monkeypatch.setattr(webapp, 'LIVE_POLL_INTERVAL', 0.01)
+    monkeypatch.setattr(webapp, 'EVENT_HEARTBEAT', 0.05)
+    monkeypatch.setattr(webapp, 'EVENT_STREAM_MAX_AGE', 0.1)
+    store = ExportJobStore(tmp_path / 'jobs.db')
+    monkeypatch.setattr(webapp, '_export_runner', types.SimpleNamespace(store=store))
+    return app_db, store
+
+
+def test_live_feeds_and_export_progress_have_separate_stream_slots(live_app, monkeypatch):
+    app_db, store = live_app
+    job_id = store.create('video', {}, max_active=1)
+    live_slots = threading.BoundedSemaphore(1)
+    monkeypatch.setattr(webapp, '_live_stream_slots', live_slots)
+    live_slots.acquire()  # Another viewer has the only live slot
+
+    assert app_db.get('/api/videos/vid/live').status_code == 503
+    with app_db.get(f'/api/export/events/{job_id}') as response:
+        assert response.status_code == 200
+
+
+def _events(app_db, url, headers=None):
+    """(event, id, data) for each event a stream sends before it ends"""
+    with app_db.get(url, headers=headers or {}) as response:
+        assert response.status_code == 200
+        body = response.get_data(as_text=True)
+    events = []
+    for block in body.split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.splitlines() if not line.startswith((':', 'retry')))
+        if 'event' in fields:
+            events.append((fields['event'], fields.get('id'), serialization.loads(fields['data'])))
+    return events
+
+
+def test_live_feed_resumes_after_the_last_event_id(live_app):
+    app_db, _ = live_app
+    app_db.save_videos([make_video('vid'), make_video('other')])
+    app_db.save_comments([make_comment('before')])
+    [(event, ready_id, ready)] = _events(app_db, '/api/videos/vid/live')
+    assert event == 'ready' and ready_id == str(ready['seq'])
+
+    app_db.save_comments([make_comment('first'), make_comment('elsewhere', video_id='other')])
+    app_db.save_comments([make_comment('second')])
+    reconnect = _events(app_db, '/api/videos/vid/live', {'Last-Event-ID': ready_id})
+    assert [(event, data.get('comment_id')) for event, _, data in reconnect] == [
+        ('ready', None), ('comment', 'first'), ('comment', 'second')
+    ]
+
+    first_id = reconnect[1][1]
+    resumed = _events(app_db, '/api/videos/vid/live', {'Last-Event-ID': first_id})
+    assert [data.get('comment_id') for _, _, data in resumed] == [None, 'second']
+    # ?since= starts from the same place for clients that can't set the header
+    assert _events(app_db, f'/api/videos/vid/live?since={first_id}') == resumed
+
+
+def test_live_feed_rejects_a_malformed_position(live_app):
+    app_db, _ = live_app
+
+    assert app_db.get('/api/videos/vid/live?since=yesterday').status_code == 400
@@ -0,0 +1,61 @@
+import sqlite3
+
+import pytest
+
+from ytscraper.storage import migrations, timestamps
+
+
+@pytest.fixture
+def legacy_db(tmp_path):
+    """A database written by the scrapers before the web app versioned its schema"""
+    conn = sqlite3.connect(str(tmp_path / 'comments.db'))
+    migrations._create_base_tables_sqlite(conn)
+    conn.execute("INSERT INTO videos (video_id, title, published_at) VALUES ('vid', 'A video', '2025-06-01T00:00:00Z')")
+    # Mixed formats: the text values don't sort in time order
+    conn.executemany(
+        "INSERT INTO comments (comment_id, video_id, parent_comment_id, author, text, published_at, like_count) "
+        "VALUES (?, 'vid', ?, '@ann', 'hi', ?, 1)",
+        [
+            ('top', None, '2025-06-02 09:00:00'),
+            ('r1', 'top', '2025-06-03T10:00:00Z'),
+            ('r2', 'top', '2025-06-10 08:00:00'),
+        ]
+    )
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def _indexes(conn):
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+
+
+def test_legacy_database_migrates_to_epoch_based_totals(legacy_db):
+    applied = migrations.migrate_sqlite(legacy_db)
+
+    assert applied == migrations.latest_version()
+    first, last = legacy_db.execute(
+        "SELECT first_comment_at, last_comment_at FROM video_stats WHERE video_id = 'vid'"
+    ).fetchone()
+    assert timestamps.to_epoch(first) == timestamps.to_epoch('2025-06-02T09:00:00Z')
+    assert timestamps.to_epoch(last) == timestamps.to_epoch('2025-06-10T08:00:00Z')
+    reply_count, last_reply_at = legacy_db.execute(
+        "SELECT reply_count, last_reply_at FROM comments WHERE comment_id = 'top'"
+    ).fetchone()
+    assert reply_count == 2
+    assert timestamps.to_epoch(last_reply_at) == timestamps.to_epoch('2025-06-10T08:00:00Z')
+    assert legacy_db.execute("SELECT comment_count FROM authors WHERE author = '@ann'").fetchone() == (3,)
+
+
+def test_indexes_keyed_on_published_at_are_replaced(legacy_db):
+    migrations.migrate_sqlite(legacy_db)
+
+    indexes = _indexes(legacy_db)
+    assert {'idx_comments_channel_owner_liked_ts', 'idx_comments_author_published_ts',
+            'idx_videos_published_ts'} <= indexes
+    assert not {'idx_comments_channel_owner_liked', 'idx_comments_author_published',
+                'idx_videos_published_at'} & indexes
+
+
+def test_migration_versions_are_consecutive():
+    assert [m.version for m in migrations.MIGRATIONS] == list(range(1, migrations.latest_version() + 1))
@@ -0,0 +1,81 @@
+import sqlite3
+
+from query_builder import SelectQuery, compile_sql
+from webapp import keyset_clause
+
+
+def test_compile_sql_translates_placeholders_for_postgres():
+    sql = "SELECT * FROM comments WHERE video_id = ? AND like_count > ?"
+    assert compile_sql(sql, 'postgres') == "SELECT * FROM comments WHERE video_id = %s AND like_count > %s"
+    assert compile_sql(sql, 'sqlite') == sql
+
+
+def test_compile_sql_leaves_quoted_question_marks():
+    sql = "SELECT 'why?' AS \"huh?\", 'it''s ?' FROM comments WHERE text = ?"
+    assert compile_sql(sql, 'postgres') == "SELECT 'why?' AS \"huh?\", 'it''s ?' FROM comments WHERE text = %s"
+
+
+def test_rows_and_count_share_filters_but_not_seek():
+    query = SelectQuery('postgres', 'FROM comments c', ['c.comment_id', 'c.like_count AS likes'])
+    query.join("JOIN videos v ON v.video_id = c.video_id AND v.language = ?", ['en'])
+    query.where("c.video_id = ?", ['abc'])
+    query.seek("c.comment_id > ?", ['x'])
+    query.order_by("c.comment_id")
+    compiled, params = query.rows(limit=10, offset=20)
+
+    assert compiled.columns == ('comment_id', 'likes')
+    assert compiled.rows_sql == (
+        "SELECT c.comment_id, c.like_count AS likes FROM comments c "
+        "JOIN videos v ON v.video_id = c.video_id AND v.language = %s "
+        "WHERE c.video_id = %s AND c.comment_id > %s ORDER BY c.comment_id LIMIT %s OFFSET %s"
+    )
+    assert params == ['en', 'abc', 'x', 10, 20]
+    assert 'comment_id > ' not in compiled.count_sql
+    assert query.filter_params() == ['en', 'abc']
+
+
+def test_capped_count_stops_at_limit():
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE TABLE comments (comment_id TEXT, video_id TEXT)")
+    conn.executemany("INSERT INTO comments VALUES (?, ?)", [(str(i), 'a') for i in range(25)] + [('b0', 'b')])
+
+    query = SelectQuery('sqlite', 'FROM comments', ['comment_id']).where("video_id = ?", ['a'])
+    compiled = query.compile()
+    assert compiled.capped_count_sql == "SELECT COUNT(*) FROM (SELECT 1 FROM comments WHERE video_id = ? LIMIT ?) capped"
+    assert conn.execute(compiled.capped_count_sql, query.filter_params() + [10]).fetchone()[0] == 10
+    assert conn.execute(compiled.capped_count_sql, query.filter_params() + [100]).fetchone()[0] == 25
+    assert conn.execute(compiled.count_sql, query.filter_params()).fetchone()[0] == 25
+
+
+def test_keyset_clause_direction():
+    assert keyset_clause('c.like_count', 'desc', 'c.comment_id') == \
+        "(c.like_count < ? OR (c.like_count = ? AND c.comment_id < ?))"
+    assert keyset_clause('c.like_count', 'asc', 'c.comment_id') == \
+        "(c.like_count > ? OR (c.like_count = ? AND c.comment_id > ?))"
+
+
+def _page_through(conn, order):
+    seen = []
+    after = None
+    while True:
+        query = SelectQuery('sqlite', 'FROM comments c', ['c.comment_id', 'c.like_count'])
+        if after is not None:
+            query.seek(keyset_clause('c.like_count', order, 'c.comment_id'), [after[0], after[0], after[1]])
+        query.order_by(f"c.like_count {order.upper()}, c.comment_id {order.upper()}")
+        compiled, params = query.rows(limit=3)
+        rows = compiled.to_dicts(conn.execute(compiled.rows_sql, params).fetchall())
+        if not rows:
+            return seen
+        seen.extend(row['comment_id'] for row in rows)
+        after = (rows[-1]['like_count'], rows[-1]['comment_id'])
+
+
+def test_keyset_pages_cover_every_row_once():
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE TABLE comments (comment_id TEXT, like_count INTEGER)")
+    rows = [(f"c{i:02d}", i % 4) for i in range(14)]
+    conn.executemany("INSERT INTO comments VALUES (?, ?)", rows)
+
+    for order, reverse in (('asc', False), ('desc', True)):
+        expected = [comment_id for comment_id, _ in sorted(rows, key=lambda r: (r[1], r[0]), reverse=reverse)]
+        assert _page_through(conn, order) == expected
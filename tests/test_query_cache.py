@@ -0,0 +1,86 @@
+from query_cache import MISSING, QueryCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_get_returns_stored_value():
+    cache = QueryCache()
+    assert cache.get('key', 1) is MISSING
+    cache.put('key', 1, [1, 2])
+    assert cache.get('key', 1) == [1, 2]
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['weight']) == (1, 1, 2)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = QueryCache(max_entries=2)
+    cache.put('a', 1, 'A')
+    cache.put('b', 1, 'B')
+    # Reading a makes b the least recently used
+    assert cache.get('a', 1) == 'A'
+    cache.put('c', 1, 'C')
+
+    assert cache.get('b', 1) is MISSING
+    assert cache.get('a', 1) == 'A'
+    assert cache.get('c', 1) == 'C'
+    assert cache.stats()['evictions'] == 1
+
+
+def test_weight_limit_evicts_and_rejects_oversized_values():
+    cache = QueryCache(max_weight=5)
+    cache.put('a', 1, [0] * 3)
+    cache.put('b', 1, [0] * 3)
+    assert cache.get('a', 1) is MISSING
+    assert cache.get('b', 1) == [0] * 3
+
+    cache.put('huge', 1, [0] * 6)
+    assert cache.get('huge', 1) is MISSING
+    assert cache.get('b', 1) == [0] * 3
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = QueryCache(ttl=60, clock=clock)
+    cache.put('key', 1, 'value')
+
+    clock.now += 59
+    assert cache.get('key', 1) == 'value'
+    clock.now += 2
+    assert cache.get('key', 1) is MISSING
+    assert cache.stats()['entries'] == 0
+
+
+def test_rewrite_restarts_ttl():
+    clock = FakeClock()
+    cache = QueryCache(ttl=60, clock=clock)
+    cache.put('key', 1, 'old')
+    clock.now += 50
+    cache.put('key', 1, 'new')
+    clock.now += 50
+    assert cache.get('key', 1) == 'new'
+
+
+def test_newer_data_version_drops_everything():
+    cache = QueryCache()
+    cache.put('a', 1, 'A')
+    cache.put('b', 1, 'B')
+
+    assert cache.get('a', 2) is MISSING
+    assert cache.stats()['entries'] == 0
+    assert cache.stats()['invalidations'] == 1
+    assert cache.stats()['data_version'] == 2
+
+
+def test_results_from_an_older_version_are_not_stored():
+    cache = QueryCache()
+    cache.get('a', 2)
+    # Computed before version 2 landed
+    cache.put('a', 1, 'stale')
+    assert cache.get('a', 1) is MISSING
+    assert cache.stats()['entries'] == 0
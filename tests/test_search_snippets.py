@@ -0,0 +1,38 @@
+import pytest
+
+import webapp
+from conftest import make_comment, make_video
+from ytscraper.storage import fulltext
+
+
+def test_highlight_escapes_text_before_marking_matches():
+    raw = f"<img src=x onerror=alert(1)> {fulltext.SNIPPET_MATCH_START}hello{fulltext.SNIPPET_MATCH_END} & bye"
+
+    assert fulltext.highlight_snippet(raw) == "&lt;img src=x onerror=alert(1)&gt; <mark>hello</mark> &amp; bye"
+    assert fulltext.highlight_snippet(None) is None
+
+
+@pytest.fixture
+def searchable(app_db):
+    app_db.save_videos([make_video('vid', title='<b>Hello</b> world')])
+    app_db.save_comments([make_comment('c1', text='<script>alert(1)</script> hello there')])
+    app_db.get('/api/health')
+    if not webapp.FULLTEXT_ENABLED:
+        pytest.skip('SQLite FTS5 not available')
+    return app_db
+
+
+def test_search_endpoint_snippets_are_html_safe(searchable):
+    result = searchable.get('/api/search?q=hello').get_json()['results'][0]
+
+    assert result['snippet'] == '&lt;script&gt;alert(1)&lt;/script&gt; <mark>hello</mark> there'
+    # The plain text is returned as stored
+    assert result['text'] == '<script>alert(1)</script> hello there'
+
+
+def test_listing_snippets_are_html_safe(searchable):
+    video = searchable.get('/api/videos?search=hello').get_json()['videos'][0]
+    comment = searchable.get('/api/videos/vid/comments?search=hello').get_json()['comments'][0]
+
+    assert video['snippet'] == '&lt;b&gt;<mark>Hello</mark>&lt;/b&gt; world'
+    assert '<script>' not in comment['snippet'] and '<mark>hello</mark>' in comment['snippet']
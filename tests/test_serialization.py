@@ -0,0 +1,66 @@
+import datetime
+import decimal
+import json
+import uuid
+
+import pytest
+
+import webapp
+from ytscraper import serialization
+
+
+@pytest.fixture(params=['orjson', 'ujson', 'json'])
+def backend(request, monkeypatch):
+    """Run a test once per encoder, skipping ones that aren't installed"""
+    module = pytest.importorskip(request.param) if request.param != 'json' else None
+    monkeypatch.setattr(serialization, 'orjson', module if request.param == 'orjson' else None)
+    monkeypatch.setattr(serialization, 'ujson', module if request.param == 'ujson' else None)
+    monkeypatch.setattr(serialization, 'BACKEND', request.param)
+    return request.param
+
+
+COMMENT = {
+    'comment_id': 'Ugx1', 'author': '@ánn', 'text': 'Celery juice 🥬 </script> "quoted"\nnew line',
+    'like_count': 2 ** 40, 'score': 0.5, 'is_reply': False, 'parent_comment_id': None,
+    'replies': [{'comment_id': 'Ugx2', 'tags': []}],
+}
+
+
+def test_round_trip(backend):
+    for encoded in (serialization.dumps(COMMENT), serialization.dumpb(COMMENT).decode('utf-8')):
+        assert serialization.loads(encoded) == json.loads(encoded) == COMMENT
+        # Non-ASCII text and slashes are written as-is
+        assert '🥬 </script>' in encoded
+
+
+def test_types_outside_json_are_converted(backend):
+    value = {
+        'when': datetime.datetime(2025, 6, 1, 12, 30), 'day': datetime.date(2025, 6, 1),
+        'count': decimal.Decimal('12'), 'ratio': decimal.Decimal('0.25'),
+        'id': uuid.UUID(int=1), 'authors': {'@ann'}, 7: 'int key',
+    }
+
+    assert serialization.loads(serialization.dumps(value)) == {
+        'when': '2025-06-01T12:30:00', 'day': '2025-06-01', 'count': 12, 'ratio': 0.25,
+        'id': '00000000-0000-0000-0000-000000000001', 'authors': ['@ann'], '7': 'int key',
+    }
+
+
+def test_options(backend):
+    assert serialization.loads(serialization.dumps(COMMENT, indent=True)) == COMMENT
+    assert '\n  "' in serialization.dumps(COMMENT, indent=True)
+    assert serialization.dumps({'b': 1, 'a': 2}, sort_keys=True).replace(' ', '') == '{"a":2,"b":1}'
+
+
+def test_unsupported_values_and_bad_documents_raise(backend):
+    with pytest.raises(TypeError):
+        serialization.dumps({'value': object()})
+    with pytest.raises(ValueError):
+        serialization.loads('{"unterminated": ')
+
+
+def test_flask_responses_use_the_backend(backend):
+    with webapp.app.test_request_context():
+        response = webapp.jsonify(COMMENT)
+
+    assert json.loads(response.get_data()) == COMMENT
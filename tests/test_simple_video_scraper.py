@@ -0,0 +1,51 @@
+import logging
+from unittest import mock
+
+import pytest
+
+pytest.importorskip('googleapiclient')
+
+# The module opens skinni_scraper.log in the working directory on import
+with mock.patch.object(logging, 'FileHandler', lambda *args, **kwargs: logging.NullHandler()):
+    import simple_video_scraper
+from simple_video_scraper import SkinniVideoScraper
+from ytscraper.storage import analytics
+
+
+def _comment(comment_id, video_id, parent=None):
+    return {
+        'comment_id': comment_id, 'video_id': video_id, 'parent_comment_id': parent,
+        'author': '@ann', 'text': 'hello', 'published_at': '2025-06-01T12:00:00Z',
+        'updated_at': '2025-06-01T12:00:00Z', 'like_count': 1,
+        'is_reply': 1 if parent else 0, 'channel_owner_liked': 0,
+    }
+
+
+@pytest.fixture
+def scraper(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(simple_video_scraper, 'build', lambda *args, **kwargs: None)
+    return SkinniVideoScraper('test-key')
+
+
+def test_rollups_refresh_once_per_run(scraper, monkeypatch):
+    refreshed = []
+    refresh_rollup = analytics.refresh_rollup
+
+    def counting_refresh(cursor, scope, dialect='sqlite'):
+        refreshed.append(scope)
+        return refresh_rollup(cursor, scope, dialect)
+
+    monkeypatch.setattr(analytics, 'refresh_rollup', counting_refresh)
+
+    scraper.save_comments([_comment('a1', 'video-a'), _comment('a2', 'video-a', 'a1')])
+    scraper.save_comments([_comment('b1', 'video-b')])
+    assert refreshed == []
+
+    scraper.refresh_rollups()
+    assert refreshed.count(analytics.CHANNEL_SCOPE) == 1
+    assert sorted(scope for scope in refreshed if scope != analytics.CHANNEL_SCOPE) == ['video-a', 'video-b']
+
+    # Nothing saved since, so nothing to refresh
+    scraper.refresh_rollups()
+    assert refreshed.count(analytics.CHANNEL_SCOPE) == 1
@@ -0,0 +1,152 @@
+import threading
+
+import pytest
+
+import single_flight
+from single_flight import FlightTimeout, SingleFlight
+
+CALLERS = 5
+
+
+class _CountingEvent(threading.Event):
+    """Event that counts the threads blocked in wait()"""
+
+    def __init__(self):
+        super().__init__()
+        self.waiting = 0
+        self._count_lock = threading.Lock()
+
+    def wait(self, timeout=None):
+        with self._count_lock:
+            self.waiting += 1
+        return super().wait(timeout)
+
+
+class _CountingCall(single_flight._Call):
+    instances = []
+
+    def __init__(self):
+        super().__init__()
+        self.done = _CountingEvent()
+        _CountingCall.instances.append(self)
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    _CountingCall.instances = []
+    monkeypatch.setattr(single_flight, '_Call', _CountingCall)
+    return _CountingCall.instances
+
+
+def _wait_for(condition, timeout=5.0):
+    pause = threading.Event()
+    for _ in range(int(timeout / 0.005)):
+        if condition():
+            return
+        pause.wait(0.005)
+    raise AssertionError('condition not met in time')
+
+
+def _run_flight(flight, fn, calls):
+    """Start CALLERS identical calls together; the leader's fn finishes only
+    once every other caller is waiting on its flight.
+
+    Returns (results, errors) collected from the callers.
+    """
+    barrier = threading.Barrier(CALLERS)
+    release = threading.Event()
+    results, errors = [], []
+    lock = threading.Lock()
+
+    def leader_fn():
+        release.wait(5)
+        return fn()
+
+    def caller():
+        barrier.wait()
+        try:
+            result = flight.do('key', leader_fn, timeout=5)
+        except Exception as e:
+            with lock:
+                errors.append(e)
+        else:
+            with lock:
+                results.append(result)
+
+    threads = [threading.Thread(target=caller) for _ in range(CALLERS)]
+    for thread in threads:
+        thread.start()
+    _wait_for(lambda: len(calls) == 1 and calls[0].done.waiting == CALLERS - 1)
+    release.set()
+    for thread in threads:
+        thread.join(10)
+    return results, errors
+
+
+def test_identical_calls_share_one_execution(calls):
+    flight = SingleFlight()
+    executions = []
+
+    def fn():
+        executions.append(1)
+        return {'rows': [1, 2, 3]}
+
+    results, errors = _run_flight(flight, fn, calls)
+
+    assert errors == []
+    assert len(executions) == 1
+    assert len(results) == CALLERS
+    assert all(result is results[0] for result in results)
+    stats = flight.stats()
+    assert stats['executions'] == 1
+    assert stats['shared'] == CALLERS - 1
+
+
+def test_leader_exception_reaches_every_waiter(calls):
+    flight = SingleFlight()
+
+    def fn():
+        raise ValueError('query failed')
+
+    results, errors = _run_flight(flight, fn, calls)
+
+    assert results == []
+    assert len(errors) == CALLERS
+    assert all(isinstance(error, ValueError) and error is errors[0] for error in errors)
+    assert flight.stats()['errors'] == 1
+
+
+def test_key_is_cleared_after_the_flight(calls):
+    flight = SingleFlight()
+    _run_flight(flight, lambda: 'first', calls)
+    assert flight.stats()['in_flight'] == 0
+    # A later call starts a new flight instead of reusing the finished one
+    assert flight.do('key', lambda: 'second') == 'second'
+
+    def fail():
+        raise RuntimeError('boom')
+
+    with pytest.raises(RuntimeError):
+        flight.do('key', fail)
+    assert flight.stats()['in_flight'] == 0
+    assert flight.do('key', lambda: 'third') == 'third'
+    assert flight.stats()['executions'] == 4
+
+
+def test_waiter_times_out(calls):
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def slow():
+        release.wait(5)
+        return 'done'
+
+    leader = threading.Thread(target=flight.do, args=('key', slow))
+    leader.start()
+    _wait_for(lambda: len(calls) == 1)
+    with pytest.raises(FlightTimeout):
+        flight.do('key', slow, timeout=0.01)
+    release.set()
+    leader.join(5)
+    assert flight.stats()['timeouts'] == 1
+    assert flight.stats()['in_flight'] == 0
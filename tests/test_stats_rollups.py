@@ -0,0 +1,55 @@
+from conftest import make_comment, make_video
+from ytscraper.storage import analytics
+
+
+def _refresh_rollups(app_db, video_ids):
+    conn = app_db.connect()
+    analytics.refresh_rollups(conn.cursor(), video_ids)
+    conn.commit()
+    conn.close()
+
+
+def _stored_rollups(app_db):
+    conn = app_db.connect()
+    rows = dict(conn.execute("SELECT scope, data_version FROM stats_rollups").fetchall())
+    conn.close()
+    return rows
+
+
+def test_fresh_rollup_is_served_as_stored(app_db):
+    app_db.save_videos([make_video('vid')])
+    app_db.save_comments([make_comment('c1'), make_comment('c2', like_count=5)])
+    _refresh_rollups(app_db, ['vid'])
+
+    body = app_db.get('/api/videos/vid/stats').get_json()
+
+    assert body['stale'] is False
+    assert body['refreshed_at'] is not None
+    assert body['stats']['total_comments'] == 2
+
+
+def test_stale_rollup_is_flagged_not_recomputed_on_read(app_db):
+    app_db.save_videos([make_video('vid')])
+    app_db.save_comments([make_comment('c1')])
+    _refresh_rollups(app_db, ['vid'])
+    stored = _stored_rollups(app_db)
+    app_db.save_comments([make_comment('c2')])
+
+    video = app_db.get('/api/videos/vid/stats').get_json()
+    channel = app_db.get('/api/stats').get_json()
+
+    assert video['stale'] is True and video['stats']['total_comments'] == 1
+    assert channel['stale'] is True and channel['stats']['total_comments'] == 1
+    # Reads leave refreshing to the writers
+    assert _stored_rollups(app_db) == stored
+
+
+def test_missing_rollup_is_computed_without_being_stored(app_db):
+    app_db.save_videos([make_video('vid')])
+    app_db.save_comments([make_comment('c1'), make_comment('c2')])
+
+    body = app_db.get('/api/stats').get_json()
+
+    assert body == {'stats': body['stats'], 'stale': False, 'refreshed_at': None}
+    assert body['stats']['total_comments'] == 2
+    assert _stored_rollups(app_db) == {}
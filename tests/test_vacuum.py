@@ -0,0 +1,52 @@
+import sqlite3
+
+import pytest
+
+import webapp
+from ytscraper.storage import fulltext, migrations, trigram
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    path = tmp_path / 'comments.db'
+    conn = sqlite3.connect(str(path))
+    migrations.migrate_sqlite(conn)
+    if not fulltext.sqlite_search_index_exists(conn) or not trigram.sqlite_trigram_index_exists(conn):
+        pytest.skip('SQLite FTS5 trigram tokenizer not available')
+    conn.executemany(
+        "INSERT INTO comments (comment_id, video_id, author, text) VALUES (?, 'vid', ?, ?)",
+        [(f'c{i}', f'@user{i}', f'comment number{i}') for i in range(5)]
+    )
+    conn.executemany("INSERT INTO authors (author) VALUES (?)", [(f'@user{i}',) for i in range(5)])
+    # What a VACUUM may do to tables without an INTEGER PRIMARY KEY; no sync trigger fires
+    conn.execute("UPDATE comments SET rowid = rowid + 100")
+    conn.execute("UPDATE authors SET rowid = rowid + 100")
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(webapp, 'USE_POSTGRES', False)
+    monkeypatch.setattr(webapp, 'DB_PATH', str(path))
+    return path
+
+
+def _search(path):
+    conn = sqlite3.connect(str(path))
+    try:
+        comments = conn.execute("""
+            SELECT c.comment_id FROM comments_fts f JOIN comments c ON c.rowid = f.rowid
+            WHERE comments_fts MATCH 'number3'
+        """).fetchall()
+        authors = conn.execute("""
+            SELECT a.author FROM authors_trgm t JOIN authors a ON a.rowid = t.rowid
+            WHERE authors_trgm MATCH '"user3"'
+        """).fetchall()
+        return comments, authors
+    finally:
+        conn.close()
+
+
+def test_vacuum_rebuilds_indexes_keyed_on_renumbered_rowids(db_path):
+    assert _search(db_path) == ([], [])
+
+    webapp.vacuum_database()
+
+    assert _search(db_path) == ([('c3',)], [('@user3',)])
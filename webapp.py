@@ -1,49 +1,58 @@
 import os
 import json
+import base64
+import binascii
+import contextlib
 import sqlite3
 import threading
 import uuid
 import sys
+import tempfile
+import zipfile
+import zlib
 from datetime import datetime, timedelta
 from pathlib import Path
-from flask import Flask, render_template, jsonify, request, g, send_file, send_from_directory
+from urllib.parse import urlparse
+from flask.json.provider import DefaultJSONProvider
+from flask import Blueprint, Flask, render_template, jsonify, request, g, send_file, send_from_directory, make_response, Response, stream_with_context
 import logging
+import math
 import time
+import hashlib
+from functools import wraps
 
-# PostgreSQL support for Heroku
-try:
-    import psycopg2
-    from urllib.parse import urlparse
-    POSTGRES_AVAILABLE = True
-except ImportError:
-    POSTGRES_AVAILABLE = False
+from ytscraper import serialization
+from ytscraper.storage import analytics, author_stats, change_log, data_version, fulltext, migrations, timestamps, trigram, video_stats
+from ytscraper.storage.sql_helpers import IN_BATCH_SIZE, batched
+from db_pool import PostgresConnectionPool, SQLiteConnectionCache, PoolTimeout
+from query_cache import QueryCache, MISSING
+from query_builder import SelectQuery, compile_sql
+from single_flight import SingleFlight, FlightTimeout
+from export_jobs import ExportJobStore, ExportRunner, ExportLimitReached, COMPLETED, ACTIVE_STATES
+from export_service import ExportService
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Database configuration - Support both SQLite and PostgreSQL
+# Database configuration - Support both SQLite and PostgreSQL.
+# Nothing here touches the database or the filesystem: importing webapp
+# stays cheap, and startup checks run in ensure_initialized() on first use.
 DATABASE_URL = os.environ.get('DATABASE_URL')
 USE_POSTGRES = DATABASE_URL and DATABASE_URL.startswith('postgresql://')
+DB_DIALECT = 'postgres' if USE_POSTGRES else 'sqlite'
 
 if USE_POSTGRES:
     # PostgreSQL configuration for production (Render)
-    try:
-        url = urlparse(DATABASE_URL)
-        DB_CONFIG = {
-            'host': url.hostname,
-            'database': url.path[1:],
-            'user': url.username,
-            'password': url.password,
-            'port': url.port
-        }
-        logger.info(f"🐘 Using PostgreSQL database: {url.hostname}:{url.port}/{url.path[1:]}")
-        print(f"🐘 PostgreSQL configured for production deployment")
-    except ImportError:
-        logger.error("❌ psycopg2 not available for PostgreSQL connection")
-        raise ImportError("psycopg2-binary required for PostgreSQL support")
+    url = urlparse(DATABASE_URL)
+    DB_CONFIG = {
+        'host': url.hostname,
+        'database': url.path[1:],
+        'user': url.username,
+        'password': url.password,
+        'port': url.port
+    }
 else:
-    logger.info("🗃️  Using SQLite database (local)")
     # Determine the base directory for data files
     def get_base_dir():
         """Get the base directory for data files, works in both dev and bundled environments"""
@@ -61,21 +70,34 @@ else:
 
     BASE_DIR = get_base_dir()
     DB_PATH = str(BASE_DIR / "data" / "youtube_comments.db")
-    
-    print(f"🗃️  Database path: {DB_PATH}")
-    print(f"📁 Base directory: {BASE_DIR}")
 
-    # Verify database exists
+def log_database_config():
+    """Log which database is in use, with diagnostics if the SQLite file is missing"""
+    if USE_POSTGRES:
+        logger.info(f"🐘 Using PostgreSQL database: {DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['database']}")
+        return
+    
+    logger.info(f"🗃️  Using SQLite database: {DB_PATH}")
+    logger.info(f"📁 Base directory: {BASE_DIR}")
     if not os.path.exists(DB_PATH):
         logger.warning(f"⚠️  Database not found at: {DB_PATH}")
         logger.warning(f"📂 Contents of base directory: {list(BASE_DIR.iterdir()) if BASE_DIR.exists() else 'Base dir does not exist'}")
         if (BASE_DIR / "data").exists():
             logger.warning(f"📂 Contents of data directory: {list((BASE_DIR / 'data').iterdir())}")
         logger.warning("🔄 App will start anyway - database may be created later")
-    else:
-        logger.info(f"✅ Database found at: {DB_PATH}")
 
-app = Flask(__name__)
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by the fastest installed encoder (orjson, ujson or json)"""
+    
+    def dumps(self, obj, **kwargs):
+        return serialization.dumps(obj, indent=bool(kwargs.get('indent')),
+                                   sort_keys=kwargs.get('sort_keys', self.sort_keys))
+    
+    def loads(self, s, **kwargs):
+        return serialization.loads(s)
+
+# Routes live on a blueprint so create_app() can build the app explicitly
+bp = Blueprint('webapp', __name__)
 
 # Skinni Societie target video IDs
 TARGET_VIDEO_IDS = [
@@ -83,81 +105,234 @@ TARGET_VIDEO_IDS = [
     "2JkkwEzHIcQ"   # Skinny Influencer Liv Schmidt
 ]
 
-def init_postgres_tables():
-    """Initialize PostgreSQL tables if they don't exist"""
+# Serve SQLite through read-only connections; the file is then never migrated
+# or written by the web app, only by the scrapers
+SQLITE_READ_ONLY = os.environ.get('SQLITE_READ_ONLY', '').lower() in ('1', 'true', 'yes')
+
+# Apply pending migrations when the app first starts serving. On by default
+# for SQLite (desktop bundle, local runs); off for Postgres, where deploys
+# run `python webapp.py migrate` as a release step instead
+AUTO_MIGRATE = os.environ.get('AUTO_MIGRATE', 'false' if USE_POSTGRES else 'true').lower() in ('1', 'true', 'yes')
+
+def connect_for_schema():
+    """Open a short-lived connection, outside the pool, for schema work"""
+    if USE_POSTGRES:
+        try:
+            import psycopg2
+        except ImportError:
+            logger.error("❌ psycopg2 not available for PostgreSQL connection")
+            raise ImportError("psycopg2-binary required for PostgreSQL support")
+        return psycopg2.connect(**DB_CONFIG)
+    return sqlite3.connect(DB_PATH)
+
+def migrate_database():
+    """Bring the database up to the latest schema version.
+    
+    Run by `python webapp.py migrate` (or `flask --app webapp migrate`) as a
+    deploy step, and on first use when AUTO_MIGRATE is set.
+    
+    Returns:
+        Number of migrations applied
+    """
     if not USE_POSTGRES:
+        if not os.path.exists(DB_PATH):
+            logger.warning(f"⚠️  Database not found at {DB_PATH}, nothing to migrate")
+            return 0
+        if SQLITE_READ_ONLY:
+            logger.info("🔒 SQLite read-only mode: skipping schema migrations")
+            return 0
+    
+    conn = connect_for_schema()
+    try:
+        if USE_POSTGRES:
+            applied = migrations.migrate_postgres(conn)
+        else:
+            applied = migrations.migrate_sqlite(conn)
+            # WAL lets readers in every worker run alongside a scraper's writes;
+            # the setting is stored in the file
+            conn.execute("PRAGMA journal_mode = WAL")
+    finally:
+        conn.close()
+    
+    if applied:
+        logger.info(f"✅ Applied {applied} schema migrations")
+    return applied
+
+def vacuum_database():
+    """Compact the SQLite file, then rebuild the full-text and trigram indexes.
+    
+    Run by `python webapp.py vacuum` (or `flask --app webapp vacuum`). The
+    FTS5 indexes follow the implicit rowids of tables with TEXT primary keys,
+    which VACUUM may renumber, so a VACUUM run any other way must be followed
+    by the same rebuild. Postgres needs neither: autovacuum reclaims space and
+    its tsvector columns live on the rows themselves.
+    """
+    if USE_POSTGRES:
+        logger.info("PostgreSQL database: autovacuum handles compaction, nothing to do")
+        return
+    if not os.path.exists(DB_PATH):
+        logger.warning(f"⚠️  Database not found at {DB_PATH}, nothing to vacuum")
         return
     
+    conn = connect_for_schema()
     try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        cursor = conn.cursor()
-        
-        # Create videos table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS videos (
-                video_id VARCHAR(255) PRIMARY KEY,
-                title TEXT,
-                description TEXT,
-                published_at TIMESTAMP,
-                duration VARCHAR(50),
-                view_count BIGINT,
-                like_count BIGINT,
-                comment_count BIGINT,
-                tags TEXT,
-                category_id VARCHAR(50),
-                channel_title VARCHAR(255),
-                thumbnail_url TEXT,
-                language VARCHAR(10)
-            )
-        """)
-        
-        # Create comments table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS comments (
-                comment_id VARCHAR(255) PRIMARY KEY,
-                video_id VARCHAR(255),
-                parent_comment_id VARCHAR(255),
-                author VARCHAR(255),
-                text TEXT,
-                published_at TIMESTAMP,
-                updated_at TIMESTAMP,
-                like_count INTEGER,
-                is_reply BOOLEAN DEFAULT FALSE,
-                channel_owner_liked BOOLEAN DEFAULT FALSE,
-                FOREIGN KEY (video_id) REFERENCES videos (video_id)
-            )
-        """)
-        
-        # Create indexes for better performance
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_comments_video_id ON comments (video_id)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_comments_parent_id ON comments (parent_comment_id)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_videos_published_at ON videos (published_at)")
-        
+        conn.execute("VACUUM")
+        fulltext.rebuild_sqlite_search_index(conn)
+        trigram.rebuild_sqlite_trigram_index(conn)
         conn.commit()
-        cursor.close()
+    finally:
         conn.close()
-        
-        logger.info("✅ PostgreSQL tables initialized successfully")
-        
+    logger.info("✅ Vacuumed database and rebuilt search indexes")
+
+# Set once the full-text index is known to exist; searches fall back to LIKE otherwise
+FULLTEXT_ENABLED = False
+
+# Set once the trigram index is known to exist; substring matches fall back to LIKE otherwise
+TRIGRAM_ENABLED = False
+
+# Set once comments.change_seq is known to exist; video rollups follow the data version otherwise
+CHANGE_SEQ_ENABLED = False
+
+def check_schema():
+    """Migrate if allowed, warn if the schema is still behind, and detect the search indexes"""
+    global FULLTEXT_ENABLED, TRIGRAM_ENABLED, CHANGE_SEQ_ENABLED
+    if not USE_POSTGRES and not os.path.exists(DB_PATH):
+        return
+    
+    if AUTO_MIGRATE:
+        try:
+            migrate_database()
+        except sqlite3.Error as e:
+            # e.g. a read-only bundle; serve whatever schema the file already has
+            logger.warning(f"⚠️  Schema migration skipped: {e}")
+    
+    try:
+        conn = connect_for_schema()
+        try:
+            version = migrations.current_version(conn, DB_DIALECT)
+            CHANGE_SEQ_ENABLED = version >= migrations.CHANGE_SEQ_VERSION
+            if version < migrations.latest_version():
+                logger.warning(
+                    f"⚠️  Database schema is at version {version}, expected {migrations.latest_version()}; "
+                    f"run `python webapp.py migrate`"
+                )
+            if USE_POSTGRES:
+                FULLTEXT_ENABLED = fulltext.postgres_search_index_exists(conn)
+                TRIGRAM_ENABLED = trigram.postgres_trigram_index_exists(conn)
+            else:
+                FULLTEXT_ENABLED = fulltext.sqlite_search_index_exists(conn)
+                TRIGRAM_ENABLED = trigram.sqlite_trigram_index_exists(conn)
+        finally:
+            conn.close()
     except Exception as e:
-        logger.error(f"❌ Error initializing PostgreSQL tables: {e}")
-        raise
+        if USE_POSTGRES:
+            logger.error(f"❌ Error checking PostgreSQL schema: {e}")
+            raise
+        logger.warning(f"⚠️  Full-text index unavailable, searching with LIKE: {e}")
+        FULLTEXT_ENABLED = False
+        TRIGRAM_ENABLED = False
 
-# Initialize database tables
-if USE_POSTGRES:
-    init_postgres_tables()
+def check_templates():
+    """Warn early if the templates can't be found, e.g. in a misbuilt bundle"""
+    templates_dir = BASE_DIR / "templates" if not USE_POSTGRES else Path("templates")
+    if not templates_dir.exists() and not USE_POSTGRES:
+        logger.warning(f"Templates directory not found at: {templates_dir}")
+        # Try to find templates in the bundle
+        if getattr(sys, 'frozen', False):
+            # In bundle, templates might be in Resources
+            bundle_templates = BASE_DIR / ".." / "Resources" / "templates"
+            if bundle_templates.exists():
+                logger.info(f"Found templates in bundle at: {bundle_templates}")
+            else:
+                logger.warning("Templates not found in expected bundle locations")
+
+_initialized = False
+_init_lock = threading.Lock()
+
+def ensure_initialized():
+    """Run the once-per-process startup checks on first use.
+    
+    Called before the first request, or up front from gunicorn's when_ready
+    hook so forked workers inherit the result. Failures are not remembered,
+    so the next request tries again.
+    """
+    global _initialized
+    if _initialized:
+        return
+    with _init_lock:
+        if _initialized:
+            return
+        log_database_config()
+        logger.info(f"⚡ JSON encoding with {serialization.BACKEND}")
+        check_schema()
+        check_templates()
+        _initialized = True
+
+# Pooled connection settings
+DB_POOL_MIN = int(os.environ.get('DB_POOL_MIN', 1))
+DB_POOL_MAX = int(os.environ.get('DB_POOL_MAX', 10))
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 30))
+DB_POOL_RECYCLE = float(os.environ.get('DB_POOL_RECYCLE', 1800))
+
+# Applied once per SQLite connection rather than per request
+SQLITE_PRAGMAS = {
+    'busy_timeout': 5000,
+    # Negative means KiB, i.e. ~20 MB private page cache per connection
+    'cache_size': -int(os.environ.get('SQLITE_CACHE_SIZE_KB', 20000)),
+    # Pages read through mmap live in the OS page cache, shared by all workers
+    'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+    'temp_store': 'MEMORY'
+}
+if SQLITE_READ_ONLY:
+    SQLITE_PRAGMAS['query_only'] = 'ON'
+
+_db_pool = None
+_db_pool_lock = threading.Lock()
+
+def get_db_pool():
+    """Get the process-wide connection pool, creating it on first use.
+    
+    Creation is deferred so each gunicorn worker builds its own pool after fork.
+    """
+    global _db_pool
+    if _db_pool is None:
+        with _db_pool_lock:
+            if _db_pool is None:
+                if USE_POSTGRES:
+                    _db_pool = PostgresConnectionPool(
+                        DB_CONFIG,
+                        min_size=DB_POOL_MIN,
+                        max_size=DB_POOL_MAX,
+                        timeout=DB_POOL_TIMEOUT,
+                        max_age=DB_POOL_RECYCLE
+                    )
+                else:
+                    _db_pool = SQLiteConnectionCache(DB_PATH, SQLITE_PRAGMAS, read_only=SQLITE_READ_ONLY)
+    return _db_pool
+
+def init_worker():
+    """Per-worker setup, called from gunicorn's post_fork hook.
+    
+    Drops any pool inherited from the master process, whose connections
+    must not be shared across processes, and opens this worker's own.
+    """
+    global _db_pool
+    with _db_pool_lock:
+        # Don't close inherited connections: that would tear down the master's sockets
+        _db_pool = None
+    QUERY_CACHE.clear()
+    get_db_pool()
+    reset_export_runner()
 
 def get_db():
     """Get database connection"""
     db = getattr(g, '_database', None)
     if db is None:
         try:
-            if USE_POSTGRES:
-                db = g._database = psycopg2.connect(**DB_CONFIG)
-                # PostgreSQL doesn't have row_factory, we'll handle this in queries
-            else:
-                db = g._database = sqlite3.connect(DB_PATH)
-                db.row_factory = sqlite3.Row
+            db = g._database = get_db_pool().getconn()
+        except PoolTimeout as e:
+            logger.error(f"❌ Database pool exhausted: {e}")
+            return None
         except Exception as e:
             logger.error(f"❌ Database connection failed: {e}")
             if USE_POSTGRES:
@@ -169,37 +344,422 @@ def get_db():
     return db
 
 def dict_from_row(row, cursor=None):
-    """Convert database row to dictionary, handling both SQLite and PostgreSQL"""
-    if USE_POSTGRES and cursor:
-        # PostgreSQL: use cursor description to get column names
-        columns = [desc[0] for desc in cursor.description]
-        return dict(zip(columns, row))
-    else:
-        # SQLite: row is already dict-like due to row_factory
-        return dict(row)
+    """Convert a single database row to a dictionary, for SQLite or PostgreSQL rows"""
+    if cursor is not None and cursor.description:
+        return dict(zip([desc[0] for desc in cursor.description], row))
+    return dict(row)
 
 def adapt_query(query):
-    """Adapt query syntax for the database type"""
+    """Adapt query syntax for the database type; the rewrite is cached per statement"""
+    return compile_sql(query, DB_DIALECT)
+
+def encode_cursor(sort_by, order, sort_value, tie_value):
+    """Encode the last row's sort key and tie-breaker as an opaque page cursor"""
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    payload = json.dumps({'s': sort_by, 'o': order, 'k': [sort_value, tie_value]})
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(token, sort_by, order):
+    """Decode a page cursor, returning (sort_value, tie_value) or None if invalid.
+    
+    A cursor is only valid for the sort and order it was issued under.
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if payload.get('s') != sort_by or payload.get('o') != order:
+            return None
+        sort_value, tie_value = payload['k']
+        return sort_value, tie_value
+    except (ValueError, TypeError, KeyError, binascii.Error):
+        return None
+
+# Date sorts run on the integer epoch columns; other sorts name their column
+SORT_COLUMNS = {'published_at': 'published_ts'}
+
+def sort_column(sort_by):
+    """Column a ?sort= value orders by; cursors are issued under this name too"""
+    return SORT_COLUMNS.get(sort_by, sort_by)
+
+# Values standing in for NULL in sort columns. A keyset comparison with NULL
+# is never true, so rows without a date or count would drop out of cursor
+# pages; ordering and cursors both use COALESCE(column, default) instead
+SORT_DEFAULTS = {
+    'published_ts': 0, 'like_count': 0, 'view_count': 0, 'comment_count': 0,
+    'title': '', 'author': '',
+}
+
+def sort_key(alias, column):
+    """SQL ordering expression for a sort column, e.g. COALESCE(c.like_count, 0)"""
+    default = SORT_DEFAULTS[column]
+    literal = f"'{default}'" if isinstance(default, str) else default
+    return f"COALESCE({alias}.{column}, {literal})"
+
+def sort_value(row, column):
+    """A row's value of sort_key(), for encoding in a cursor"""
+    value = row.get(column)
+    return SORT_DEFAULTS[column] if value is None else value
+
+def format_published(row):
+    """Set a row's published_at from its published_ts column.
+    
+    Every writer's rows come out in the same ISO 8601 UTC form, whatever
+    text format the row was stored with. Rows whose stored text couldn't
+    be converted keep that text.
+    """
+    row['published_at'] = timestamps.format_epoch(row['published_ts'], row.get('published_at'))
+    return row
+
+def date_range(start_date, end_date):
+    """Epoch bounds for the start_date/end_date filters, None where unset.
+    
+    A bare end date includes the whole day. Raises ValueError if either
+    value is not a date.
+    """
+    return (timestamps.parse_date_param(start_date),
+            timestamps.parse_date_param(end_date, end_of_day=True))
+
+def keyset_clause(sort_by, order, tie_column):
+    """SQL condition selecting rows strictly after a cursor position.
+    
+    Takes three parameters: sort value, sort value again, tie-breaker value.
+    """
+    op = '<' if order == 'desc' else '>'
+    return f"({sort_by} {op} ? OR ({sort_by} = ? AND {tie_column} {op} ?))"
+
+def search_clause(table, alias, search):
+    """Build the full-text pieces of a query for a search term.
+    
+    Returns a dict with 'join' and 'where' SQL plus their 'join_params' and
+    'where_params', and 'rank' (lower ranks first) and 'snippet' SQL, or None
+    when the full-text index can't serve the term and callers should use LIKE.
+    """
+    if not FULLTEXT_ENABLED:
+        return None
+    
+    terms = fulltext.parse_search_query(search)
+    
     if USE_POSTGRES:
-        # Convert SQLite ? placeholders to PostgreSQL %s
-        placeholder_count = query.count('?')
-        for i in range(placeholder_count):
-            query = query.replace('?', '%s', 1)
-    return query
+        expression = fulltext.tsquery_expression(terms)
+        if expression is None:
+            return None
+        config = fulltext.POSTGRES_TS_CONFIG
+        snippet_column = 'text' if table == 'comments' else 'title'
+        headline_options = (
+            f"StartSel={fulltext.SNIPPET_MATCH_START}, StopSel={fulltext.SNIPPET_MATCH_END}, "
+            "MaxWords=24, MinWords=8, MaxFragments=2"
+        )
+        return {
+            'join': f"CROSS JOIN to_tsquery('{config}', ?) AS search_query",
+            'join_params': [expression],
+            'where': f"{alias}.search_vector @@ search_query",
+            'where_params': [],
+            'rank': f"-ts_rank_cd({alias}.search_vector, search_query)",
+            'snippet': f"ts_headline('{config}', {alias}.{snippet_column}, search_query, '{headline_options}')"
+        }
+    
+    expression = fulltext.fts5_match_expression(terms)
+    if expression is None:
+        return None
+    fts_table = fulltext.SQLITE_FTS_TABLES[table][0]
+    return {
+        'join': f"JOIN {fts_table} ON {fts_table}.rowid = {alias}.rowid",
+        'join_params': [],
+        'where': f"{fts_table} MATCH ?",
+        'where_params': [expression],
+        'rank': f"bm25({fts_table})",
+        'snippet': f"snippet({fts_table}, 0, '{fulltext.SNIPPET_MATCH_START}', '{fulltext.SNIPPET_MATCH_END}', '…', 16)"
+    }
+
+def substring_filter(table, alias, column, text):
+    """WHERE condition and params matching text anywhere in a column.
+    
+    Served by the trigram index when it exists and text is long enough,
+    otherwise by a LIKE scan.
+    """
+    if TRIGRAM_ENABLED:
+        clause = trigram.substring_clause(table, alias, text, DB_DIALECT)
+        if clause is not None:
+            return clause
+    return f"{alias}.{column} LIKE ? ESCAPE '\\'", [trigram.like_pattern(text)]
+
+def comment_filters(video_id, search, min_likes, start_ts, end_ts, has_replies=False):
+    """Build the filter spec selecting a video's top-level comments.
+    
+    Shared by the paged and streaming comment endpoints so both accept the
+    same filters. start_ts and end_ts are inclusive epoch bounds from
+    date_range(). Returns (query, fts), where query is a SelectQuery without
+    a select list and fts is the search_clause() result or None.
+    """
+    fts = search_clause('comments', 'c', search) if search else None
+    query = SelectQuery(DB_DIALECT, "FROM comments c")
+    
+    # Full-text join parameters precede the WHERE ones
+    if fts:
+        query.join(fts['join'], fts['join_params'])
+    query.where("c.video_id = ?", [video_id])
+    query.where("c.parent_comment_id IS NULL")
+    
+    # Add filters
+    if fts:
+        query.where(fts['where'], fts['where_params'])
+    elif search:
+        query.where("(c.text LIKE ? OR c.author LIKE ?)", [f'%{search}%', f'%{search}%'])
+    
+    if min_likes > 0:
+        query.where("c.like_count >= ?", [min_likes])
+    
+    if start_ts is not None:
+        query.where("c.published_ts >= ?", [start_ts])
+    
+    if end_ts is not None:
+        query.where("c.published_ts <= ?", [end_ts])
+    
+    if has_replies:
+        query.where("c.reply_count > 0")
+    
+    return query, fts
+
+# Replies shown per thread with include_replies=preview
+REPLY_PREVIEW_SIZE = 3
+
+def fetch_replies(cursor, video_id, parent_ids, max_replies=None):
+    """Fetch replies for many parent comments at once, grouped by parent ID.
+    
+    When max_replies is given, a window function caps each thread at
+    max_replies + 1 rows so callers can tell whether a thread was truncated.
+    """
+    replies_by_parent = {}
+    if not parent_ids:
+        return replies_by_parent
+    
+    for batch in batched(parent_ids):
+        placeholders = ', '.join(['?'] * len(batch))
+        
+        if max_replies is None:
+            query = f"""
+                SELECT comment_id, video_id, parent_comment_id, author, text, 
+                       published_at, published_ts, updated_at, like_count, is_reply, channel_owner_liked
+                FROM comments 
+                WHERE video_id = ? AND parent_comment_id IN ({placeholders})
+                ORDER BY parent_comment_id, published_ts ASC, comment_id ASC
+            """
+            params = [video_id] + batch
+        else:
+            query = f"""
+                SELECT comment_id, video_id, parent_comment_id, author, text, 
+                       published_at, published_ts, updated_at, like_count, is_reply, channel_owner_liked
+                FROM (
+                    SELECT comment_id, video_id, parent_comment_id, author, text, 
+                           published_at, published_ts, updated_at, like_count, is_reply, channel_owner_liked,
+                           ROW_NUMBER() OVER (
+                               PARTITION BY parent_comment_id ORDER BY published_ts ASC, comment_id ASC
+                           ) AS reply_rank
+                    FROM comments 
+                    WHERE video_id = ? AND parent_comment_id IN ({placeholders})
+                ) ranked
+                WHERE reply_rank <= ?
+                ORDER BY parent_comment_id, published_ts ASC, comment_id ASC
+            """
+            params = [video_id] + batch + [max_replies + 1]
+        
+        for reply in cached_fetchall(cursor, adapt_query(query), params):
+            reply['like_count'] = int(reply['like_count']) if reply['like_count'] else 0
+            format_published(reply)
+            replies_by_parent.setdefault(reply['parent_comment_id'], []).append(reply)
+    
+    return replies_by_parent
+
+def current_data_version():
+    """Get (version, updated_at) for this request, or None if unavailable"""
+    if '_data_version' not in g:
+        db = get_db()
+        if db is None:
+            return None
+        cursor = db.cursor()
+        g._data_version = data_version.get_data_version(cursor, DB_DIALECT)
+        cursor.close()
+    return g._data_version
+
+# Result cache shared by all threads of this worker
+QUERY_CACHE = QueryCache(
+    max_entries=int(os.environ.get('QUERY_CACHE_MAX_ENTRIES', 1000)),
+    max_weight=int(os.environ.get('QUERY_CACHE_MAX_ROWS', 50000)),
+    ttl=float(os.environ.get('QUERY_CACHE_TTL', 300))
+)
+
+def cached_fetchall(cursor, query, params, columns=None):
+    """Run a row query through the result cache, returning a list of dicts.
+    
+    Results are keyed on the endpoint, statement, parameters and data version,
+    so they are dropped as soon as a writer bumps the version. Callers get
+    copies and may modify them freely. Rows are mapped with the given column
+    names, or with names read once from the cursor description.
+    """
+    version = current_data_version()
+    key = (request.endpoint, query, tuple(params))
+    if version is not None:
+        rows = QUERY_CACHE.get(key, version[0])
+        if rows is not MISSING:
+            return [dict(row) for row in rows]
+    
+    cursor.execute(query, params)
+    names = columns or [desc[0] for desc in cursor.description]
+    rows = [dict(zip(names, row)) for row in cursor.fetchall()]
+    if version is not None:
+        QUERY_CACHE.put(key, version[0], rows)
+        return [dict(row) for row in rows]
+    return rows
+
+def cached_scalar(cursor, query, params):
+    """Run a single-value query (e.g. COUNT(*)) through the result cache"""
+    version = current_data_version()
+    key = (request.endpoint, query, tuple(params))
+    if version is not None:
+        value = QUERY_CACHE.get(key, version[0])
+        if value is not MISSING:
+            return value
+    
+    cursor.execute(query, params)
+    row = cursor.fetchone()
+    value = row[0] if row else None
+    if version is not None:
+        QUERY_CACHE.put(key, version[0], value)
+    return value
+
+# SQLite has no planner row estimate, so 'estimate' counts stop here
+COUNT_ESTIMATE_CAP = 10000
+
+def count_total(cursor, mode, query):
+    """Count the rows matched by a SelectQuery according to ?count=.
+    
+    'exact' runs a cached COUNT(*); 'estimate' asks the Postgres planner, or on
+    SQLite counts up to COUNT_ESTIMATE_CAP; 'none' skips counting. Returns
+    (total, is_exact), with total None when counting was skipped.
+    """
+    if mode == 'none':
+        return None, False
+    
+    compiled = query.compile()
+    params = query.filter_params()
+    if mode == 'estimate':
+        if USE_POSTGRES:
+            cursor.execute(compiled.explain_sql, params)
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]['Plan']['Plan Rows']), False
+        total = cached_scalar(cursor, compiled.capped_count_sql, params + [COUNT_ESTIMATE_CAP + 1])
+        if total <= COUNT_ESTIMATE_CAP:
+            return total, True
+        return COUNT_ESTIMATE_CAP, False
+    
+    return cached_scalar(cursor, compiled.count_sql, params), True
+
+def request_cache_key():
+    """Normalize the request path and query parameters into a stable key"""
+    args = sorted((key, value) for key in request.args for value in request.args.getlist(key))
+    return request.path + '?' + '&'.join(f"{key}={value}" for key, value in args)
+
+def conditional_get(view):
+    """Serve 304 Not Modified when the client's copy matches the data version.
+    
+    The ETag combines the data version, which every writer bumps, with the
+    normalized query, so revalidation costs one lookup in app_meta instead of
+    re-running the endpoint's queries.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        version = current_data_version()
+        if version is None:
+            return view(*args, **kwargs)
+        
+        number, updated_at = version
+        query_hash = hashlib.sha1(request_cache_key().encode('utf-8')).hexdigest()[:16]
+        etag = f"v{number}-{query_hash}"
+        last_modified = datetime.utcfromtimestamp(updated_at) if updated_at else None
+        
+        not_modified = False
+        if request.if_none_match:
+            not_modified = request.if_none_match.contains_weak(etag)
+        elif request.if_modified_since and last_modified:
+            not_modified = last_modified <= request.if_modified_since.replace(tzinfo=None)
+        
+        if not_modified:
+            response = make_response('', 304)
+        else:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+        
+        response.set_etag(etag, weak=True)
+        if last_modified:
+            response.last_modified = last_modified
+        # Let browsers keep responses but revalidate before each reuse
+        response.cache_control.no_cache = True
+        return response
+    return wrapper
+
+# Identical requests arriving while one is computed wait for its response
+# instead of running the same queries; shared by all threads of this worker
+IN_FLIGHT = SingleFlight(timeout=float(os.environ.get('SINGLE_FLIGHT_TIMEOUT', 30)))
+
+def coalesced(view):
+    """Compute a view once for identical concurrent requests and share the response.
+    
+    Requests are identical when they have the same endpoint, normalized
+    query and data version. The first one runs the view; the others wait
+    up to SINGLE_FLIGHT_TIMEOUT seconds, answering 503 if it runs longer,
+    and get a copy of its serialized body, status and headers. If the view
+    raises, every waiting request fails with the same error. Apply under
+    @conditional_get so revalidations are answered before joining a flight.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        version = current_data_version()
+        key = (request.endpoint, request_cache_key(), version[0] if version else None)
+        
+        def compute():
+            response = make_response(view(*args, **kwargs))
+            return response.get_data(), response.status_code, list(response.headers.items())
+        
+        try:
+            body, status, headers = IN_FLIGHT.do(key, compute)
+        except FlightTimeout as e:
+            logger.warning(f"⚠️  Gave up waiting for {request.path}: {e}")
+            response = jsonify({'error': 'Server busy; try again shortly'})
+            response.status_code = 503
+            response.headers['Retry-After'] = '5'
+            return response
+        return Response(body, status=status, headers=headers)
+    return wrapper
 
-@app.teardown_appcontext
 def close_connection(exception):
-    """Close database connection"""
-    db = getattr(g, '_database', None)
+    """Return the database connection to the pool"""
+    db = g.pop('_database', None)
     if db is not None:
-        db.close()
+        # Connections that saw an unhandled error are recycled rather than reused
+        get_db_pool().putconn(db, discard=exception is not None)
 
-@app.route('/')
+@bp.route('/api/health')
+def health():
+    """Report connection pool occupancy and wait times for monitoring"""
+    return jsonify({
+        'status': 'ok',
+        'database': get_db_pool().stats(),
+        'query_cache': QUERY_CACHE.stats(),
+        'single_flight': IN_FLIGHT.stats()
+    })
+
+@bp.route('/')
 def index():
     """Main page"""
     return render_template('index.html')
 
-@app.route('/api/videos')
+@bp.route('/api/videos')
+@conditional_get
+@coalesced
 def get_videos():
     """Get all videos with pagination and filtering"""
     try:
@@ -210,82 +770,94 @@ def get_videos():
         cursor = db.cursor()
         
         # Get pagination parameters
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
+        page = max(1, request.args.get('page', 1, type=int))
+        per_page = max(1, request.args.get('per_page', 20, type=int))
         search = request.args.get('search', '').strip()
+        match = request.args.get('match', 'words')
         sort_by = request.args.get('sort', 'published_at')
         order = request.args.get('order', 'desc')
+        page_cursor = request.args.get('cursor', '').strip()
+        count_mode = request.args.get('count', 'exact')
         
         # Validate sort parameters
-        valid_sorts = ['published_at', 'title', 'view_count', 'like_count', 'comment_count']
+        valid_sorts = ['published_at', 'title', 'view_count', 'like_count', 'comment_count', 'relevance']
         if sort_by not in valid_sorts:
             sort_by = 'published_at'
         
         if order not in ['asc', 'desc']:
             order = 'desc'
         
-        # Build base query
-        base_query = """
-            SELECT video_id, title, description, published_at, duration, 
-                   view_count, like_count, comment_count, tags, category_id,
-                   channel_title, thumbnail_url, language
-            FROM videos
-        """
+        # match=substring finds the text inside words too, e.g. "nny" in "Skinny"
+        if match not in ['words', 'substring']:
+            match = 'words'
         
-        # Add search filter if provided
-        params = []
-        if search:
-            base_query += " WHERE title LIKE ?"
-            params.append(f'%{search}%')
+        # Use the full-text index for word searches, falling back to a substring match
+        fts = search_clause('videos', 'v', search) if search and match == 'words' else None
+        if sort_by == 'relevance' and fts is None:
+            sort_by = 'published_at'
+        column = sort_column(sort_by)
         
-        # Add ordering
-        base_query += f" ORDER BY {sort_by} {order.upper()}"
+        after = None
+        if page_cursor:
+            if sort_by == 'relevance':
+                return jsonify({'error': 'Cursor pagination is not supported for relevance sort'}), 400
+            after = decode_cursor(page_cursor, column, order)
+            if after is None:
+                return jsonify({'error': 'Invalid cursor'}), 400
         
-        # Adapt query for database type
-        base_query = adapt_query(base_query)
+        # Build query; the row and count statements share one filter spec
+        query = SelectQuery(DB_DIALECT, "FROM videos v", [
+            'v.video_id', 'v.title', 'v.description', 'v.published_at', 'v.published_ts', 'v.duration',
+            'v.view_count', 'v.like_count', 'v.comment_count', 'v.tags', 'v.category_id',
+            'v.channel_title', 'v.thumbnail_url', 'v.language'
+        ])
         
-        # Get total count for pagination
-        count_query = "SELECT COUNT(*) FROM videos"
-        if search:
-            count_query += " WHERE title LIKE ?"
-            count_query = adapt_query(count_query)
-            cursor.execute(count_query, params[:1])  # Only search param for count
+        # Add search filter if provided
+        if fts:
+            query.select(f"{fts['snippet']} AS snippet")
+            query.join(fts['join'], fts['join_params'])
+            query.where(fts['where'], fts['where_params'])
+        elif search:
+            query.where(*substring_filter('videos', 'v', 'title', search))
+        
+        # Keyset pagination: continue strictly after the cursor row
+        if after is not None:
+            query.seek(keyset_clause(sort_key('v', column), order, 'v.video_id'), [after[0], after[0], after[1]])
+        
+        # Add ordering, with video_id as a stable tie-breaker
+        if sort_by == 'relevance':
+            query.order_by(f"{fts['rank']}, v.video_id")
         else:
-            cursor.execute(count_query)
+            query.order_by(f"{sort_key('v', column)} {order.upper()}, v.video_id {order.upper()}")
         
-        total_count = cursor.fetchone()[0]
+        # Get total count for pagination
+        if count_mode not in ['exact', 'estimate', 'none']:
+            count_mode = 'exact'
+        total_count, total_exact = count_total(cursor, count_mode, query)
         
         # Calculate pagination
         offset = (page - 1) * per_page
-        total_pages = (total_count + per_page - 1) // per_page
+        total_pages = (total_count + per_page - 1) // per_page if total_count is not None else None
         
-        # Add pagination to main query
-        paginated_query = base_query + f" LIMIT ? OFFSET ?"
-        paginated_query = adapt_query(paginated_query)
-        params.extend([per_page, offset])
+        # Execute main query, fetching one extra row to detect a next page
+        compiled, params = query.rows(limit=per_page + 1, offset=None if after is not None else offset)
+        rows = cached_fetchall(cursor, compiled.rows_sql, params, compiled.columns)
+        has_more = len(rows) > per_page
+        rows = rows[:per_page]
         
-        # Execute main query
-        cursor.execute(paginated_query, params)
+        # Encode the next cursor from the last row's raw sort value, before any display formatting
+        next_cursor = None
+        if has_more and rows and sort_by != 'relevance':
+            last = rows[-1]
+            next_cursor = encode_cursor(column, order, sort_value(last, column), last['video_id'])
         
-        # Fetch results and convert to dictionaries
+        # Format results
         videos = []
-        for row in cursor.fetchall():
-            video = dict_from_row(row, cursor)
-            
+        for video in rows:
             # Format dates and numbers
-            if video.get('published_at'):
-                try:
-                    # Handle different date formats
-                    date_str = video['published_at']
-                    if isinstance(date_str, str):
-                        # Remove timezone info if present for consistent parsing
-                        if 'T' in date_str:
-                            date_str = date_str.replace('Z', '').split('T')[0]
-                        video['published_at'] = date_str
-                except Exception as e:
-                    logger.warning(f"Date parsing error for video {video.get('video_id')}: {e}")
-            
-            # Format numbers
+            format_published(video)
+            if fts:
+                video['snippet'] = fulltext.highlight_snippet(video['snippet'])
             for field in ['view_count', 'like_count', 'comment_count']:
                 if video.get(field) is not None:
                     video[field] = int(video[field]) if video[field] else 0
@@ -298,11 +870,16 @@ def get_videos():
                 'page': page,
                 'per_page': per_page,
                 'total': total_count,
+                'total_exact': total_exact,
+                'count': count_mode,
                 'pages': total_pages,
-                'has_prev': page > 1,
-                'has_next': page < total_pages
+                'has_prev': page > 1 if after is None else True,
+                'has_next': has_more,
+                'cursor': page_cursor or None,
+                'next_cursor': next_cursor
             },
             'search': search,
+            'match': match,
             'sort': sort_by,
             'order': order
         })
@@ -311,7 +888,9 @@ def get_videos():
         logger.error(f"❌ Error fetching videos: {e}")
         return jsonify({'error': 'Failed to fetch videos'}), 500
 
-@app.route('/api/videos/<video_id>/comments')
+@bp.route('/api/videos/<video_id>/comments')
+@conditional_get
+@coalesced
 def get_comments(video_id):
     """Get comments for a specific video with pagination and filtering"""
     try:
@@ -322,130 +901,131 @@ def get_comments(video_id):
         cursor = db.cursor()
         
         # Get pagination and filter parameters
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 50, type=int)
+        page = max(1, request.args.get('page', 1, type=int))
+        per_page = max(1, request.args.get('per_page', 50, type=int))
         search = request.args.get('search', '').strip()
         sort_by = request.args.get('sort', 'published_at')
         order = request.args.get('order', 'desc')
         min_likes = request.args.get('min_likes', 0, type=int)
         start_date = request.args.get('start_date', '')
         end_date = request.args.get('end_date', '')
+        max_replies = request.args.get('max_replies', None, type=int)
+        if max_replies is not None and max_replies < 0:
+            max_replies = 0
+        page_cursor = request.args.get('cursor', '').strip()
+        count_mode = request.args.get('count', 'exact')
+        include_replies = request.args.get('include_replies', 'all')
+        has_replies = request.args.get('has_replies', '').lower() in ('1', 'true', 'yes')
+        
+        # 'none' returns reply counts only; clients load threads from the replies endpoint
+        if include_replies not in ['none', 'preview', 'all']:
+            include_replies = 'all'
+        if include_replies == 'preview' and max_replies is None:
+            max_replies = REPLY_PREVIEW_SIZE
         
         # Validate sort parameters
-        valid_sorts = ['published_at', 'like_count', 'author']
+        valid_sorts = ['published_at', 'like_count', 'author', 'relevance']
         if sort_by not in valid_sorts:
             sort_by = 'published_at'
             
         if order not in ['asc', 'desc']:
             order = 'desc'
         
-        # Build query for main comments (not replies)
-        base_query = """
-            SELECT comment_id, video_id, parent_comment_id, author, text, 
-                   published_at, updated_at, like_count, is_reply, channel_owner_liked
-            FROM comments 
-            WHERE video_id = ? AND (parent_comment_id IS NULL OR parent_comment_id = '')
-        """
-        
-        # Build parameters list
-        params = [video_id]
-        
-        # Add filters
-        if search:
-            base_query += " AND (text LIKE ? OR author LIKE ?)"
-            params.extend([f'%{search}%', f'%{search}%'])
-        
-        if min_likes > 0:
-            base_query += " AND like_count >= ?"
-            params.append(min_likes)
-        
-        if start_date:
-            base_query += " AND published_at >= ?"
-            params.append(start_date)
-        
-        if end_date:
-            base_query += " AND published_at <= ?"
-            params.append(end_date)
-        
-        # Add ordering
-        base_query += f" ORDER BY {sort_by} {order.upper()}"
-        
-        # Adapt query for database type
-        base_query = adapt_query(base_query)
+        try:
+            start_ts, end_ts = date_range(start_date, end_date)
+        except ValueError:
+            return jsonify({'error': 'Invalid start_date or end_date'}), 400
         
-        # Get total count for pagination
-        count_query = """
-            SELECT COUNT(*) FROM comments 
-            WHERE video_id = ? AND (parent_comment_id IS NULL OR parent_comment_id = '')
-        """
-        count_params = [video_id]
+        # Use the full-text index for searches, falling back to LIKE
+        query, fts = comment_filters(video_id, search, min_likes, start_ts, end_ts, has_replies)
+        if sort_by == 'relevance' and fts is None:
+            sort_by = 'published_at'
+        column = sort_column(sort_by)
         
-        if search:
-            count_query += " AND (text LIKE ? OR author LIKE ?)"
-            count_params.extend([f'%{search}%', f'%{search}%'])
+        after = None
+        if page_cursor:
+            if sort_by == 'relevance':
+                return jsonify({'error': 'Cursor pagination is not supported for relevance sort'}), 400
+            after = decode_cursor(page_cursor, column, order)
+            if after is None:
+                return jsonify({'error': 'Invalid cursor'}), 400
         
-        if min_likes > 0:
-            count_query += " AND like_count >= ?"
-            count_params.append(min_likes)
+        # Build query for main comments (not replies)
+        query.select(
+            'c.comment_id', 'c.video_id', 'c.parent_comment_id', 'c.author', 'c.text',
+            'c.published_at', 'c.published_ts', 'c.updated_at', 'c.like_count', 'c.is_reply', 'c.channel_owner_liked',
+            'c.reply_count', 'c.last_reply_at'
+        )
+        if fts:
+            query.select(f"{fts['snippet']} AS snippet")
         
-        if start_date:
-            count_query += " AND published_at >= ?"
-            count_params.append(start_date)
+        # Keyset pagination: continue strictly after the cursor row
+        if after is not None:
+            query.seek(keyset_clause(sort_key('c', column), order, 'c.comment_id'), [after[0], after[0], after[1]])
         
-        if end_date:
-            count_query += " AND published_at <= ?"
-            count_params.append(end_date)
+        # Add ordering, with comment_id as a stable tie-breaker
+        if sort_by == 'relevance':
+            query.order_by(f"{fts['rank']}, c.comment_id")
+        else:
+            query.order_by(f"{sort_key('c', column)} {order.upper()}, c.comment_id {order.upper()}")
         
-        count_query = adapt_query(count_query)
-        cursor.execute(count_query, count_params)
-        total_count = cursor.fetchone()[0]
+        # Get total count for pagination; unfiltered totals come from video_stats
+        if count_mode not in ['exact', 'estimate', 'none']:
+            count_mode = 'exact'
+        stats = None
+        if count_mode != 'none' and not (search or min_likes > 0 or start_date or end_date or has_replies):
+            stats = video_stats.get_video_stats(cursor, video_id, DB_DIALECT)
+        if stats is not None:
+            total_count, total_exact = stats['top_level_count'], True
+        else:
+            total_count, total_exact = count_total(cursor, count_mode, query)
         
         # Calculate pagination
         offset = (page - 1) * per_page
-        total_pages = (total_count + per_page - 1) // per_page
+        total_pages = (total_count + per_page - 1) // per_page if total_count is not None else None
         
-        # Add pagination to main query
-        paginated_query = base_query + " LIMIT ? OFFSET ?"
-        paginated_query = adapt_query(paginated_query)
-        params.extend([per_page, offset])
-        
-        # Execute main query
-        cursor.execute(paginated_query, params)
+        # Execute main query, fetching one extra row to detect a next page
+        compiled, params = query.rows(limit=per_page + 1, offset=None if after is not None else offset)
+        rows = cached_fetchall(cursor, compiled.rows_sql, params, compiled.columns)
+        has_more = len(rows) > per_page
+        rows = rows[:per_page]
         
         # Fetch main comments
         comments = []
-        for row in cursor.fetchall():
-            comment = dict_from_row(row, cursor)
-            
-            # Format like count
+        for comment in rows:
+            # Format like and reply counts
             comment['like_count'] = int(comment['like_count']) if comment['like_count'] else 0
-            
-            # Get replies for this comment
-            replies_query = """
-                SELECT comment_id, video_id, parent_comment_id, author, text, 
-                       published_at, updated_at, like_count, is_reply, channel_owner_liked
-                FROM comments 
-                WHERE video_id = ? AND parent_comment_id = ?
-                ORDER BY published_at ASC
-            """
-            replies_query = adapt_query(replies_query)
-            cursor.execute(replies_query, [video_id, comment['comment_id']])
-            
-            replies = []
-            for reply_row in cursor.fetchall():
-                reply = dict_from_row(reply_row, cursor)
-                reply['like_count'] = int(reply['like_count']) if reply['like_count'] else 0
-                replies.append(reply)
-            
+            comment['reply_count'] = int(comment['reply_count']) if comment['reply_count'] else 0
+            comment['has_replies'] = comment['reply_count'] > 0
+            if fts:
+                comment['snippet'] = fulltext.highlight_snippet(comment['snippet'])
+            comments.append(format_published(comment))
+        
+        next_cursor = None
+        if has_more and comments and sort_by != 'relevance':
+            last = comments[-1]
+            next_cursor = encode_cursor(column, order, sort_value(last, column), last['comment_id'])
+        
+        # Get replies for every comment on this page in one batched query,
+        # skipping threads the stored counts say are empty
+        if include_replies != 'none':
+            replies_by_parent = fetch_replies(
+                cursor, video_id, [c['comment_id'] for c in comments if c['reply_count']], max_replies
+            )
+        for comment in comments:
+            if include_replies == 'none':
+                comment['has_more_replies'] = comment['has_replies']
+                continue
+            replies = replies_by_parent.get(comment['comment_id'], [])
+            if max_replies is not None:
+                comment['has_more_replies'] = len(replies) > max_replies
+                replies = replies[:max_replies]
             comment['replies'] = replies
-            comments.append(comment)
         
         # Get video info
         video_query = "SELECT title FROM videos WHERE video_id = ?"
         video_query = adapt_query(video_query)
-        cursor.execute(video_query, [video_id])
-        video_row = cursor.fetchone()
-        video_title = video_row[0] if video_row else "Unknown Video"
+        video_title = cached_scalar(cursor, video_query, [video_id]) or "Unknown Video"
         
         return jsonify({
             'comments': comments,
@@ -455,9 +1035,13 @@ def get_comments(video_id):
                 'page': page,
                 'per_page': per_page,
                 'total': total_count,
+                'total_exact': total_exact,
+                'count': count_mode,
                 'pages': total_pages,
-                'has_prev': page > 1,
-                'has_next': page < total_pages
+                'has_prev': page > 1 if after is None else True,
+                'has_next': has_more,
+                'cursor': page_cursor or None,
+                'next_cursor': next_cursor
             },
             'filters': {
                 'search': search,
@@ -465,7 +1049,10 @@ def get_comments(video_id):
                 'order': order,
                 'min_likes': min_likes,
                 'start_date': start_date,
-                'end_date': end_date
+                'end_date': end_date,
+                'max_replies': max_replies,
+                'include_replies': include_replies,
+                'has_replies': has_replies
             }
         })
         
@@ -473,70 +1060,572 @@ def get_comments(video_id):
         logger.error(f"❌ Error fetching comments for video {video_id}: {e}")
         return jsonify({'error': 'Failed to fetch comments'}), 500
 
-@app.route('/api/videos/<video_id>')
-def get_video(video_id):
-    """Get details for a specific video"""
+@bp.route('/api/comments/<comment_id>/replies')
+@conditional_get
+@coalesced
+def get_comment_replies(comment_id):
+    """Get one page of replies to a comment, oldest first.
+    
+    Pages are chained with the opaque next_cursor, so each page costs one
+    index seek however deep into the thread it is.
+    """
     try:
         db = get_db()
         if db is None:
             return jsonify({'error': 'Database connection failed'}), 500
         
         cursor = db.cursor()
+        limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+        page_cursor = request.args.get('cursor', '').strip()
         
-        query = """
-            SELECT video_id, title, description, published_at, duration, 
-                   view_count, like_count, comment_count, tags, category_id,
-                   channel_title, thumbnail_url, language
-            FROM videos 
-            WHERE video_id = ?
-        """
-        query = adapt_query(query)
-        cursor.execute(query, [video_id])
+        parent_query = adapt_query("SELECT video_id, reply_count FROM comments WHERE comment_id = ?")
+        parents = cached_fetchall(cursor, parent_query, [comment_id], ['video_id', 'reply_count'])
+        if not parents:
+            return jsonify({'error': 'Comment not found'}), 404
+        parent = parents[0]
         
-        row = cursor.fetchone()
-        if not row:
-            return jsonify({'error': 'Video not found'}), 404
+        query = SelectQuery(DB_DIALECT, "FROM comments c", [
+            'c.comment_id', 'c.video_id', 'c.parent_comment_id', 'c.author', 'c.text',
+            'c.published_at', 'c.published_ts', 'c.updated_at', 'c.like_count', 'c.is_reply', 'c.channel_owner_liked'
+        ])
+        # video_id lets the (video_id, parent_comment_id, published_ts) index serve the page
+        query.where("c.video_id = ?", [parent['video_id']])
+        query.where("c.parent_comment_id = ?", [comment_id])
+        if page_cursor:
+            after = decode_cursor(page_cursor, 'published_ts', 'asc')
+            if after is None:
+                return jsonify({'error': 'Invalid cursor'}), 400
+            query.seek(keyset_clause(sort_key('c', 'published_ts'), 'asc', 'c.comment_id'),
+                       [after[0], after[0], after[1]])
+        query.order_by(f"{sort_key('c', 'published_ts')} ASC, c.comment_id ASC")
         
-        video = dict_from_row(row, cursor)
+        compiled, params = query.rows(limit=limit + 1)
+        replies = cached_fetchall(cursor, compiled.rows_sql, params, compiled.columns)
+        has_more = len(replies) > limit
+        replies = replies[:limit]
+        for reply in replies:
+            reply['like_count'] = int(reply['like_count']) if reply['like_count'] else 0
+            format_published(reply)
         
-        # Format numbers
-        for field in ['view_count', 'like_count', 'comment_count']:
-            if video.get(field) is not None:
-                video[field] = int(video[field]) if video[field] else 0
+        next_cursor = None
+        if has_more:
+            last = replies[-1]
+            next_cursor = encode_cursor('published_ts', 'asc', sort_value(last, 'published_ts'), last['comment_id'])
         
-        return jsonify(video)
+        return jsonify({
+            'comment_id': comment_id,
+            'video_id': parent['video_id'],
+            'reply_count': int(parent['reply_count']) if parent['reply_count'] else 0,
+            'replies': replies,
+            'pagination': {
+                'limit': limit,
+                'has_next': has_more,
+                'cursor': page_cursor or None,
+                'next_cursor': next_cursor
+            }
+        })
         
     except Exception as e:
-        logger.error(f"❌ Error fetching video {video_id}: {e}")
-        return jsonify({'error': 'Failed to fetch video'}), 500
+        logger.error(f"❌ Error fetching replies for comment {comment_id}: {e}")
+        return jsonify({'error': 'Failed to fetch replies'}), 500
 
-@app.route('/api/videos/comment-data/<comment_id>')
-def get_comment_data(comment_id):
-    """Get comment data for export (including video info)"""
-    try:
-        db = get_db()
-        if db is None:
-            return jsonify({'error': 'Database connection failed'}), 500
-        
+# Rows pulled from the database cursor per network write
+STREAM_BATCH_SIZE = 500
+
+STREAM_COLUMNS = [
+    'comment_id', 'video_id', 'parent_comment_id', 'author', 'text',
+    'published_at', 'published_ts', 'updated_at', 'like_count', 'is_reply', 'channel_owner_liked'
+]
+
+def iter_row_batches(db, query, params, batch_size=STREAM_BATCH_SIZE):
+    """Run a query and yield its rows in lists of up to batch_size.
+    
+    On Postgres the rows come from a server-side cursor, so memory stays
+    flat however many rows match. Closing the generator early releases the
+    cursor.
+    """
+    if USE_POSTGRES:
+        # Named cursors are server-side and need a transaction
+        db.autocommit = False
+        cursor = db.cursor(name=f"stream_{uuid.uuid4().hex}")
+        cursor.itersize = batch_size
+    else:
         cursor = db.cursor()
-        
-        # Get comment with video info
-        query = """
-            SELECT c.comment_id, c.video_id, c.parent_comment_id, c.author, c.text,
-                   c.published_at, c.updated_at, c.like_count, c.is_reply, c.channel_owner_liked,
-                   v.title as video_title, v.channel_title
-            FROM comments c
-            JOIN videos v ON c.video_id = v.video_id
-            WHERE c.comment_id = ?
-        """
-        query = adapt_query(query)
-        cursor.execute(query, [comment_id])
-        
-        row = cursor.fetchone()
-        if not row:
+    
+    try:
+        cursor.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        cursor.close()
+        if USE_POSTGRES:
+            db.rollback()
+            db.autocommit = True
+
+@bp.route('/api/videos/<video_id>/comments.ndjson')
+def stream_comments(video_id):
+    """Stream every comment and reply of a video as newline-delimited JSON.
+    
+    Accepts the same filters as the paged comments endpoint. Each top-level
+    comment is followed by its replies, oldest first. Rows come from a single
+    server-side cursor and are written out in batches, so memory stays flat
+    however many comments the video has. The stream is gzipped when the
+    client accepts it, unless compress=0 is passed.
+    """
+    db = get_db()
+    if db is None:
+        return jsonify({'error': 'Database connection failed'}), 500
+    
+    search = request.args.get('search', '').strip()
+    sort_by = request.args.get('sort', 'published_at')
+    order = request.args.get('order', 'desc')
+    min_likes = request.args.get('min_likes', 0, type=int)
+    start_date = request.args.get('start_date', '')
+    end_date = request.args.get('end_date', '')
+    has_replies = request.args.get('has_replies', '').lower() in ('1', 'true', 'yes')
+    compress = (request.args.get('compress', '1') != '0'
+                and 'gzip' in request.headers.get('Accept-Encoding', ''))
+    
+    if sort_by not in ['published_at', 'like_count', 'author', 'relevance']:
+        sort_by = 'published_at'
+    if order not in ['asc', 'desc']:
+        order = 'desc'
+    try:
+        start_ts, end_ts = date_range(start_date, end_date)
+    except ValueError:
+        return jsonify({'error': 'Invalid start_date or end_date'}), 400
+    
+    top_level, fts = comment_filters(video_id, search, min_likes, start_ts, end_ts, has_replies)
+    replies, _ = comment_filters(video_id, search, min_likes, start_ts, end_ts, has_replies)
+    replies.join("JOIN comments r ON r.video_id = c.video_id AND r.parent_comment_id = c.comment_id")
+    if sort_by == 'relevance' and fts is None:
+        sort_by = 'published_at'
+    if sort_by == 'relevance':
+        thread_key, thread_order = fts['rank'], 'ASC'
+    else:
+        thread_key, thread_order = f"c.{sort_column(sort_by)}", order.upper()
+    
+    # Top-level comments and their replies in one ordered result: each reply
+    # carries its parent's sort key, so threads stay together
+    top_columns = ', '.join(f"c.{column}" for column in STREAM_COLUMNS)
+    reply_columns = ', '.join(f"r.{column}" for column in STREAM_COLUMNS)
+    top_level_sql, top_level_params = top_level.from_where()
+    replies_sql, replies_params = replies.from_where()
+    query = adapt_query(f"""
+        SELECT {top_columns}, {thread_key} AS thread_key, c.comment_id AS thread_id, 0 AS thread_pos
+        {top_level_sql}
+        UNION ALL
+        SELECT {reply_columns}, {thread_key}, c.comment_id, 1
+        {replies_sql}
+        ORDER BY thread_key {thread_order}, thread_id {thread_order}, thread_pos, published_ts, comment_id
+    """)
+    params = top_level_params + replies_params
+    
+    def generate():
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+        batches = iter_row_batches(db, query, params)
+        try:
+            for rows in batches:
+                lines = []
+                for row in rows:
+                    comment = dict(zip(STREAM_COLUMNS, row))
+                    comment['like_count'] = int(comment['like_count']) if comment['like_count'] else 0
+                    format_published(comment)
+                    lines.append(serialization.dumpb(comment))
+                lines.append(b'')
+                chunk = b'\n'.join(lines)
+                if compressor:
+                    # Sync flush so the client can decode each batch as it arrives
+                    chunk = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+                yield chunk
+            if compressor:
+                yield compressor.flush()
+        except Exception as e:
+            # Headers are already sent; the truncated stream signals the failure
+            logger.error(f"❌ Error streaming comments for video {video_id}: {e}")
+        finally:
+            batches.close()
+    
+    response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    if compress:
+        response.headers['Content-Encoding'] = 'gzip'
+    response.headers['Vary'] = 'Accept-Encoding'
+    # Tell reverse proxies not to buffer the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+# Request threads per worker under gunicorn; gunicorn.conf.py exports it, so
+# it is unset when the app runs on Flask's own server
+GUNICORN_THREADS = int(os.environ['GUNICORN_THREADS']) if os.environ.get('GUNICORN_THREADS') else None
+# Flask's threaded server starts a thread per request, so streams there only
+# need a bound on how many feeds poll the database at once
+DEV_SERVER_EVENT_STREAMS = 32
+
+# Server-sent event streams each worker serves at once, in two separate
+# pools so viewers following live comments can never take the slots the
+# export dialog needs. Under gunicorn every open stream holds one of the
+# worker's request threads, so by default each pool gets one thread (live
+# feeds a quarter of the threads) and together they never get all of them:
+# at least one thread is always left for ordinary requests. Refused streams
+# get a 503; the export dialog then polls and the live feed stays off
+if GUNICORN_THREADS is None:
+    EXPORT_EVENT_STREAMS = max(0, int(os.environ.get('EXPORT_EVENT_STREAMS', DEV_SERVER_EVENT_STREAMS)))
+    LIVE_EVENT_STREAMS = max(0, int(os.environ.get('LIVE_EVENT_STREAMS', DEV_SERVER_EVENT_STREAMS)))
+else:
+    EXPORT_EVENT_STREAMS = max(0, min(int(os.environ.get('EXPORT_EVENT_STREAMS', 1)), GUNICORN_THREADS - 1))
+    LIVE_EVENT_STREAMS = max(0, min(int(os.environ.get('LIVE_EVENT_STREAMS', max(1, GUNICORN_THREADS // 4))),
+                                    GUNICORN_THREADS - 1 - EXPORT_EVENT_STREAMS))
+# Seconds between keepalive comments on an idle stream
+EVENT_HEARTBEAT = 15.0
+# Streams end after this many seconds; EventSource reconnects with Last-Event-ID
+EVENT_STREAM_MAX_AGE = float(os.environ.get('EVENT_STREAM_MAX_AGE', 300))
+
+SSE_KEEPALIVE = b": keepalive\n\n"
+
+_export_stream_slots = threading.BoundedSemaphore(EXPORT_EVENT_STREAMS)
+_live_stream_slots = threading.BoundedSemaphore(LIVE_EVENT_STREAMS)
+
+def sse_event(event, data, event_id=None):
+    """Encode one server-sent event"""
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {serialization.dumps(data)}")
+    return ('\n'.join(lines) + '\n\n').encode('utf-8')
+
+def event_stream(generate, slots):
+    """Serve a generator of encoded events as a text/event-stream response.
+    
+    Takes one of the given pool's slots for as long as the stream is open,
+    answering 503 when none is free.
+    """
+    if not slots.acquire(blocking=False):
+        response = jsonify({'error': 'Too many open event streams; try again shortly'})
+        response.status_code = 503
+        response.headers['Retry-After'] = '5'
+        return response
+    
+    def events():
+        # Reconnect after 2 seconds if the connection drops
+        yield b"retry: 2000\n\n"
+        yield from generate()
+    
+    response = Response(events(), mimetype='text/event-stream')
+    # Released when the server closes the response, however the stream ended
+    response.call_on_close(slots.release)
+    response.headers['Cache-Control'] = 'no-store'
+    # Tell reverse proxies not to buffer the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+# Seconds between checks for new comments on a live feed
+LIVE_POLL_INTERVAL = 2.0
+
+# Log entries read per query on a live feed
+LIVE_BATCH_SIZE = 100
+
+def live_comment_events(video_id, seq, version):
+    """Encoded 'comment' events for a video's comments logged after seq.
+    
+    Returns (events, last seq, data version). The log is only read when
+    the data version has moved since the previous call, so an idle feed
+    costs one single-row read per check. A pooled connection is held only
+    while reading, not while the events are written out.
+    """
+    events = []
+    pool = get_db_pool()
+    db = pool.getconn()
+    cursor = db.cursor()
+    try:
+        current = data_version.get_data_version(cursor, DB_DIALECT)
+        if current is not None and current == version:
+            return events, seq, version
+        while True:
+            entries = change_log.entries_after(cursor, video_id, seq, LIVE_BATCH_SIZE, DB_DIALECT)
+            comments = fetch_comment_data(cursor, [comment_id for _, comment_id in entries])
+            for entry_seq, comment_id in entries:
+                if comment_id in comments:
+                    events.append(sse_event('comment', comments[comment_id], entry_seq))
+            if entries:
+                seq = entries[-1][0]
+            if len(entries) < LIVE_BATCH_SIZE:
+                break
+        return events, seq, current
+    finally:
+        cursor.close()
+        pool.putconn(db)
+
+@bp.route('/api/videos/<video_id>/live')
+def live_comments(video_id):
+    """Push a video's newly stored comments as server-sent events.
+    
+    Tails the comment log from ?since=<seq>, or from the Last-Event-ID a
+    reconnecting EventSource sends; without either, from the newest entry,
+    so only comments stored from now on are sent. The stream opens with a
+    'ready' event carrying the starting seq, then sends a 'comment' event
+    per new comment, with the log seq as its ID, and keepalive comments
+    while idle.
+    """
+    since = request.headers.get('Last-Event-ID') or request.args.get('since', '')
+    db = get_db()
+    if db is None:
+        return jsonify({'error': 'Database connection failed'}), 500
+    try:
+        if since.strip():
+            seq = int(since)
+        else:
+            cursor = db.cursor()
+            seq = change_log.latest_seq(cursor, video_id, DB_DIALECT)
+            cursor.close()
+    except ValueError:
+        return jsonify({'error': 'since must be a comment log sequence number'}), 400
+    except Exception as e:
+        logger.error(f"❌ Error opening live feed for video {video_id}: {e}")
+        return jsonify({'error': 'Live feed unavailable'}), 500
+    
+    def generate():
+        last_seq, version = seq, None
+        deadline = time.monotonic() + EVENT_STREAM_MAX_AGE
+        idle_since = time.monotonic()
+        yield sse_event('ready', {'video_id': video_id, 'seq': last_seq}, last_seq)
+        while time.monotonic() < deadline:
+            try:
+                events, last_seq, version = live_comment_events(video_id, last_seq, version)
+            except Exception as e:
+                logger.error(f"❌ Error reading live feed for video {video_id}: {e}")
+                yield sse_event('error', {'error': 'Live feed interrupted'})
+                return
+            if events:
+                yield b''.join(events)
+                idle_since = time.monotonic()
+            elif time.monotonic() - idle_since >= EVENT_HEARTBEAT:
+                yield SSE_KEEPALIVE
+                idle_since = time.monotonic()
+            time.sleep(LIVE_POLL_INTERVAL)
+    
+    return event_stream(generate, _live_stream_slots)
+
+def rollup_stats(db, scope):
+    """Get materialized statistics for a scope without writing anything.
+    
+    Rollups are refreshed by the writers after each ingest; see
+    analytics.refresh_rollups. A video's rollup stays fresh until that
+    video's comments change (analytics.scope_version). A stale rollup is
+    served as it is and flagged, rather than rescanned on a request thread.
+    Only a scope with no rollup at all, e.g. before the first refresh or in
+    a read-only bundle, is computed here, and the result is kept in the
+    query cache until the next write.
+    
+    Returns:
+        Dict with 'stats', 'stale' and 'refreshed_at' (None if computed here)
+    """
+    dialect = DB_DIALECT
+    version = current_data_version()
+    cursor = db.cursor()
+    try:
+        rollup = analytics.get_rollup(cursor, scope, dialect)
+        if rollup is not None:
+            if CHANGE_SEQ_ENABLED or scope == analytics.CHANNEL_SCOPE:
+                current = analytics.scope_version(cursor, scope, dialect)
+            else:
+                current = version[0] if version else None
+            return {
+                'stats': rollup['stats'],
+                'stale': current is None or rollup['data_version'] != current,
+                'refreshed_at': rollup['refreshed_at']
+            }
+        
+        key = ('rollup', scope)
+        stats = QUERY_CACHE.get(key, version[0]) if version is not None else MISSING
+        if stats is MISSING:
+            stats = analytics.compute_comment_stats(
+                analytics.fetch_columns(cursor, None if scope == analytics.CHANNEL_SCOPE else scope, dialect)
+            )
+            if version is not None:
+                QUERY_CACHE.put(key, version[0], stats)
+        return {'stats': stats, 'stale': False, 'refreshed_at': None}
+    finally:
+        cursor.close()
+
+@bp.route('/api/videos/<video_id>/stats')
+@conditional_get
+@coalesced
+def get_video_stats(video_id):
+    """Get comment histograms, like distribution and top authors for a video.
+    
+    Served from the stored rollup; 'stale' is set when comments have changed
+    since the writers last refreshed it.
+    """
+    try:
+        db = get_db()
+        if db is None:
+            return jsonify({'error': 'Database connection failed'}), 500
+        
+        cursor = db.cursor()
+        title = cached_scalar(cursor, adapt_query("SELECT title FROM videos WHERE video_id = ?"), [video_id])
+        if title is None:
+            return jsonify({'error': 'Video not found'}), 404
+        
+        return jsonify({'video_id': video_id, 'video_title': title, **rollup_stats(db, video_id)})
+        
+    except Exception as e:
+        logger.error(f"❌ Error fetching stats for video {video_id}: {e}")
+        return jsonify({'error': 'Failed to fetch video stats'}), 500
+
+@bp.route('/api/videos/<video_id>/facets')
+@conditional_get
+@coalesced
+def get_comment_facets(video_id):
+    """Get filter-panel counts for a video's top-level comments.
+    
+    Takes the same search and filter parameters as get_comments. One
+    grouped query applies the search and marks which groups pass each
+    remaining filter, so every facet can leave its own filter out; see
+    analytics.combine_facets.
+    """
+    try:
+        db = get_db()
+        if db is None:
+            return jsonify({'error': 'Database connection failed'}), 500
+        
+        cursor = db.cursor()
+        search = request.args.get('search', '').strip()
+        min_likes = request.args.get('min_likes', 0, type=int)
+        has_replies = request.args.get('has_replies', '').lower() in ('1', 'true', 'yes')
+        try:
+            start_ts, end_ts = date_range(request.args.get('start_date', ''), request.args.get('end_date', ''))
+        except ValueError:
+            return jsonify({'error': 'Invalid start_date or end_date'}), 400
+        
+        query, _ = comment_filters(video_id, search, 0, None, None)
+        from_where, filter_params = query.from_where()
+        
+        date_conditions, date_params = [], []
+        if start_ts is not None:
+            date_conditions.append("c.published_ts >= ?")
+            date_params.append(start_ts)
+        if end_ts is not None:
+            date_conditions.append("c.published_ts <= ?")
+            date_params.append(end_ts)
+        dates_ok = f"CASE WHEN {' AND '.join(date_conditions)} THEN 1 ELSE 0 END" if date_conditions else "1"
+        
+        facet_query = adapt_query(f"""
+            SELECT {timestamps.month_sql('c.published_ts', DB_DIALECT)} AS month,
+                   {analytics.like_bucket_sql('c.like_count')} AS bucket,
+                   CASE WHEN c.reply_count > 0 THEN 1 ELSE 0 END AS has_replies,
+                   CASE WHEN c.channel_owner_liked THEN 1 ELSE 0 END AS hearted,
+                   CASE WHEN COALESCE(c.like_count, 0) >= ? THEN 1 ELSE 0 END AS likes_ok,
+                   {dates_ok} AS dates_ok,
+                   COUNT(*) AS comments,
+                   SUM(c.reply_count) AS replies
+            {from_where}
+            GROUP BY 1, 2, 3, 4, 5, 6
+        """)
+        groups = cached_fetchall(cursor, facet_query, [min_likes] + date_params + filter_params)
+        for group in groups:
+            group['replies_ok'] = group['has_replies'] or not has_replies
+        
+        return jsonify({
+            'video_id': video_id,
+            'facets': analytics.combine_facets(groups),
+            'filters': {
+                'search': search,
+                'min_likes': min_likes,
+                'start_date': timestamps.format_epoch(start_ts),
+                'end_date': timestamps.format_epoch(end_ts),
+                'has_replies': has_replies
+            }
+        })
+        
+    except Exception as e:
+        logger.error(f"❌ Error fetching facets for video {video_id}: {e}")
+        return jsonify({'error': 'Failed to fetch facets'}), 500
+
+@bp.route('/api/stats')
+@conditional_get
+@coalesced
+def get_channel_stats():
+    """Get comment histograms, like distribution and top authors across all videos, as for one video"""
+    try:
+        db = get_db()
+        if db is None:
+            return jsonify({'error': 'Database connection failed'}), 500
+        
+        return jsonify(rollup_stats(db, analytics.CHANNEL_SCOPE))
+        
+    except Exception as e:
+        logger.error(f"❌ Error fetching channel stats: {e}")
+        return jsonify({'error': 'Failed to fetch stats'}), 500
+
+@bp.route('/api/videos/<video_id>')
+@conditional_get
+def get_video(video_id):
+    """Get details for a specific video"""
+    try:
+        db = get_db()
+        if db is None:
+            return jsonify({'error': 'Database connection failed'}), 500
+        
+        cursor = db.cursor()
+        
+        query = """
+            SELECT video_id, title, description, published_at, published_ts, duration, 
+                   view_count, like_count, comment_count, tags, category_id,
+                   channel_title, thumbnail_url, language
+            FROM videos 
+            WHERE video_id = ?
+        """
+        query = adapt_query(query)
+        cursor.execute(query, [video_id])
+        
+        row = cursor.fetchone()
+        if not row:
+            return jsonify({'error': 'Video not found'}), 404
+        
+        video = format_published(dict_from_row(row, cursor))
+        
+        # Format numbers
+        for field in ['view_count', 'like_count', 'comment_count']:
+            if video.get(field) is not None:
+                video[field] = int(video[field]) if video[field] else 0
+        
+        return jsonify(video)
+        
+    except Exception as e:
+        logger.error(f"❌ Error fetching video {video_id}: {e}")
+        return jsonify({'error': 'Failed to fetch video'}), 500
+
+@bp.route('/api/videos/comment-data/<comment_id>')
+@conditional_get
+def get_comment_data(comment_id):
+    """Get comment data for export (including video info)"""
+    try:
+        db = get_db()
+        if db is None:
+            return jsonify({'error': 'Database connection failed'}), 500
+        
+        cursor = db.cursor()
+        
+        # Get comment with video info
+        query = """
+            SELECT c.comment_id, c.video_id, c.parent_comment_id, c.author, c.text,
+                   c.published_at, c.published_ts, c.updated_at, c.like_count, c.is_reply, c.channel_owner_liked,
+                   v.title as video_title, v.channel_title
+            FROM comments c
+            JOIN videos v ON c.video_id = v.video_id
+            WHERE c.comment_id = ?
+        """
+        query = adapt_query(query)
+        cursor.execute(query, [comment_id])
+        
+        row = cursor.fetchone()
+        if not row:
             return jsonify({'error': 'Comment not found'}), 404
         
-        comment = dict_from_row(row, cursor)
+        comment = format_published(dict_from_row(row, cursor))
         comment['like_count'] = int(comment['like_count']) if comment['like_count'] else 0
         
         return jsonify(comment)
@@ -545,7 +1634,667 @@ def get_comment_data(comment_id):
         logger.error(f"❌ Error fetching comment {comment_id}: {e}")
         return jsonify({'error': 'Failed to fetch comment'}), 500
 
-# Utility functions
+# Most comment IDs one batch request may ask for
+COMMENT_BATCH_MAX = 5000
+
+# Same columns as /api/videos/comment-data, so batch rows are drop-in replacements
+COMMENT_DATA_COLUMNS = [
+    'c.comment_id', 'c.video_id', 'c.parent_comment_id', 'c.author', 'c.text',
+    'c.published_at', 'c.published_ts', 'c.updated_at', 'c.like_count', 'c.is_reply', 'c.channel_owner_liked',
+    'v.title AS video_title', 'v.channel_title'
+]
+
+def fetch_comment_data(cursor, comment_ids):
+    """Look up comment_data rows for many comment IDs, keyed by comment ID.
+    
+    Postgres looks them all up with one = ANY(...) query; SQLite uses
+    IN (...) lists of IN_BATCH_SIZE IDs.
+    """
+    # Postgres takes the whole list as one array parameter
+    batch_size = max(len(comment_ids), 1) if USE_POSTGRES else IN_BATCH_SIZE
+    
+    found = {}
+    for batch in batched(comment_ids, batch_size):
+        query = SelectQuery(DB_DIALECT, "FROM comments c JOIN videos v ON c.video_id = v.video_id",
+                            COMMENT_DATA_COLUMNS)
+        if USE_POSTGRES:
+            query.where("c.comment_id = ANY(?)", [batch])
+        else:
+            query.where(f"c.comment_id IN ({', '.join(['?'] * len(batch))})", batch)
+        compiled, params = query.rows()
+        cursor.execute(compiled.rows_sql, params)
+        for row in compiled.to_dicts(cursor.fetchall()):
+            row['like_count'] = int(row['like_count']) if row['like_count'] else 0
+            found[row['comment_id']] = format_published(row)
+    return found
+
+@bp.route('/api/comments/batch', methods=['POST'])
+def get_comment_batch():
+    """Get export data for many comments in one request.
+    
+    Takes a JSON body {"comment_ids": [...]} and returns the rows in request
+    order, each ID once, plus the IDs that matched no comment.
+    """
+    try:
+        body = request.get_json(silent=True) or {}
+        comment_ids = body.get('comment_ids') if isinstance(body, dict) else None
+        if not isinstance(comment_ids, list) or not all(isinstance(i, str) for i in comment_ids):
+            return jsonify({'error': 'comment_ids must be a list of strings'}), 400
+        if len(comment_ids) > COMMENT_BATCH_MAX:
+            return jsonify({'error': f'At most {COMMENT_BATCH_MAX} comment_ids per request'}), 400
+        
+        db = get_db()
+        if db is None:
+            return jsonify({'error': 'Database connection failed'}), 500
+        
+        cursor = db.cursor()
+        requested = list(dict.fromkeys(comment_ids))
+        found = fetch_comment_data(cursor, requested)
+        
+        return jsonify({
+            'comments': [found[i] for i in requested if i in found],
+            'missing': [i for i in requested if i not in found],
+            'requested': len(requested)
+        })
+        
+    except Exception as e:
+        logger.error(f"❌ Error fetching comment batch: {e}")
+        return jsonify({'error': 'Failed to fetch comments'}), 500
+
+# Changed comments per changes page by default, and at most
+CHANGES_PAGE_SIZE = 500
+CHANGES_PAGE_MAX = COMMENT_BATCH_MAX
+
+def encode_sync_token(video_id, seq):
+    """Encode a video's highest seen change_seq as an opaque sync token"""
+    payload = json.dumps({'v': video_id, 'c': seq})
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_sync_token(token, video_id):
+    """Decode a sync token, returning its change_seq or None if invalid.
+    
+    A token is only valid for the video it was issued for.
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if payload.get('v') != video_id:
+            return None
+        return int(payload['c'])
+    except (ValueError, TypeError, KeyError, AttributeError, binascii.Error):
+        return None
+
+@bp.route('/api/videos/<video_id>/comments/changes')
+@conditional_get
+def get_comment_changes(video_id):
+    """Get a video's comments inserted or edited since a sync token.
+    
+    Without ?since= every comment of the video is returned, in pages. Rows
+    come in change order with the same fields as /api/comments/batch; a
+    comment edited more than once appears once, in its latest state. Pass
+    the returned token as ?since= on the next call, right away while
+    has_more is true, to continue.
+    """
+    try:
+        since = request.args.get('since', '').strip()
+        limit = max(1, min(request.args.get('limit', CHANGES_PAGE_SIZE, type=int), CHANGES_PAGE_MAX))
+        seq = 0
+        if since:
+            seq = decode_sync_token(since, video_id)
+            if seq is None:
+                return jsonify({'error': 'Invalid sync token'}), 400
+        
+        db = get_db()
+        if db is None:
+            return jsonify({'error': 'Database connection failed'}), 500
+        
+        cursor = db.cursor()
+        # video_id equality plus ORDER BY change_seq is a range scan of
+        # the (video_id, change_seq) index
+        query = SelectQuery(DB_DIALECT, "FROM comments c JOIN videos v ON c.video_id = v.video_id",
+                            COMMENT_DATA_COLUMNS + ['c.change_seq'])
+        query.where("c.video_id = ?", [video_id])
+        query.where("c.change_seq > ?", [seq])
+        query.order_by("c.change_seq")
+        compiled, params = query.rows(limit=limit + 1)
+        rows = cached_fetchall(cursor, compiled.rows_sql, params, compiled.columns)
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        
+        changes = []
+        for row in rows:
+            row['like_count'] = int(row['like_count']) if row['like_count'] else 0
+            changes.append(format_published(row))
+        if changes:
+            seq = changes[-1]['change_seq']
+        
+        return jsonify({
+            'video_id': video_id,
+            'changes': changes,
+            'token': encode_sync_token(video_id, seq),
+            'has_more': has_more
+        })
+        
+    except Exception as e:
+        logger.error(f"❌ Error fetching comment changes for video {video_id}: {e}")
+        return jsonify({'error': 'Failed to fetch comment changes'}), 500
+
+# Upper bound on per_page/limit for the author endpoints
+AUTHOR_PAGE_MAX = 100
+
+def find_authors(cursor, name, limit):
+    """Look up authors by name, best match first, each with a 'similarity' score.
+    
+    Names containing the text always match, whichever backend serves the
+    lookup. With the trigram index, names merely similar to the text
+    (typos, emoji) follow them. Each group is ranked by similarity; a short
+    text scores low against a long name it is part of, so substring hits
+    can't be left to the similarity threshold.
+    """
+    condition, params = substring_filter('authors', 'a', 'author', name)
+    query = adapt_query(
+        f"SELECT {', '.join('a.' + column for column in author_stats.AUTHOR_COLUMNS)} FROM authors a "
+        f"WHERE {condition} ORDER BY a.comment_count DESC, a.author ASC LIMIT ?"
+    )
+    authors = cached_fetchall(cursor, query, params + [limit], author_stats.AUTHOR_COLUMNS)
+    for author in authors:
+        author['similarity'] = trigram.similarity(name, author['author'])
+    authors.sort(key=lambda author: -author['similarity'])
+    if TRIGRAM_ENABLED and len(authors) < limit:
+        found = {author['author'] for author in authors}
+        similar = trigram.find_similar(cursor, 'authors', name, author_stats.AUTHOR_COLUMNS, DB_DIALECT, limit)
+        authors += [author for author in similar if author['author'] not in found][:limit - len(authors)]
+    return {
+        'authors': authors,
+        'query': name,
+        'limit': limit,
+        'search_mode': 'trigram' if TRIGRAM_ENABLED else 'like'
+    }
+
+@bp.route('/api/authors')
+@conditional_get
+@coalesced
+def get_author_leaderboard():
+    """Get the top authors across all videos, read from the authors table.
+    
+    With ?q=name, returns the authors whose names are most similar to name
+    instead, so a lookup still finds them despite typos or emoji in the
+    display name.
+    """
+    try:
+        db = get_db()
+        if db is None:
+            return jsonify({'error': 'Database connection failed'}), 500
+        
+        cursor = db.cursor()
+        sort_by = request.args.get('sort', 'comments')
+        limit = max(1, min(request.args.get('limit', 25, type=int), AUTHOR_PAGE_MAX))
+        name = request.args.get('q', '').strip()
+        if name:
+            return jsonify(find_authors(cursor, name, limit))
+        if sort_by not in author_stats.LEADERBOARDS:
+            sort_by = 'comments'
+        
+        column = author_stats.LEADERBOARDS[sort_by]
+        query = adapt_query(
+            f"SELECT {', '.join(author_stats.AUTHOR_COLUMNS)} FROM authors "
+            f"ORDER BY {column} DESC, author ASC LIMIT ?"
+        )
+        authors = cached_fetchall(cursor, query, [limit], author_stats.AUTHOR_COLUMNS)
+        
+        return jsonify({
+            'authors': authors,
+            'sort': sort_by,
+            'limit': limit,
+            'leaderboards': list(author_stats.LEADERBOARDS)
+        })
+        
+    except Exception as e:
+        logger.error(f"❌ Error fetching author leaderboard: {e}")
+        return jsonify({'error': 'Failed to fetch authors'}), 500
+
+@bp.route('/api/authors/<path:author>')
+@conditional_get
+@coalesced
+def get_author_profile(author):
+    """Get an author's totals and their comments across all videos, newest first.
+    
+    Comment pages are chained with next_cursor and served by the
+    (author, published_ts) index. The per-video breakdown is only included
+    on the first page.
+    """
+    try:
+        db = get_db()
+        if db is None:
+            return jsonify({'error': 'Database connection failed'}), 500
+        
+        cursor = db.cursor()
+        per_page = max(1, min(request.args.get('per_page', 50, type=int), AUTHOR_PAGE_MAX))
+        page_cursor = request.args.get('cursor', '').strip()
+        
+        profile = author_stats.get_author(cursor, author, DB_DIALECT)
+        if profile is None:
+            return jsonify({'error': 'Author not found'}), 404
+        
+        query = SelectQuery(DB_DIALECT, "FROM comments c", [
+            'c.comment_id', 'c.video_id', 'c.parent_comment_id', 'c.author', 'c.text',
+            'c.published_at', 'c.published_ts', 'c.updated_at', 'c.like_count', 'c.is_reply', 'c.channel_owner_liked',
+            'v.title AS video_title'
+        ])
+        query.join("LEFT JOIN videos v ON v.video_id = c.video_id")
+        query.where("c.author = ?", [author])
+        if page_cursor:
+            after = decode_cursor(page_cursor, 'published_ts', 'desc')
+            if after is None:
+                return jsonify({'error': 'Invalid cursor'}), 400
+            query.seek(keyset_clause(sort_key('c', 'published_ts'), 'desc', 'c.comment_id'),
+                       [after[0], after[0], after[1]])
+        query.order_by(f"{sort_key('c', 'published_ts')} DESC, c.comment_id DESC")
+        
+        compiled, params = query.rows(limit=per_page + 1)
+        comments = cached_fetchall(cursor, compiled.rows_sql, params, compiled.columns)
+        has_more = len(comments) > per_page
+        comments = comments[:per_page]
+        for comment in comments:
+            comment['like_count'] = int(comment['like_count']) if comment['like_count'] else 0
+            format_published(comment)
+        
+        next_cursor = None
+        if has_more:
+            last = comments[-1]
+            next_cursor = encode_cursor('published_ts', 'desc', sort_value(last, 'published_ts'), last['comment_id'])
+        
+        videos = None
+        if not page_cursor:
+            videos_query = adapt_query("""
+                SELECT c.video_id, v.title AS video_title, COUNT(*) AS comments,
+                       COALESCE(SUM(c.like_count), 0) AS likes, MAX(c.published_ts) AS last_seen_ts
+                FROM comments c
+                LEFT JOIN videos v ON v.video_id = c.video_id
+                WHERE c.author = ?
+                GROUP BY c.video_id, v.title
+                ORDER BY comments DESC, last_seen_ts DESC
+            """)
+            videos = cached_fetchall(cursor, videos_query, [author])
+            for video in videos:
+                video['last_seen_at'] = timestamps.format_epoch(video['last_seen_ts'])
+        
+        return jsonify({
+            'author': profile,
+            'videos': videos,
+            'comments': comments,
+            'pagination': {
+                'per_page': per_page,
+                'has_next': has_more,
+                'cursor': page_cursor or None,
+                'next_cursor': next_cursor
+            }
+        })
+        
+    except Exception as e:
+        logger.error(f"❌ Error fetching author {author}: {e}")
+        return jsonify({'error': 'Failed to fetch author'}), 500
+
+@bp.route('/api/search')
+@conditional_get
+@coalesced
+def search_all_comments():
+    """Search comments across all videos, ranked by relevance"""
+    try:
+        db = get_db()
+        if db is None:
+            return jsonify({'error': 'Database connection failed'}), 500
+        
+        cursor = db.cursor()
+        
+        query_text = request.args.get('q', '').strip()
+        page = max(1, request.args.get('page', 1, type=int))
+        per_page = min(max(1, request.args.get('per_page', 50, type=int)), 200)
+        video_filter = request.args.get('video_id', '').strip()
+        sort_by = request.args.get('sort', 'relevance')
+        
+        if not query_text:
+            return jsonify({'error': 'Missing search query parameter q'}), 400
+        
+        valid_sorts = ['relevance', 'published_at', 'like_count']
+        if sort_by not in valid_sorts:
+            sort_by = 'relevance'
+        
+        fts = search_clause('comments', 'c', query_text)
+        
+        query = SelectQuery(DB_DIALECT, "FROM comments c", [
+            'c.comment_id', 'c.video_id', 'c.parent_comment_id', 'c.author', 'c.text',
+            'c.published_at', 'c.published_ts', 'c.like_count', 'c.is_reply', 'c.channel_owner_liked',
+            'v.title AS video_title'
+        ])
+        
+        if fts:
+            query.select(f"{fts['snippet']} AS snippet")
+            query.join(fts['join'], fts['join_params'])
+            query.where(fts['where'], fts['where_params'])
+        else:
+            # Fallback for terms the index can't serve (e.g. emoji-only searches)
+            query.where("(c.text LIKE ? OR c.author LIKE ?)", [f'%{query_text}%', f'%{query_text}%'])
+            if sort_by == 'relevance':
+                sort_by = 'published_at'
+        
+        query.join("JOIN videos v ON c.video_id = v.video_id")
+        
+        if video_filter:
+            query.where("c.video_id = ?", [video_filter])
+        
+        if sort_by == 'relevance':
+            query.order_by(f"{fts['rank']}, c.comment_id")
+        else:
+            query.order_by(f"c.{sort_column(sort_by)} DESC, c.comment_id DESC")
+        
+        total_count = cached_scalar(cursor, query.compile().count_sql, query.filter_params())
+        
+        compiled, params = query.rows(limit=per_page, offset=(page - 1) * per_page)
+        rows = cached_fetchall(cursor, compiled.rows_sql, params, compiled.columns)
+        
+        results = []
+        for result in rows:
+            result['like_count'] = int(result['like_count']) if result['like_count'] else 0
+            if fts:
+                result['snippet'] = fulltext.highlight_snippet(result['snippet'])
+            results.append(format_published(result))
+        
+        total_pages = (total_count + per_page - 1) // per_page
+        
+        return jsonify({
+            'results': results,
+            'query': query_text,
+            'search_mode': 'fulltext' if fts else 'like',
+            'pagination': {
+                'page': page,
+                'per_page': per_page,
+                'total': total_count,
+                'pages': total_pages,
+                'has_prev': page > 1,
+                'has_next': page < total_pages
+            },
+            'filters': {
+                'video_id': video_filter,
+                'sort': sort_by
+            }
+        })
+        
+    except Exception as e:
+        logger.error(f"❌ Error searching comments: {e}")
+        return jsonify({'error': 'Failed to search comments'}), 500
+
+# Server-side export jobs; the job table is shared by all workers on the host
+EXPORT_DIR = os.environ.get('EXPORT_DIR') or str(
+    Path(tempfile.gettempdir()) / "temp_exports" if USE_POSTGRES else BASE_DIR / "temp_exports"
+)
+EXPORT_WORKERS = int(os.environ.get('EXPORT_WORKERS', 2))
+EXPORT_MAX_ACTIVE = int(os.environ.get('EXPORT_MAX_ACTIVE', 4))
+EXPORT_KEEP_HOURS = float(os.environ.get('EXPORT_KEEP_HOURS', 24))
+
+EXPORT_COLUMNS = ['comment_id', 'author', 'text', 'published_at', 'published_ts', 'like_count', 'channel_owner_liked']
+
+_export_runner = None
+_export_service = None
+_export_lock = threading.Lock()
+
+def get_export_runner():
+    """Get this worker's export runner and card renderer, creating them on first use"""
+    global _export_runner, _export_service
+    if _export_runner is None:
+        with _export_lock:
+            if _export_runner is None:
+                _export_service = ExportService(None if USE_POSTGRES else DB_PATH, EXPORT_DIR)
+                store = ExportJobStore(os.environ.get('EXPORT_JOBS_DB') or str(Path(EXPORT_DIR) / "export_jobs.db"))
+                _export_runner = ExportRunner(
+                    store, EXPORT_DIR,
+                    max_workers=EXPORT_WORKERS,
+                    max_active=EXPORT_MAX_ACTIVE,
+                    keep_for=EXPORT_KEEP_HOURS * 3600
+                )
+    return _export_runner
+
+def reset_export_runner():
+    """Forget an export runner inherited across fork; its threads didn't survive"""
+    global _export_runner, _export_service
+    with _export_lock:
+        _export_runner = None
+        _export_service = None
+
+def export_comment_rows(db, video_id):
+    """Yield a video's comments for export, newest first, without loading them all"""
+    query = adapt_query(f"""
+        SELECT {', '.join(EXPORT_COLUMNS)}
+        FROM comments
+        WHERE video_id = ?
+        ORDER BY published_ts DESC, comment_id DESC
+    """)
+    for rows in iter_row_batches(db, query, [video_id]):
+        for row in rows:
+            comment = dict(zip(EXPORT_COLUMNS, row))
+            comment['like_count'] = int(comment['like_count']) if comment['like_count'] else 0
+            yield comment
+
+def export_comment_count(db, video_id):
+    """Number of comments a video export will contain, for progress reporting"""
+    cursor = db.cursor()
+    try:
+        stats = video_stats.get_video_stats(cursor, video_id, DB_DIALECT)
+        if stats is not None:
+            return int(stats['top_level_count']) + int(stats['reply_count'])
+        cursor.execute(adapt_query("SELECT COUNT(*) FROM comments WHERE video_id = ?"), [video_id])
+        return cursor.fetchone()[0]
+    finally:
+        cursor.close()
+
+def run_video_export(params, output_path, report):
+    """Export job: one video's comment cards in a ZIP file"""
+    pool = get_db_pool()
+    db = pool.getconn()
+    try:
+        total = export_comment_count(db, params['video_id'])
+        report(0, total, f"Processing {total} comments")
+        # Close the row generator before the connection goes back to the pool,
+        # so a cancelled or failed job can't leave its cursor open on it
+        with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as zipf, \
+                contextlib.closing(export_comment_rows(db, params['video_id'])) as rows:
+            _export_service.add_comment_cards(
+                zipf, rows, params['video_title'],
+                on_progress=lambda done: report(done, total, f"Creating card {done}/{total}")
+            )
+        report(total, total, "Export complete")
+        return output_path
+    finally:
+        pool.putconn(db)
+
+def run_channel_export(params, output_path, report):
+    """Export job: every video's comment cards in one ZIP, a folder per video"""
+    pool = get_db_pool()
+    db = pool.getconn()
+    try:
+        cursor = db.cursor()
+        cursor.execute("SELECT video_id, title FROM videos ORDER BY published_ts DESC, video_id DESC")
+        videos = [(row[0], row[1] or row[0]) for row in cursor.fetchall()]
+        cursor.close()
+        counts = [export_comment_count(db, video_id) for video_id, _ in videos]
+        total = sum(counts)
+        
+        done_before = 0
+        with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+            for index, ((video_id, title), count) in enumerate(zip(videos, counts)):
+                def progress(done, index=index, title=title, count=count, done_before=done_before):
+                    report(done_before + done, total, f"Creating card {done}/{count}", {
+                        'video_progress': index,
+                        'video_total': len(videos),
+                        'current_video': title,
+                        'comment_progress': done,
+                        'comment_total': count,
+                        'overall_percent': round((done_before + done) * 100 / total, 1) if total else 100
+                    })
+                progress(0)
+                folder = f"{index + 1:03d}_{_export_service.sanitize_filename(title, 40)}"
+                with contextlib.closing(export_comment_rows(db, video_id)) as rows:
+                    _export_service.add_comment_cards(zipf, rows, title, folder, on_progress=progress)
+                done_before += count
+        report(total, total, "Export complete", {
+            'video_progress': len(videos), 'video_total': len(videos),
+            'current_video': '', 'comment_progress': 0, 'comment_total': 0, 'overall_percent': 100
+        })
+        return output_path
+    finally:
+        pool.putconn(db)
+
+def export_job_response(job):
+    """Public view of a job: no server paths, plus the download URL once ready"""
+    job = {key: value for key, value in job.items() if key not in ('output_path', 'owner_pid')}
+    job['task_id'] = job['job_id']
+    job['download_url'] = f"/api/export/download/{job['job_id']}" if job['status'] == COMPLETED else None
+    return job
+
+def start_export(kind, params, job, name):
+    """Queue an export job, answering 202 with its status or 429 when at the limit.
+    
+    Without a headless Chrome/Chromium the server can only write HTML cards,
+    so it answers 503 and the page renders the PNGs itself with html2canvas.
+    """
+    runner = get_export_runner()
+    if _export_service.card_format() != 'png':
+        return jsonify({
+            'error': 'PNG rendering on the server needs Chrome or Chromium; export in the browser instead',
+            'render_in_browser': True
+        }), 503
+    try:
+        timestamp = datetime.now().strftime('%Y-%m-%d %H-%M')
+        params['download_name'] = f"{_export_service.sanitize_filename(name, 30)}_CommentExport_{timestamp}.zip"
+        job_id = runner.submit(kind, params, job)
+    except ExportLimitReached as e:
+        return jsonify({'error': f'Too many exports in progress ({e}); try again shortly'}), 429
+    response = jsonify(export_job_response(runner.store.get(job_id)))
+    response.status_code = 202
+    response.headers['Location'] = f"/api/export/progress/{job_id}"
+    return response
+
+@bp.route('/api/export/videos/<video_id>', methods=['POST'])
+def export_video(video_id):
+    """Start a background export of a video's comments as a ZIP of comment cards"""
+    try:
+        db = get_db()
+        if db is None:
+            return jsonify({'error': 'Database connection failed'}), 500
+        
+        cursor = db.cursor()
+        cursor.execute(adapt_query("SELECT title FROM videos WHERE video_id = ?"), [video_id])
+        row = cursor.fetchone()
+        if not row:
+            return jsonify({'error': 'Video not found'}), 404
+        title = row[0] or video_id
+        return start_export('video', {'video_id': video_id, 'video_title': title}, run_video_export, title)
+        
+    except Exception as e:
+        logger.error(f"❌ Error starting export for video {video_id}: {e}")
+        return jsonify({'error': 'Failed to start export'}), 500
+
+@bp.route('/api/export/channel', methods=['POST'])
+def export_channel():
+    """Start a background export of every video's comments as one ZIP"""
+    try:
+        return start_export('channel', {}, run_channel_export, 'Channel')
+    except Exception as e:
+        logger.error(f"❌ Error starting channel export: {e}")
+        return jsonify({'error': 'Failed to start export'}), 500
+
+@bp.route('/api/export/progress/<task_id>')
+def export_progress(task_id):
+    """Get an export job's status and progress"""
+    job = get_export_runner().store.get(task_id)
+    if job is None:
+        return jsonify({'error': 'Export not found'}), 404
+    response = jsonify(export_job_response(job))
+    response.cache_control.no_store = True
+    return response
+
+def event_time_id(updated_at):
+    """Event ID for a job state: its update time, written so it reads back exactly.
+    
+    A rounded ID could read back below the time it stands for, and the
+    reconnected stream would send that state again.
+    """
+    return repr(float(updated_at))
+
+def parse_event_time(value):
+    """Read an export event ID back into the update time it was sent as.
+    
+    Returns None, as if no Last-Event-ID had been sent, for a missing or
+    malformed value, including nan and infinities that float() accepts:
+    compared against job update times they would hold back every progress
+    event or the final one.
+    """
+    try:
+        since = float(value)
+    except (TypeError, ValueError):
+        return None
+    return since if math.isfinite(since) else None
+
+@bp.route('/api/export/events/<task_id>')
+def export_events(task_id):
+    """Stream an export job's progress as server-sent events.
+    
+    Sends a 'progress' event each time the job's state changes and a final
+    'done' event once it completes, fails or is cancelled, with keepalive
+    comments in between. Event IDs are the job's update time, so a client
+    reconnecting with Last-Event-ID only gets states it hasn't seen. Past
+    the per-worker stream limit this answers 503 and clients poll
+    /api/export/progress instead.
+    """
+    store = get_export_runner().store
+    if store.get(task_id) is None:
+        return jsonify({'error': 'Export not found'}), 404
+    since = parse_event_time(request.headers.get('Last-Event-ID'))
+    
+    def generate():
+        seen = since
+        deadline = time.monotonic() + EVENT_STREAM_MAX_AGE
+        while time.monotonic() < deadline:
+            job = store.watch(task_id, seen, EVENT_HEARTBEAT)
+            if job is None:
+                yield sse_event('error', {'error': 'Export not found'})
+                return
+            finished = job['status'] not in ACTIVE_STATES
+            if seen is None or job['updated_at'] > seen or finished:
+                seen = job['updated_at']
+                yield sse_event('done' if finished else 'progress', export_job_response(job), event_time_id(seen))
+                if finished:
+                    return
+            else:
+                yield SSE_KEEPALIVE
+    
+    return event_stream(generate, _export_stream_slots)
+
+@bp.route('/api/export/download/<task_id>')
+def export_download(task_id):
+    """Download a finished export"""
+    job = get_export_runner().store.get(task_id)
+    if job is None:
+        return jsonify({'error': 'Export not found'}), 404
+    if job['status'] != COMPLETED:
+        return jsonify({'error': f"Export is {job['status']}"}), 409
+    if not job['output_path'] or not os.path.exists(job['output_path']):
+        return jsonify({'error': 'Export file has expired'}), 410
+    return send_file(job['output_path'], mimetype='application/zip', as_attachment=True,
+                     download_name=job['params'].get('download_name', f"export_{task_id}.zip"))
+
+@bp.route('/api/export/cancel/<task_id>', methods=['POST'])
+def export_cancel(task_id):
+    """Cancel a queued or running export; running jobs stop at their next progress update"""
+    store = get_export_runner().store
+    job = store.get(task_id)
+    if job is None:
+        return jsonify({'error': 'Export not found'}), 404
+    if job['status'] in ACTIVE_STATES:
+        store.request_cancel(task_id)
+        job = store.get(task_id)
+    return jsonify(export_job_response(job))
+
 def format_number(num):
     """Format numbers with K/M suffixes"""
     if num is None:
@@ -562,37 +2311,49 @@ def format_number(num):
     except (ValueError, TypeError):
         return "0"
 
-@app.template_filter('format_number')
+@bp.app_template_filter('format_number')
 def format_number_filter(num):
     """Template filter for formatting numbers"""
     return format_number(num)
 
-# Ensure directories exist for proper app operation
-try:
-    # Create templates directory if it doesn't exist
-    templates_dir = BASE_DIR / "templates" if not USE_POSTGRES else Path("templates")
-    if not templates_dir.exists() and not USE_POSTGRES:
-        logger.warning(f"Templates directory not found at: {templates_dir}")
-        # Try to find templates in the bundle
-        if getattr(sys, 'frozen', False):
-            # In bundle, templates might be in Resources
-            bundle_templates = BASE_DIR / ".." / "Resources" / "templates"
-            if bundle_templates.exists():
-                logger.info(f"Found templates in bundle at: {bundle_templates}")
-            else:
-                logger.warning("Templates not found in expected bundle locations")
+def create_app():
+    """Build the Flask app.
     
-    # Create temp exports directory if possible
-    if not USE_POSTGRES:
-        temp_dir = BASE_DIR / "temp_exports"
-        temp_dir.mkdir(exist_ok=True, parents=True)
-    logger.info("✅ Directory initialization complete")
+    Creating the app does no I/O; database and filesystem checks run in
+    ensure_initialized() before the first request.
+    """
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    app.before_request(ensure_initialized)
+    app.teardown_appcontext(close_connection)
+    app.register_blueprint(bp)
+    
+    @app.cli.command('migrate')
+    def migrate_command():
+        """Apply pending schema migrations."""
+        migrate_database()
+    
+    @app.cli.command('vacuum')
+    def vacuum_command():
+        """Compact the SQLite database and rebuild its search indexes."""
+        vacuum_database()
     
-except Exception as e:
-    logger.warning(f"⚠️  Directory creation warning: {e}")
-    logger.warning("🔄 App will continue anyway")
+    return app
+
+# Module-level app for `gunicorn webapp:app` and the desktop bundle
+app = create_app()
 
 if __name__ == '__main__':
+    # `python webapp.py migrate` applies pending migrations and exits (deploy release step)
+    if sys.argv[1:] == ['migrate']:
+        logger.info(f"Migrating {DB_DIALECT} database to schema version {migrations.latest_version()}")
+        migrate_database()
+        sys.exit(0)
+    # `python webapp.py vacuum` compacts SQLite and rebuilds the search indexes
+    if sys.argv[1:] == ['vacuum']:
+        vacuum_database()
+        sys.exit(0)
+    
     # Get port from environment variable (Heroku sets this)
     port = int(os.environ.get('PORT', 9191))
     
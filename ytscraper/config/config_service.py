@@ -1,9 +1,10 @@
 import os
-import json
 from pathlib import Path
 from typing import Dict, Any, Optional
 from dotenv import load_dotenv
 
+from .. import serialization
+
 class ConfigService:
     """Service for managing configuration and runtime state."""
     
@@ -81,9 +82,9 @@ class ConfigService:
             return {"processed_videos": [], "quota_used": 0}
         
         try:
-            with open(self._checkpoint_file, "r") as f:
-                return json.load(f)
-        except (json.JSONDecodeError, IOError):
+            with open(self._checkpoint_file, "rb") as f:
+                return serialization.loads(f.read())
+        except (ValueError, IOError):
             return {"processed_videos": [], "quota_used": 0}
     
     def save_checkpoint(self, processed_videos: list, additional_data: Optional[Dict] = None) -> None:
@@ -101,5 +102,5 @@ class ConfigService:
         if additional_data:
             checkpoint_data.update(additional_data)
         
-        with open(self._checkpoint_file, "w") as f:
-            json.dump(checkpoint_data, f) 
\ No newline at end of file
+        with open(self._checkpoint_file, "wb") as f:
+            f.write(serialization.dumpb(checkpoint_data)) 
\ No newline at end of file
@@ -0,0 +1,107 @@
+import datetime
+import decimal
+import json
+import os
+import uuid
+from typing import Any, Union
+
+# Pick the fastest installed encoder; JSON_BACKEND=orjson|ujson|json forces one
+_requested = os.environ.get('JSON_BACKEND', '').lower()
+
+orjson = None
+ujson = None
+if _requested in ('', 'orjson'):
+    try:
+        import orjson
+    except ImportError:
+        orjson = None
+if orjson is None and _requested in ('', 'ujson'):
+    try:
+        import ujson
+    except ImportError:
+        ujson = None
+
+if orjson is not None:
+    BACKEND = 'orjson'
+elif ujson is not None:
+    BACKEND = 'ujson'
+else:
+    BACKEND = 'json'
+
+
+def default(value: Any) -> Any:
+    """Convert values the encoders don't handle natively.
+
+    Datetimes and dates become ISO 8601 strings, Decimals become numbers and
+    sets become lists, matching what orjson does for the types it knows.
+
+    Raises:
+        TypeError: For anything else
+    """
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumpb(obj: Any, indent: bool = False, sort_keys: bool = False) -> bytes:
+    """Serialize to UTF-8 encoded JSON bytes.
+
+    Args:
+        obj: Value to encode
+        indent: Pretty-print with two-space indentation
+        sort_keys: Sort object keys
+
+    Returns:
+        UTF-8 JSON document
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=default, option=option)
+    return dumps(obj, indent=indent, sort_keys=sort_keys).encode('utf-8')
+
+
+def dumps(obj: Any, indent: bool = False, sort_keys: bool = False) -> str:
+    """Serialize to a JSON string.
+
+    Non-ASCII text is written as-is rather than escaped, with every backend.
+
+    Args:
+        obj: Value to encode
+        indent: Pretty-print with two-space indentation
+        sort_keys: Sort object keys
+
+    Returns:
+        JSON document
+    """
+    if orjson is not None:
+        return dumpb(obj, indent=indent, sort_keys=sort_keys).decode('utf-8')
+    if ujson is not None:
+        return ujson.dumps(obj, ensure_ascii=False, escape_forward_slashes=False,
+                           indent=2 if indent else 0, sort_keys=sort_keys, default=default)
+    return json.dumps(obj, default=default, ensure_ascii=False,
+                      indent=2 if indent else None, sort_keys=sort_keys,
+                      separators=None if indent else (',', ':'))
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """Parse a JSON document.
+
+    Raises:
+        ValueError: If the document is not valid JSON; every backend's decode
+            error subclasses it
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    if ujson is not None:
+        return ujson.loads(data)
+    return json.loads(data)
@@ -0,0 +1,387 @@
+import logging
+import math
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+from . import data_version, timestamps
+from .sql_helpers import placeholder
+from .. import serialization
+
+logger = logging.getLogger(__name__)
+
+# NumPy is optional: it vectorizes the pass over large videos, and the
+# pure-Python path gives identical results without it
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Rollup scope holding the channel-wide figures
+CHANNEL_SCOPE = '*'
+
+ROLLUP_TABLE_SQL = {
+    'sqlite': """
+        CREATE TABLE IF NOT EXISTS stats_rollups (
+            scope TEXT PRIMARY KEY,
+            data_version INTEGER NOT NULL,
+            payload TEXT NOT NULL,
+            refreshed_at INTEGER NOT NULL
+        )
+    """,
+    'postgres': """
+        CREATE TABLE IF NOT EXISTS stats_rollups (
+            scope VARCHAR(255) PRIMARY KEY,
+            data_version BIGINT NOT NULL,
+            payload TEXT NOT NULL,
+            refreshed_at BIGINT NOT NULL
+        )
+    """,
+}
+
+# Day and hour are cut out of the epoch column in SQL so both engines get
+# plain columns
+_COLUMNS_SQL = {
+    dialect: f"""
+        SELECT {timestamps.day_sql('published_ts', dialect)},
+               {timestamps.hour_sql('published_ts', dialect)},
+               like_count,
+               CASE WHEN parent_comment_id IS NULL THEN 0 ELSE 1 END,
+               CASE WHEN channel_owner_liked THEN 1 ELSE 0 END,
+               author
+        FROM comments
+    """
+    for dialect in ('sqlite', 'postgres')
+}
+
+PERCENTILES = [50, 75, 90, 95, 99]
+
+# Lower bounds of the like-count buckets; the last bucket is open-ended
+LIKE_BUCKETS = [0, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000]
+
+TOP_AUTHORS = 10
+
+
+def create_rollup_table(cursor, dialect: str = 'sqlite') -> None:
+    """Create the stats_rollups table.
+
+    Args:
+        cursor: Database cursor
+        dialect: 'sqlite' or 'postgres'
+    """
+    cursor.execute(ROLLUP_TABLE_SQL[dialect])
+
+
+def fetch_columns(cursor, video_id: Optional[str] = None, dialect: str = 'sqlite') -> Dict[str, list]:
+    """Pull the columns the statistics need, one list per column.
+
+    Args:
+        cursor: Database cursor
+        video_id: Video to read, or None for every comment
+        dialect: 'sqlite' or 'postgres'
+
+    Returns:
+        Dict of day, hour, likes, is_reply, hearted and author lists
+    """
+    query = _COLUMNS_SQL[dialect]
+    params = []
+    if video_id is not None:
+        query += f" WHERE video_id = {placeholder(dialect)}"
+        params.append(video_id)
+    cursor.execute(query, params)
+    rows = cursor.fetchall()
+    names = ['day', 'hour', 'likes', 'is_reply', 'hearted', 'author']
+    if not rows:
+        return {name: [] for name in names}
+    columns = dict(zip(names, (list(column) for column in zip(*rows))))
+    columns['likes'] = [likes or 0 for likes in columns['likes']]
+    columns['author'] = [author or '' for author in columns['author']]
+    return columns
+
+
+def _percentile(sorted_values: List[int], q: float) -> float:
+    # Linear interpolation, matching numpy.percentile's default
+    k = (len(sorted_values) - 1) * q / 100.0
+    lower, upper = math.floor(k), math.ceil(k)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (k - lower)
+
+
+def _bucket_list(counts: List[int]) -> List[Dict]:
+    buckets = []
+    for i, count in enumerate(counts):
+        upper = LIKE_BUCKETS[i + 1] - 1 if i + 1 < len(LIKE_BUCKETS) else None
+        buckets.append({'min': LIKE_BUCKETS[i], 'max': upper, 'count': int(count)})
+    return buckets
+
+
+def _author_list(authors, comments, likes) -> List[Dict]:
+    return [
+        {'author': author, 'comments': int(count), 'likes': int(total)}
+        for author, count, total in zip(authors, comments, likes)
+    ]
+
+
+def _compute_numpy(columns: Dict[str, list]) -> Dict:
+    likes = np.asarray(columns['likes'], dtype=np.int64)
+    hours = np.asarray([h for h in columns['hour'] if h is not None], dtype=np.int64)
+    days, day_counts = np.unique(np.asarray([d for d in columns['day'] if d], dtype=str), return_counts=True)
+
+    bucket_index = np.searchsorted(np.asarray(LIKE_BUCKETS), likes, side='right') - 1
+    bucket_counts = np.bincount(np.clip(bucket_index, 0, None), minlength=len(LIKE_BUCKETS))
+
+    authors, inverse = np.unique(np.asarray(columns['author'], dtype=str), return_inverse=True)
+    author_comments = np.bincount(inverse, minlength=len(authors))
+    author_likes = np.bincount(inverse, weights=likes, minlength=len(authors)).astype(np.int64)
+    # Stable sorts keep ties in alphabetical order, as in the Python path
+    by_volume = np.argsort(-author_comments, kind='stable')[:TOP_AUTHORS]
+    by_likes = np.argsort(-author_likes, kind='stable')[:TOP_AUTHORS]
+
+    return {
+        'replies': int(np.sum(np.asarray(columns['is_reply'], dtype=np.int64))),
+        'hearted': int(np.sum(np.asarray(columns['hearted'], dtype=np.int64))),
+        'likes_total': int(likes.sum()),
+        'likes_max': int(likes.max()),
+        'percentiles': [float(v) for v in np.percentile(likes, PERCENTILES)],
+        'buckets': bucket_counts.tolist(),
+        'per_day': list(zip(days.tolist(), day_counts.tolist())),
+        'per_hour': np.bincount(hours, minlength=24)[:24].tolist(),
+        'by_volume': _author_list(authors[by_volume], author_comments[by_volume], author_likes[by_volume]),
+        'by_likes': _author_list(authors[by_likes], author_comments[by_likes], author_likes[by_likes]),
+    }
+
+
+def _compute_python(columns: Dict[str, list]) -> Dict:
+    likes = columns['likes']
+    sorted_likes = sorted(likes)
+
+    buckets = [0] * len(LIKE_BUCKETS)
+    edge = 0
+    for value in sorted_likes:
+        while edge + 1 < len(LIKE_BUCKETS) and value >= LIKE_BUCKETS[edge + 1]:
+            edge += 1
+        buckets[edge] += 1
+
+    per_hour = [0] * 24
+    for hour in columns['hour']:
+        if hour is not None and 0 <= hour < 24:
+            per_hour[hour] += 1
+
+    author_comments = Counter(columns['author'])
+    author_likes = Counter()
+    for author, value in zip(columns['author'], likes):
+        author_likes[author] += value
+    authors = sorted(author_comments)
+    by_volume = sorted(authors, key=lambda a: -author_comments[a])[:TOP_AUTHORS]
+    by_likes = sorted(authors, key=lambda a: -author_likes[a])[:TOP_AUTHORS]
+
+    return {
+        'replies': sum(columns['is_reply']),
+        'hearted': sum(columns['hearted']),
+        'likes_total': sum(likes),
+        'likes_max': sorted_likes[-1],
+        'percentiles': [float(_percentile(sorted_likes, q)) for q in PERCENTILES],
+        'buckets': buckets,
+        'per_day': sorted(Counter(day for day in columns['day'] if day).items()),
+        'per_hour': per_hour,
+        'by_volume': _author_list(by_volume, [author_comments[a] for a in by_volume],
+                                  [author_likes[a] for a in by_volume]),
+        'by_likes': _author_list(by_likes, [author_comments[a] for a in by_likes],
+                                 [author_likes[a] for a in by_likes]),
+    }
+
+
+def compute_comment_stats(columns: Dict[str, list], use_numpy: Optional[bool] = None) -> Dict:
+    """Compute histograms, like distribution and top authors in one pass.
+
+    Args:
+        columns: Output of fetch_columns
+        use_numpy: Force the NumPy (True) or pure-Python (False) path;
+            defaults to NumPy when it is installed
+
+    Returns:
+        JSON-serializable statistics
+    """
+    if use_numpy is None:
+        use_numpy = np is not None
+    total = len(columns['likes'])
+    if total == 0:
+        return {
+            'total_comments': 0, 'top_level_comments': 0, 'replies': 0, 'reply_ratio': 0.0,
+            'hearted': 0, 'hearted_fraction': 0.0,
+            'likes': {'total': 0, 'mean': 0.0, 'max': 0,
+                      'percentiles': {f'p{q}': 0.0 for q in PERCENTILES},
+                      'buckets': _bucket_list([0] * len(LIKE_BUCKETS))},
+            'comments_per_day': [], 'comments_per_hour': [0] * 24,
+            'top_authors_by_volume': [], 'top_authors_by_likes': [],
+            'engine': 'numpy' if use_numpy else 'python'
+        }
+
+    raw = _compute_numpy(columns) if use_numpy else _compute_python(columns)
+    top_level = total - raw['replies']
+    return {
+        'total_comments': total,
+        'top_level_comments': top_level,
+        'replies': raw['replies'],
+        'reply_ratio': round(raw['replies'] / top_level, 4) if top_level else 0.0,
+        'hearted': raw['hearted'],
+        'hearted_fraction': round(raw['hearted'] / total, 4),
+        'likes': {
+            'total': raw['likes_total'],
+            'mean': round(raw['likes_total'] / total, 2),
+            'max': raw['likes_max'],
+            'percentiles': {f'p{q}': round(v, 2) for q, v in zip(PERCENTILES, raw['percentiles'])},
+            'buckets': _bucket_list(raw['buckets'])
+        },
+        'comments_per_day': [{'date': day, 'count': int(count)} for day, count in raw['per_day']],
+        'comments_per_hour': [int(count) for count in raw['per_hour']],
+        'top_authors_by_volume': raw['by_volume'],
+        'top_authors_by_likes': raw['by_likes'],
+        'engine': 'numpy' if use_numpy else 'python'
+    }
+
+
+def like_bucket_sql(column: str) -> str:
+    """SQL expression giving the LIKE_BUCKETS index of a like-count column.
+
+    Args:
+        column: Like count column, e.g. 'c.like_count'
+    """
+    cases = ' '.join(
+        f"WHEN {column} >= {lower} THEN {i}"
+        for i, lower in reversed(list(enumerate(LIKE_BUCKETS))) if i > 0
+    )
+    return f"CASE {cases} ELSE 0 END"
+
+
+def combine_facets(groups: Iterable[Dict]) -> Dict:
+    """Turn grouped comment counts into filter-panel facets.
+
+    Each facet counts the comments matching every active filter except its
+    own, so it shows how many would match if that filter were changed: the
+    like buckets ignore the like threshold, the months ignore the date range
+    and the reply split ignores the has-replies filter.
+
+    Args:
+        groups: Rows with 'month', 'bucket', 'has_replies', 'hearted',
+            'comments' and 'replies', plus 'likes_ok', 'dates_ok' and
+            'replies_ok' telling whether the group passes each filter
+
+    Returns:
+        JSON-serializable facet counts
+    """
+    buckets = [0] * len(LIKE_BUCKETS)
+    months = Counter()
+    threads = {'with_replies': 0, 'without_replies': 0, 'replies': 0}
+    total = hearted = 0
+    for group in groups:
+        comments = int(group['comments'])
+        likes_ok, dates_ok, replies_ok = group['likes_ok'], group['dates_ok'], group['replies_ok']
+        if dates_ok and replies_ok:
+            buckets[group['bucket']] += comments
+        if likes_ok and replies_ok and group['month']:
+            months[group['month']] += comments
+        if likes_ok and dates_ok:
+            threads['with_replies' if group['has_replies'] else 'without_replies'] += comments
+            threads['replies'] += int(group['replies'] or 0)
+        if likes_ok and dates_ok and replies_ok:
+            total += comments
+            hearted += comments if group['hearted'] else 0
+    return {
+        'total': total,
+        'likes': _bucket_list(buckets),
+        'months': [{'month': month, 'count': count} for month, count in sorted(months.items())],
+        'threads': threads,
+        'hearted': {'hearted': hearted, 'not_hearted': total - hearted},
+    }
+
+
+def scope_version(cursor, scope: str, dialect: str = 'sqlite') -> int:
+    """Get the value a scope's rollup is tagged with to tell whether it is fresh.
+
+    A video's rollup follows the video's highest change_seq, so writes to
+    other videos leave it fresh. The channel rollup follows the data
+    version, which every write bumps.
+
+    Args:
+        cursor: Database cursor
+        scope: Video ID, or CHANNEL_SCOPE
+        dialect: 'sqlite' or 'postgres'
+
+    Returns:
+        Version number, 0 if nothing has been written
+    """
+    if scope == CHANNEL_SCOPE:
+        version = data_version.get_data_version(cursor, dialect)
+        return version[0] if version else 0
+    cursor.execute(
+        f"SELECT COALESCE(MAX(change_seq), 0) FROM comments WHERE video_id = {placeholder(dialect)}",
+        (scope,)
+    )
+    return int(cursor.fetchone()[0])
+
+
+def refresh_rollup(cursor, scope: str, dialect: str = 'sqlite') -> Dict:
+    """Recompute and store the statistics for a video or the whole channel.
+
+    The rollup is tagged with scope_version() so readers can tell whether
+    it is still fresh. Call after bumping the data version.
+
+    Args:
+        cursor: Database cursor
+        scope: Video ID, or CHANNEL_SCOPE for every comment
+        dialect: 'sqlite' or 'postgres'
+
+    Returns:
+        The stored statistics
+    """
+    p = placeholder(dialect)
+    version = scope_version(cursor, scope, dialect)
+    columns = fetch_columns(cursor, None if scope == CHANNEL_SCOPE else scope, dialect)
+    stats = compute_comment_stats(columns)
+    cursor.execute(
+        f"INSERT INTO stats_rollups (scope, data_version, payload, refreshed_at) "
+        f"VALUES ({p}, {p}, {p}, {p}) "
+        f"ON CONFLICT (scope) DO UPDATE SET data_version = excluded.data_version, "
+        f"payload = excluded.payload, refreshed_at = excluded.refreshed_at",
+        (scope, version, serialization.dumps(stats), int(time.time()))
+    )
+    return stats
+
+
+def refresh_rollups(cursor, video_ids: Iterable[str], dialect: str = 'sqlite') -> None:
+    """Refresh the rollups of the given videos and of the channel.
+
+    Args:
+        cursor: Database cursor
+        video_ids: Videos whose comments were written
+        dialect: 'sqlite' or 'postgres'
+    """
+    for video_id in sorted(set(video_ids)):
+        refresh_rollup(cursor, video_id, dialect)
+    refresh_rollup(cursor, CHANNEL_SCOPE, dialect)
+
+
+def get_rollup(cursor, scope: str, dialect: str = 'sqlite') -> Optional[Dict]:
+    """Read a stored rollup.
+
+    Args:
+        cursor: Database cursor
+        scope: Video ID or CHANNEL_SCOPE
+        dialect: 'sqlite' or 'postgres'
+
+    Returns:
+        Dict with data_version (the scope_version() it was computed at),
+        refreshed_at and stats, or None if missing
+    """
+    p = placeholder(dialect)
+    try:
+        cursor.execute(
+            f"SELECT data_version, payload, refreshed_at FROM stats_rollups WHERE scope = {p}",
+            (scope,)
+        )
+        row = cursor.fetchone()
+    except Exception:
+        return None
+    if row is None:
+        return None
+    return {'data_version': int(row[0]), 'stats': serialization.loads(row[1]), 'refreshed_at': int(row[2])}
@@ -0,0 +1,124 @@
+from typing import Dict, Iterable, List, Optional
+
+from . import timestamps
+from .sql_helpers import placeholder, rebuild_aggregates, refresh_aggregates
+
+# Per-author totals across every video, kept current by the writers so
+# author lookups and leaderboards don't scan the comments table
+AUTHORS_TABLE_SQL = {
+    'sqlite': """
+        CREATE TABLE IF NOT EXISTS authors (
+            author TEXT PRIMARY KEY,
+            comment_count INTEGER NOT NULL DEFAULT 0,
+            reply_count INTEGER NOT NULL DEFAULT 0,
+            total_likes INTEGER NOT NULL DEFAULT 0,
+            video_count INTEGER NOT NULL DEFAULT 0,
+            first_seen_at TEXT,
+            last_seen_at TEXT,
+            refreshed_at INTEGER
+        )
+    """,
+    'postgres': """
+        CREATE TABLE IF NOT EXISTS authors (
+            author VARCHAR(255) PRIMARY KEY,
+            comment_count BIGINT NOT NULL DEFAULT 0,
+            reply_count BIGINT NOT NULL DEFAULT 0,
+            total_likes BIGINT NOT NULL DEFAULT 0,
+            video_count BIGINT NOT NULL DEFAULT 0,
+            first_seen_at TIMESTAMP,
+            last_seen_at TIMESTAMP,
+            refreshed_at BIGINT
+        )
+    """,
+}
+
+AUTHOR_COLUMNS = [
+    'author', 'comment_count', 'reply_count', 'total_likes',
+    'video_count', 'first_seen_at', 'last_seen_at', 'refreshed_at'
+]
+
+# Leaderboard name -> ORDER BY column
+LEADERBOARDS = {
+    'comments': 'comment_count',
+    'likes': 'total_likes',
+    'replies': 'reply_count',
+    'videos': 'video_count',
+    'recent': 'last_seen_at',
+}
+
+def create_authors_table(cursor, dialect: str = 'sqlite') -> None:
+    """Create the authors table and its leaderboard indexes.
+
+    The comments index behind per-author pages belongs to the migrations,
+    which keep it on the epoch timestamp column.
+
+    Args:
+        cursor: Database cursor
+        dialect: 'sqlite' or 'postgres'
+    """
+    cursor.execute(AUTHORS_TABLE_SQL[dialect])
+    for column in ('comment_count', 'total_likes'):
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_authors_{column} ON authors ({column})")
+
+
+def _aggregates(dialect: str) -> List[str]:
+    # First and last times are aggregated on the epoch column, since the
+    # text column's mixed formats don't sort
+    return [
+        "COUNT(*)",
+        "SUM(CASE WHEN parent_comment_id IS NULL THEN 0 ELSE 1 END)",
+        "COALESCE(SUM(like_count), 0)",
+        "COUNT(DISTINCT video_id)",
+        timestamps.from_epoch_sql('MIN(published_ts)', dialect),
+        timestamps.from_epoch_sql('MAX(published_ts)', dialect),
+    ]
+
+
+def refresh_authors(cursor, authors: Iterable[str], dialect: str = 'sqlite') -> None:
+    """Recompute totals for the given authors; call inside the writer's transaction.
+
+    Each author is re-aggregated from their own rows through the
+    (author, published_ts) index, so the cost follows how much the touched
+    authors have written rather than the size of the table.
+
+    Args:
+        cursor: Database cursor
+        authors: Authors whose comments were written
+        dialect: 'sqlite' or 'postgres'
+    """
+    refresh_aggregates(cursor, 'authors', AUTHOR_COLUMNS, _aggregates(dialect), authors, dialect)
+
+
+def rebuild_authors(cursor, dialect: str = 'sqlite') -> None:
+    """Recompute totals for every author in one pass over the comments table.
+
+    Args:
+        cursor: Database cursor
+        dialect: 'sqlite' or 'postgres'
+    """
+    rebuild_aggregates(cursor, 'authors', AUTHOR_COLUMNS, _aggregates(dialect), dialect)
+
+
+def get_author(cursor, author: str, dialect: str = 'sqlite') -> Optional[Dict]:
+    """Read the stored totals for an author.
+
+    Args:
+        cursor: Database cursor
+        author: Author display name
+        dialect: 'sqlite' or 'postgres'
+
+    Returns:
+        Dict of totals, or None if the author has no row or the table is missing
+    """
+    p = placeholder(dialect)
+    try:
+        cursor.execute(
+            f"SELECT {', '.join(AUTHOR_COLUMNS)} FROM authors WHERE author = {p}",
+            (author,)
+        )
+        row = cursor.fetchone()
+    except Exception:
+        return None
+    if row is None:
+        return None
+    return dict(zip(AUTHOR_COLUMNS, row))
@@ -0,0 +1,127 @@
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .sql_helpers import batched, placeholder
+
+# Append-only log of comments in the order they were first stored, so open
+# viewers can be sent new comments without re-running their queries. seq
+# only grows; a client remembers the last seq it saw and asks for more
+CHANGE_LOG_TABLE_SQL = {
+    'sqlite': """
+        CREATE TABLE IF NOT EXISTS comment_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            video_id TEXT NOT NULL,
+            comment_id TEXT NOT NULL,
+            logged_at INTEGER NOT NULL
+        )
+    """,
+    'postgres': """
+        CREATE TABLE IF NOT EXISTS comment_log (
+            seq BIGSERIAL PRIMARY KEY,
+            video_id VARCHAR(255) NOT NULL,
+            comment_id VARCHAR(255) NOT NULL,
+            logged_at BIGINT NOT NULL
+        )
+    """,
+}
+
+# Serves "this video's entries after seq N"
+CHANGE_LOG_INDEX_SQL = "CREATE INDEX IF NOT EXISTS idx_comment_log_video_seq ON comment_log (video_id, seq)"
+
+
+def create_change_log(cursor, dialect: str = 'sqlite') -> None:
+    """Create the comment_log table and its (video_id, seq) index.
+
+    Args:
+        cursor: Database cursor
+        dialect: 'sqlite' or 'postgres'
+    """
+    cursor.execute(CHANGE_LOG_TABLE_SQL[dialect])
+    cursor.execute(CHANGE_LOG_INDEX_SQL)
+
+
+def log_new_comments(cursor, comments: Iterable[Dict], dialect: str = 'sqlite') -> int:
+    """Append the comments that aren't stored yet to the log.
+
+    Call inside the writer's transaction, before the comments are upserted,
+    so updates to existing comments aren't logged as new. On Postgres the
+    log is locked until the writer commits: sequence numbers are handed out
+    before commit, and without the lock a reader could see a later seq
+    commit first and step past an earlier one for good. SQLite writers are
+    already serialized by the database lock.
+
+    Args:
+        cursor: Database cursor
+        comments: Dicts with 'comment_id' and 'video_id'
+        dialect: 'sqlite' or 'postgres'
+
+    Returns:
+        Number of comments logged
+    """
+    p = placeholder(dialect)
+    pending = {}
+    for comment in comments:
+        pending.setdefault(comment['comment_id'], comment['video_id'])
+    if not pending:
+        return 0
+    if dialect == 'postgres':
+        cursor.execute("LOCK TABLE comment_log IN SHARE ROW EXCLUSIVE MODE")
+
+    for batch in batched(list(pending)):
+        cursor.execute(
+            f"SELECT comment_id FROM comments WHERE comment_id IN ({', '.join([p] * len(batch))})",
+            batch
+        )
+        for row in cursor.fetchall():
+            pending.pop(row[0], None)
+
+    now = int(time.time())
+    cursor.executemany(
+        f"INSERT INTO comment_log (video_id, comment_id, logged_at) VALUES ({p}, {p}, {p})",
+        [(video_id, comment_id, now) for comment_id, video_id in pending.items()]
+    )
+    return len(pending)
+
+
+def latest_seq(cursor, video_id: Optional[str] = None, dialect: str = 'sqlite') -> int:
+    """Get the newest seq in the log, for one video or overall.
+
+    Args:
+        cursor: Database cursor
+        video_id: Video to look at, or None for the whole log
+        dialect: 'sqlite' or 'postgres'
+
+    Returns:
+        Highest seq, 0 if there are no entries
+    """
+    if video_id is None:
+        cursor.execute("SELECT COALESCE(MAX(seq), 0) FROM comment_log")
+    else:
+        cursor.execute(
+            f"SELECT COALESCE(MAX(seq), 0) FROM comment_log WHERE video_id = {placeholder(dialect)}",
+            (video_id,)
+        )
+    return int(cursor.fetchone()[0])
+
+
+def entries_after(cursor, video_id: str, seq: int, limit: int,
+                  dialect: str = 'sqlite') -> List[Tuple[int, str]]:
+    """Get a video's log entries after seq, oldest first.
+
+    Args:
+        cursor: Database cursor
+        video_id: Video to read
+        seq: Last seq the caller has seen
+        limit: Maximum entries returned
+        dialect: 'sqlite' or 'postgres'
+
+    Returns:
+        List of (seq, comment_id)
+    """
+    p = placeholder(dialect)
+    cursor.execute(
+        f"SELECT seq, comment_id FROM comment_log WHERE video_id = {p} AND seq > {p} "
+        f"ORDER BY seq LIMIT {p}",
+        (video_id, seq, limit)
+    )
+    return [(int(row[0]), row[1]) for row in cursor.fetchall()]
@@ -0,0 +1,157 @@
+import sqlite3
+from typing import List
+
+# Per-video change counter on comments, so a client holding the highest
+# change_seq it has seen can ask for just the rows inserted or edited since.
+# SQLite runs one writer at a time, so there the next value is the video's
+# current maximum plus one, which relies on comments not being deleted.
+# Postgres writers run concurrently and could both read the same maximum,
+# so each video's last value lives in a counter row instead
+CHANGE_SEQ_TYPE = ('INTEGER NOT NULL DEFAULT 0', 'BIGINT NOT NULL DEFAULT 0')
+
+# Edits to these columns are changes; scrape timestamps and the reply
+# totals the writers maintain are not
+TRACKED_COLUMNS = ['parent_comment_id', 'author', 'text', 'updated_at', 'like_count', 'channel_owner_liked']
+
+# Serves both "next change_seq of this video" and "this video's changes after N"
+CHANGE_SEQ_INDEX_SQL = "CREATE INDEX IF NOT EXISTS idx_comments_video_change_seq ON comments (video_id, change_seq)"
+
+_NEXT_SEQ_SQL = "(SELECT COALESCE(MAX(change_seq), 0) + 1 FROM comments WHERE video_id = {video_id})"
+
+COUNTERS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS comment_change_counters (
+        video_id VARCHAR(255) PRIMARY KEY,
+        last_seq BIGINT NOT NULL
+    )
+"""
+
+# Starts each counter at the video's highest existing change_seq
+_SEED_COUNTERS_SQL = """
+    INSERT INTO comment_change_counters (video_id, last_seq)
+    SELECT video_id, MAX(change_seq) FROM comments
+    WHERE video_id IS NOT NULL
+    GROUP BY video_id
+    ON CONFLICT (video_id) DO UPDATE
+    SET last_seq = GREATEST(comment_change_counters.last_seq, EXCLUDED.last_seq)
+"""
+
+# UPDATE ... FROM needs SQLite 3.33; older libraries number rows in Python
+_SQLITE_UPDATE_FROM_VERSION = (3, 33, 0)
+
+# Numbers existing rows 1..n per video, oldest first
+_BACKFILL_SQL = """
+    UPDATE comments SET change_seq = ranked.seq
+    FROM (
+        SELECT comment_id, ROW_NUMBER() OVER (
+            PARTITION BY video_id ORDER BY published_ts, comment_id
+        ) AS seq
+        FROM comments
+    ) AS ranked
+    WHERE comments.comment_id = ranked.comment_id
+"""
+
+
+def _changed_condition(old: str, new: str, dialect: str) -> str:
+    operator = 'IS DISTINCT FROM' if dialect == 'postgres' else 'IS NOT'
+    return ' OR '.join(f"{old}.{column} {operator} {new}.{column}" for column in TRACKED_COLUMNS)
+
+
+def _backfill_sqlite(conn) -> None:
+    if sqlite3.sqlite_version_info >= _SQLITE_UPDATE_FROM_VERSION:
+        conn.execute(_BACKFILL_SQL)
+        return
+    rows = conn.execute(
+        "SELECT rowid, video_id FROM comments ORDER BY video_id, published_ts, comment_id"
+    ).fetchall()
+    numbered = []
+    video_id, seq = None, 0
+    for rowid, row_video_id in rows:
+        seq = seq + 1 if row_video_id == video_id else 1
+        video_id = row_video_id
+        numbered.append((seq, rowid))
+    conn.executemany("UPDATE comments SET change_seq = ? WHERE rowid = ?", numbered)
+
+
+def ensure_sqlite_change_tracking(conn, existing_columns: List[str]) -> None:
+    """Add and backfill change_seq, its index and the triggers maintaining it.
+
+    Every insert, and every update that changes a tracked column, moves the
+    row to its video's next change_seq. An upsert rewriting identical values
+    leaves it alone. The caller owns the transaction and commits.
+
+    Args:
+        conn: sqlite3 connection
+        existing_columns: Current columns of the comments table
+    """
+    if 'change_seq' not in existing_columns:
+        conn.execute(f"ALTER TABLE comments ADD COLUMN change_seq {CHANGE_SEQ_TYPE[0]}")
+    _backfill_sqlite(conn)
+    conn.execute(CHANGE_SEQ_INDEX_SQL)
+
+    assign = (f"UPDATE comments SET change_seq = {_NEXT_SEQ_SQL.format(video_id='new.video_id')} "
+              f"WHERE rowid = new.rowid;")
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS comments_change_seq_ai AFTER INSERT ON comments BEGIN
+            {assign}
+        END
+    """)
+    # change_seq itself isn't listed, so the trigger's own UPDATE doesn't re-fire it
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS comments_change_seq_au
+        AFTER UPDATE OF {', '.join(TRACKED_COLUMNS)} ON comments
+        WHEN {_changed_condition('old', 'new', 'sqlite')} BEGIN
+            {assign}
+        END
+    """)
+
+
+def ensure_postgres_change_tracking(cursor) -> None:
+    """Add and backfill change_seq, its index and the trigger maintaining it.
+
+    Args:
+        cursor: psycopg2 cursor
+    """
+    cursor.execute(f"ALTER TABLE comments ADD COLUMN IF NOT EXISTS change_seq {CHANGE_SEQ_TYPE[1]}")
+    cursor.execute(_BACKFILL_SQL)
+    cursor.execute(CHANGE_SEQ_INDEX_SQL)
+    ensure_postgres_change_counters(cursor)
+
+
+def ensure_postgres_change_counters(cursor) -> None:
+    """Create and seed the per-video counters and the trigger drawing from them.
+
+    A BEFORE trigger sets the value on the row being written. Its upsert
+    locks the video's counter row until the transaction ends, so concurrent
+    writers to one video take distinct numbers and make them visible in
+    order. Safe to run again: counters only ever move up.
+
+    Args:
+        cursor: psycopg2 cursor
+    """
+    cursor.execute(COUNTERS_TABLE_SQL)
+    cursor.execute(_SEED_COUNTERS_SQL)
+    cursor.execute(f"""
+        CREATE OR REPLACE FUNCTION comments_change_seq() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'UPDATE' THEN
+                IF NOT ({_changed_condition('OLD', 'NEW', 'postgres')}) THEN
+                    RETURN NEW;
+                END IF;
+            END IF;
+            IF NEW.video_id IS NULL THEN
+                RETURN NEW;
+            END IF;
+            INSERT INTO comment_change_counters AS counters (video_id, last_seq)
+            VALUES (NEW.video_id, 1)
+            ON CONFLICT (video_id) DO UPDATE SET last_seq = counters.last_seq + 1
+            RETURNING last_seq INTO NEW.change_seq;
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    cursor.execute("DROP TRIGGER IF EXISTS comments_change_seq ON comments")
+    cursor.execute(f"""
+        CREATE TRIGGER comments_change_seq
+        BEFORE INSERT OR UPDATE OF {', '.join(TRACKED_COLUMNS)} ON comments
+        FOR EACH ROW EXECUTE FUNCTION comments_change_seq()
+    """)
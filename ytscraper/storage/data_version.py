@@ -0,0 +1,67 @@
+import time
+from typing import Optional, Tuple
+
+from .sql_helpers import placeholder
+
+# Monotonic counter bumped by every writer; readers derive cache validators from it
+META_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS app_meta (
+        key VARCHAR(64) PRIMARY KEY,
+        value BIGINT NOT NULL,
+        updated_at BIGINT
+    )
+"""
+
+DATA_VERSION_KEY = 'data_version'
+
+
+def create_meta_table(cursor, dialect: str = 'sqlite') -> None:
+    """Create the app_meta table and seed the data version.
+
+    Args:
+        cursor: Database cursor
+        dialect: 'sqlite' or 'postgres'
+    """
+    p = placeholder(dialect)
+    cursor.execute(META_TABLE_SQL)
+    cursor.execute(
+        f"INSERT INTO app_meta (key, value, updated_at) VALUES ({p}, 1, {p}) "
+        f"ON CONFLICT (key) DO NOTHING",
+        (DATA_VERSION_KEY, int(time.time()))
+    )
+
+
+def bump_data_version(cursor, dialect: str = 'sqlite') -> None:
+    """Increment the data version; call inside the writer's transaction.
+
+    Args:
+        cursor: Database cursor
+        dialect: 'sqlite' or 'postgres'
+    """
+    p = placeholder(dialect)
+    cursor.execute(
+        f"UPDATE app_meta SET value = value + 1, updated_at = {p} WHERE key = {p}",
+        (int(time.time()), DATA_VERSION_KEY)
+    )
+
+
+def get_data_version(cursor, dialect: str = 'sqlite') -> Optional[Tuple[int, int]]:
+    """Read the current data version.
+
+    Args:
+        cursor: Database cursor
+        dialect: 'sqlite' or 'postgres'
+
+    Returns:
+        (version, updated_at epoch seconds), or None if the database predates
+        the app_meta table
+    """
+    p = placeholder(dialect)
+    try:
+        cursor.execute(f"SELECT value, updated_at FROM app_meta WHERE key = {p}", (DATA_VERSION_KEY,))
+        row = cursor.fetchone()
+    except Exception:
+        return None
+    if row is None:
+        return None
+    return int(row[0]), int(row[1] or 0)
@@ -0,0 +1,321 @@
+import html
+import logging
+import re
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Full-text indexed tables: source table -> (SQLite FTS5 table, indexed columns)
+SQLITE_FTS_TABLES = {
+    'comments': ('comments_fts', ['text', 'author']),
+    'videos': ('videos_fts', ['title']),
+}
+
+# Postgres generated tsvector columns: source table -> (column, [(source column, weight)])
+POSTGRES_TSVECTOR_COLUMNS = {
+    'comments': ('search_vector', [('text', 'A'), ('author', 'B')]),
+    'videos': ('search_vector', [('title', 'A')]),
+}
+
+# Text search configuration used on Postgres; 'simple' mirrors the
+# non-stemming unicode61 tokenizer used on SQLite
+POSTGRES_TS_CONFIG = 'simple'
+
+# Snippets come back from SQL with matches between these control characters,
+# which highlight_snippet() turns into <mark> tags once the text is escaped
+SNIPPET_MATCH_START = '\x02'
+SNIPPET_MATCH_END = '\x03'
+
+SNIPPET_START = '<mark>'
+SNIPPET_END = '</mark>'
+
+_TOKEN_RE = re.compile(r'"([^"]*)"|(\S+)')
+_WORD_RE = re.compile(r'[^\W_]+', re.UNICODE)
+
+
+def parse_search_query(raw: str) -> List[Tuple[str, List[str]]]:
+    """Parse a user search string into full-text terms.
+
+    Quoted text becomes a phrase, a trailing ``*`` on a bare word makes it an
+    explicit prefix query and other bare words are matched as prefixes too, so
+    typing part of a word still finds it. Punctuation is dropped, which keeps
+    the result safe to embed in FTS5 and tsquery syntax.
+
+    Args:
+        raw: Search string as typed by the user
+
+    Returns:
+        List of (kind, words) tuples where kind is 'phrase' or 'prefix'
+    """
+    terms = []
+    for match in _TOKEN_RE.finditer(raw or ''):
+        phrase, bare = match.groups()
+        if phrase is not None:
+            words = _WORD_RE.findall(phrase)
+            if len(words) > 1:
+                terms.append(('phrase', words))
+            elif words:
+                terms.append(('prefix', words))
+        else:
+            words = _WORD_RE.findall(bare)
+            if words:
+                # "re-post" style tokens are indexed as adjacent words
+                terms.append(('phrase' if len(words) > 1 else 'prefix', words))
+    return terms
+
+
+def highlight_snippet(snippet: Optional[str]) -> Optional[str]:
+    """Turn a raw SQL snippet into HTML with the matches in <mark> tags.
+
+    The comment text is escaped first, so markup typed into a comment comes
+    back as text rather than as HTML.
+
+    Args:
+        snippet: snippet() or ts_headline() output, matches between
+            SNIPPET_MATCH_START and SNIPPET_MATCH_END
+
+    Returns:
+        HTML-safe snippet, or None if there was none
+    """
+    if snippet is None:
+        return None
+    return (html.escape(snippet, quote=False)
+            .replace(SNIPPET_MATCH_START, SNIPPET_START)
+            .replace(SNIPPET_MATCH_END, SNIPPET_END))
+
+
+def fts5_match_expression(terms: List[Tuple[str, List[str]]]) -> Optional[str]:
+    """Build an FTS5 MATCH expression from parsed terms.
+
+    Args:
+        terms: Output of parse_search_query
+
+    Returns:
+        MATCH expression, or None if there is nothing indexable to search for
+    """
+    parts = []
+    for kind, words in terms:
+        if kind == 'phrase':
+            parts.append('"' + ' '.join(words) + '"')
+        else:
+            parts.append(f'"{words[0]}"*')
+    return ' AND '.join(parts) if parts else None
+
+
+def tsquery_expression(terms: List[Tuple[str, List[str]]]) -> Optional[str]:
+    """Build a Postgres to_tsquery() expression from parsed terms.
+
+    Args:
+        terms: Output of parse_search_query
+
+    Returns:
+        tsquery text, or None if there is nothing indexable to search for
+    """
+    parts = []
+    for kind, words in terms:
+        quoted = [f"'{word.lower()}'" for word in words]
+        if kind == 'phrase':
+            parts.append('(' + ' <-> '.join(quoted) + ')')
+        else:
+            parts.append(f'{quoted[0]}:*')
+    return ' & '.join(parts) if parts else None
+
+
+def sqlite_fts5_available(conn) -> bool:
+    """Check whether the SQLite library was built with FTS5.
+
+    Args:
+        conn: sqlite3 connection
+
+    Returns:
+        True if FTS5 virtual tables can be created
+    """
+    try:
+        rows = conn.execute("PRAGMA compile_options").fetchall()
+        return any(row[0] == 'ENABLE_FTS5' for row in rows)
+    except Exception:
+        return False
+
+
+def sqlite_search_index_exists(conn, table: str = 'comments') -> bool:
+    """Check whether the FTS5 index for a table has been created.
+
+    Args:
+        conn: sqlite3 connection
+        table: Source table name
+
+    Returns:
+        True if the FTS5 table exists
+    """
+    fts_table = SQLITE_FTS_TABLES[table][0]
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+        (fts_table,)
+    ).fetchone()
+    return row is not None
+
+
+def _create_sqlite_update_trigger(conn, table: str, fts_table: str, columns: List[str]) -> None:
+    # Only fires when an indexed column changes, so updating counters such
+    # as reply_count doesn't re-tokenize the row
+    column_list = ', '.join(columns)
+    new_values = ', '.join(f'new.{column}' for column in columns)
+    old_values = ', '.join(f'old.{column}' for column in columns)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE OF {column_list} ON {table} BEGIN
+            INSERT INTO {fts_table}({fts_table}, rowid, {column_list})
+            VALUES ('delete', old.rowid, {old_values});
+            INSERT INTO {fts_table}(rowid, {column_list}) VALUES (new.rowid, {new_values});
+        END
+    """)
+
+
+def narrow_sqlite_update_triggers(conn) -> None:
+    """Recreate existing FTS5 update triggers to fire on indexed columns only.
+
+    Indexes created by older versions re-indexed a row on any UPDATE. The
+    caller owns the transaction and commits.
+
+    Args:
+        conn: sqlite3 connection
+    """
+    for table, (fts_table, columns) in SQLITE_FTS_TABLES.items():
+        if not sqlite_search_index_exists(conn, table):
+            continue
+        conn.execute(f"DROP TRIGGER IF EXISTS {fts_table}_au")
+        _create_sqlite_update_trigger(conn, table, fts_table, columns)
+
+
+def ensure_sqlite_search_index(conn) -> bool:
+    """Create FTS5 external-content tables and sync triggers if missing.
+
+    The triggers keep the index in step with INSERT, UPDATE and DELETE on the
+    source tables. Writers must upsert with ``ON CONFLICT ... DO UPDATE``
+    rather than ``INSERT OR REPLACE``, because REPLACE deletes rows without
+    firing delete triggers. Index rows are keyed on the implicit rowid of the
+    source tables, which VACUUM may renumber, so call
+    rebuild_sqlite_search_index() after every VACUUM. The caller owns the
+    transaction and commits.
+
+    Args:
+        conn: sqlite3 connection
+
+    Returns:
+        True if the index is available, False if FTS5 is not supported
+    """
+    if not sqlite_fts5_available(conn):
+        logger.warning("SQLite FTS5 not available - search falls back to LIKE")
+        return False
+
+    for table, (fts_table, columns) in SQLITE_FTS_TABLES.items():
+        source = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+            (table,)
+        ).fetchone()
+        if source is None or sqlite_search_index_exists(conn, table):
+            continue
+
+        column_list = ', '.join(columns)
+        new_values = ', '.join(f'new.{column}' for column in columns)
+        old_values = ', '.join(f'old.{column}' for column in columns)
+
+        conn.execute(f"""
+            CREATE VIRTUAL TABLE {fts_table} USING fts5(
+                {column_list},
+                content='{table}',
+                content_rowid='rowid',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {table} BEGIN
+                INSERT INTO {fts_table}(rowid, {column_list}) VALUES (new.rowid, {new_values});
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {table} BEGIN
+                INSERT INTO {fts_table}({fts_table}, rowid, {column_list})
+                VALUES ('delete', old.rowid, {old_values});
+            END
+        """)
+        _create_sqlite_update_trigger(conn, table, fts_table, columns)
+        # Index rows that existed before the table was created
+        conn.execute(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')")
+        logger.info(f"Created full-text index {fts_table} on {table}")
+
+    return True
+
+
+def rebuild_sqlite_search_index(conn) -> None:
+    """Re-index every existing FTS5 table from its source table.
+
+    comments and videos have TEXT primary keys, so the FTS5 tables follow
+    their implicit rowids. VACUUM may renumber those, after which searches
+    return the wrong rows until the index is rebuilt. The caller owns the
+    transaction and commits.
+
+    Args:
+        conn: sqlite3 connection
+    """
+    for table, (fts_table, _) in SQLITE_FTS_TABLES.items():
+        if sqlite_search_index_exists(conn, table):
+            conn.execute(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')")
+
+
+def ensure_postgres_search_index(conn) -> bool:
+    """Add generated tsvector columns with GIN indexes if missing.
+
+    Requires PostgreSQL 12+ for generated columns. Runs inside a savepoint so
+    a failure leaves the caller's transaction usable; the caller commits.
+
+    Args:
+        conn: psycopg2 connection
+
+    Returns:
+        True if the index is available
+    """
+    cursor = conn.cursor()
+    cursor.execute("SAVEPOINT fulltext_index")
+    try:
+        for table, (column, sources) in POSTGRES_TSVECTOR_COLUMNS.items():
+            vector = ' || '.join(
+                f"setweight(to_tsvector('{POSTGRES_TS_CONFIG}', coalesce({source}, '')), '{weight}')"
+                for source, weight in sources
+            )
+            cursor.execute(f"""
+                ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} tsvector
+                GENERATED ALWAYS AS ({vector}) STORED
+            """)
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{table}_{column} ON {table} USING GIN ({column})"
+            )
+        cursor.execute("RELEASE SAVEPOINT fulltext_index")
+        return True
+    except Exception as e:
+        cursor.execute("ROLLBACK TO SAVEPOINT fulltext_index")
+        logger.warning(f"Postgres full-text index unavailable - search falls back to LIKE: {e}")
+        return False
+    finally:
+        cursor.close()
+
+
+def postgres_search_index_exists(conn, table: str = 'comments') -> bool:
+    """Check whether the generated tsvector column for a table exists.
+
+    Args:
+        conn: psycopg2 connection
+        table: Source table name
+
+    Returns:
+        True if the search column exists
+    """
+    column = POSTGRES_TSVECTOR_COLUMNS[table][0]
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "SELECT 1 FROM information_schema.columns WHERE table_name = %s AND column_name = %s",
+            (table, column)
+        )
+        return cursor.fetchone() is not None
+    finally:
+        cursor.close()
@@ -1,9 +1,8 @@
-import json
 import os
-from datetime import datetime
 from pathlib import Path
 from typing import List, Set, Dict, Any, Optional, Union
 
+from .. import serialization
 from ..models.data_models import Video, Comment
 from .storage_adapter import StorageAdapter
 
@@ -50,16 +49,16 @@ class JSONAdapter(StorageAdapter):
             with open(self.videos_file, 'r', encoding='utf-8') as f:
                 for line in f:
                     try:
-                        video = json.loads(line)
+                        video = serialization.loads(line)
                         self._saved_video_ids.add(video['video_id'])
-                    except json.JSONDecodeError:
+                    except ValueError:
                         continue
         else:
             try:
-                with open(self.videos_file, 'r', encoding='utf-8') as f:
-                    videos = json.load(f)
+                with open(self.videos_file, 'rb') as f:
+                    videos = serialization.loads(f.read())
                     self._saved_video_ids = {v['video_id'] for v in videos}
-            except (json.JSONDecodeError, FileNotFoundError):
+            except (ValueError, FileNotFoundError):
                 self._saved_video_ids = set()
     
     def _load_comment_counts(self) -> None:
@@ -74,43 +73,38 @@ class JSONAdapter(StorageAdapter):
             with open(self.comments_file, 'r', encoding='utf-8') as f:
                 for line in f:
                     try:
-                        comment = json.loads(line)
+                        comment = serialization.loads(line)
                         video_id = comment['video_id']
                         comment_counts[video_id] = comment_counts.get(video_id, 0) + 1
                         total_count += 1
-                    except json.JSONDecodeError:
+                    except ValueError:
                         continue
         else:
             try:
-                with open(self.comments_file, 'r', encoding='utf-8') as f:
-                    comments = json.load(f)
+                with open(self.comments_file, 'rb') as f:
+                    comments = serialization.loads(f.read())
                     for comment in comments:
                         video_id = comment['video_id']
                         comment_counts[video_id] = comment_counts.get(video_id, 0) + 1
                         total_count += 1
-            except (json.JSONDecodeError, FileNotFoundError):
+            except (ValueError, FileNotFoundError):
                 pass
         
         self._comment_counts = comment_counts
         self._total_comment_count = total_count
     
     def _model_to_dict(self, model: Union[Video, Comment]) -> Dict[str, Any]:
-        """Convert model to dictionary with serializable values.
+        """Convert model to dictionary.
+        
+        Datetimes are left as-is; the serializer writes them as ISO 8601.
         
         Args:
             model: Pydantic model
             
         Returns:
-            Dictionary with serialized values
+            Dictionary of field values
         """
-        data = model.model_dump()
-        
-        # Convert datetime objects to ISO format strings
-        for key, value in data.items():
-            if isinstance(value, datetime):
-                data[key] = value.isoformat()
-        
-        return data
+        return model.model_dump()
     
     def save_videos(self, videos: List[Video]) -> None:
         """Save videos to JSON file.
@@ -126,19 +120,19 @@ class JSONAdapter(StorageAdapter):
         
         if self.use_jsonl:
             # Append to JSONL file
-            with open(self.videos_file, 'a', encoding='utf-8') as f:
+            with open(self.videos_file, 'ab') as f:
                 for video in video_dicts:
                     # Update cache
                     self._saved_video_ids.add(video['video_id'])
-                    f.write(json.dumps(video) + '\n')
+                    f.write(serialization.dumpb(video) + b'\n')
         else:
             # Load existing data, update, and save
             existing_videos = []
             if self.videos_file.exists():
                 try:
-                    with open(self.videos_file, 'r', encoding='utf-8') as f:
-                        existing_videos = json.load(f)
-                except json.JSONDecodeError:
+                    with open(self.videos_file, 'rb') as f:
+                        existing_videos = serialization.loads(f.read())
+                except ValueError:
                     existing_videos = []
             
             # Create lookup of existing videos
@@ -150,8 +144,8 @@ class JSONAdapter(StorageAdapter):
                 self._saved_video_ids.add(video['video_id'])
             
             # Write back to file
-            with open(self.videos_file, 'w', encoding='utf-8') as f:
-                json.dump(list(existing_video_dict.values()), f, ensure_ascii=False, indent=2)
+            with open(self.videos_file, 'wb') as f:
+                f.write(serialization.dumpb(list(existing_video_dict.values()), indent=True))
     
     def save_comments(self, comments: List[Comment]) -> None:
         """Save comments to JSON file.
@@ -167,21 +161,21 @@ class JSONAdapter(StorageAdapter):
         
         if self.use_jsonl:
             # Append to JSONL file
-            with open(self.comments_file, 'a', encoding='utf-8') as f:
+            with open(self.comments_file, 'ab') as f:
                 for comment in comment_dicts:
                     # Update cache
                     video_id = comment['video_id']
                     self._comment_counts[video_id] = self._comment_counts.get(video_id, 0) + 1
                     self._total_comment_count += 1
-                    f.write(json.dumps(comment) + '\n')
+                    f.write(serialization.dumpb(comment) + b'\n')
         else:
             # Load existing data, update, and save
             existing_comments = []
             if self.comments_file.exists():
                 try:
-                    with open(self.comments_file, 'r', encoding='utf-8') as f:
-                        existing_comments = json.load(f)
-                except json.JSONDecodeError:
+                    with open(self.comments_file, 'rb') as f:
+                        existing_comments = serialization.loads(f.read())
+                except ValueError:
                     existing_comments = []
             
             # Create lookup of existing comments
@@ -198,8 +192,8 @@ class JSONAdapter(StorageAdapter):
                 existing_comment_dict[comment['comment_id']] = comment
             
             # Write back to file
-            with open(self.comments_file, 'w', encoding='utf-8') as f:
-                json.dump(list(existing_comment_dict.values()), f, ensure_ascii=False, indent=2)
+            with open(self.comments_file, 'wb') as f:
+                f.write(serialization.dumpb(list(existing_comment_dict.values()), indent=True))
     
     def get_saved_video_ids(self) -> Set[str]:
         """Get IDs of videos that have already been saved.
@@ -0,0 +1,645 @@
+import logging
+from datetime import datetime
+from typing import Callable, List, NamedTuple
+
+from . import analytics, author_stats, change_log, change_tracking, data_version, fulltext, reply_counts, timestamps, trigram, video_stats
+from .sql_helpers import rebuild_aggregates
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary key for pg_advisory_xact_lock so concurrent workers migrate one at a time
+POSTGRES_MIGRATION_LOCK_ID = 7351902
+
+# First schema version with comments.change_seq
+CHANGE_SEQ_VERSION = 14
+
+# Columns the web app reads, added to databases created by older schemas
+COMMENT_COLUMNS = {
+    'updated_at': ('TEXT', 'TIMESTAMP'),
+    'channel_owner_liked': ('INTEGER DEFAULT 0', 'BOOLEAN DEFAULT FALSE'),
+}
+VIDEO_COLUMNS = {
+    'duration': ('TEXT', 'VARCHAR(50)'),
+    'tags': ('TEXT', 'TEXT'),
+    'category_id': ('TEXT', 'VARCHAR(50)'),
+    'channel_title': ('TEXT', 'VARCHAR(255)'),
+    'thumbnail_url': ('TEXT', 'TEXT'),
+    'language': ('TEXT', 'VARCHAR(10)'),
+}
+
+
+class Migration(NamedTuple):
+    """A numbered schema change with one implementation per dialect."""
+
+    version: int
+    description: str
+    sqlite: Callable
+    postgres: Callable
+
+
+def _sqlite_columns(conn, table: str) -> List[str]:
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})").fetchall()]
+
+
+def _create_base_tables_sqlite(conn) -> None:
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS videos (
+            video_id TEXT PRIMARY KEY,
+            title TEXT,
+            description TEXT,
+            published_at TEXT,
+            duration TEXT,
+            view_count INTEGER,
+            like_count INTEGER,
+            comment_count INTEGER,
+            tags TEXT,
+            category_id TEXT,
+            channel_title TEXT,
+            thumbnail_url TEXT,
+            language TEXT
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS comments (
+            comment_id TEXT PRIMARY KEY,
+            video_id TEXT,
+            parent_comment_id TEXT,
+            author TEXT,
+            text TEXT,
+            published_at TEXT,
+            updated_at TEXT,
+            like_count INTEGER,
+            is_reply INTEGER DEFAULT 0,
+            channel_owner_liked INTEGER DEFAULT 0,
+            FOREIGN KEY (video_id) REFERENCES videos (video_id)
+        )
+    """)
+
+
+def _create_base_tables_postgres(cursor) -> None:
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS videos (
+            video_id VARCHAR(255) PRIMARY KEY,
+            title TEXT,
+            description TEXT,
+            published_at TIMESTAMP,
+            duration VARCHAR(50),
+            view_count BIGINT,
+            like_count BIGINT,
+            comment_count BIGINT,
+            tags TEXT,
+            category_id VARCHAR(50),
+            channel_title VARCHAR(255),
+            thumbnail_url TEXT,
+            language VARCHAR(10)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS comments (
+            comment_id VARCHAR(255) PRIMARY KEY,
+            video_id VARCHAR(255),
+            parent_comment_id VARCHAR(255),
+            author VARCHAR(255),
+            text TEXT,
+            published_at TIMESTAMP,
+            updated_at TIMESTAMP,
+            like_count INTEGER,
+            is_reply BOOLEAN DEFAULT FALSE,
+            channel_owner_liked BOOLEAN DEFAULT FALSE,
+            FOREIGN KEY (video_id) REFERENCES videos (video_id)
+        )
+    """)
+
+
+def _add_missing_columns_sqlite(conn) -> None:
+    for table, columns in (('comments', COMMENT_COLUMNS), ('videos', VIDEO_COLUMNS)):
+        existing = _sqlite_columns(conn, table)
+        for column, (sqlite_type, _) in columns.items():
+            if column not in existing:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {sqlite_type}")
+
+
+def _add_missing_columns_postgres(cursor) -> None:
+    for table, columns in (('comments', COMMENT_COLUMNS), ('videos', VIDEO_COLUMNS)):
+        for column, (_, postgres_type) in columns.items():
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} {postgres_type}")
+
+
+def _normalize_top_level_sqlite(conn) -> None:
+    # Top-level comments are stored with a NULL parent so the partial index applies
+    conn.execute("UPDATE comments SET parent_comment_id = NULL WHERE parent_comment_id = ''")
+
+
+def _normalize_top_level_postgres(cursor) -> None:
+    cursor.execute("UPDATE comments SET parent_comment_id = NULL WHERE parent_comment_id = ''")
+
+
+# Indexes matching the web app's query shapes:
+# - replies for a page of parents, in thread order
+# - top-level comments of a video sorted by date, author or likes
+# - hearted comments of a video
+_QUERY_INDEXES = [
+    ("idx_comments_video_parent_published",
+     "comments (video_id, parent_comment_id, published_at)", None),
+    ("idx_comments_video_like_count",
+     "comments (video_id, like_count)", None),
+    ("idx_comments_top_level_published",
+     "comments (video_id, published_at, comment_id)", "parent_comment_id IS NULL"),
+    ("idx_comments_top_level_like_count",
+     "comments (video_id, like_count, comment_id)", "parent_comment_id IS NULL"),
+    ("idx_comments_top_level_author",
+     "comments (video_id, author, comment_id)", "parent_comment_id IS NULL"),
+    ("idx_comments_channel_owner_liked",
+     "comments (video_id, published_at)", {'sqlite': "channel_owner_liked = 1",
+                                          'postgres': "channel_owner_liked"}),
+    ("idx_videos_published_at", "videos (published_at)", None),
+]
+
+
+# Migration 11: date sorts and range filters read the integer published_ts
+# columns; these replace the published_at indexes serving the same query
+# shapes. Top-level pages use the parent index with parent_comment_id IS NULL
+# as its equality. Like every list a migration applies, these are frozen:
+# later index changes go in a new migration with a list of its own
+_EPOCH_INDEXES = [
+    ("idx_comments_video_published_ts",
+     "comments (video_id, published_ts, comment_id)", None),
+    ("idx_comments_video_parent_published_ts",
+     "comments (video_id, parent_comment_id, published_ts, comment_id)", None),
+    ("idx_comments_author_published_ts",
+     "comments (author, published_ts, comment_id)", None),
+    ("idx_videos_published_ts", "videos (published_ts, video_id)", None),
+]
+_SUPERSEDED_BY_EPOCH_INDEXES = [
+    "idx_comments_top_level_published",
+    "idx_comments_video_parent_published",
+    "idx_comments_author_published",
+    "idx_videos_published_at",
+]
+
+# Migration 19: the hearted-comments index, left on published_at by migration 11
+_HEARTED_EPOCH_INDEXES = [
+    ("idx_comments_channel_owner_liked_ts",
+     "comments (video_id, published_ts)", {'sqlite': "channel_owner_liked = 1",
+                                          'postgres': "channel_owner_liked"}),
+]
+_SUPERSEDED_BY_HEARTED_EPOCH_INDEXES = [
+    "idx_comments_channel_owner_liked",
+]
+
+
+# Keyset pages order by COALESCE(column, default) so rows with a NULL sort
+# value stay reachable; an index serves that ORDER BY only when it is built
+# on the same expression. Like the epoch indexes, top-level pages use
+# parent_comment_id IS NULL as an equality; range filters keep using the
+# plain column indexes
+_SORT_KEY_INDEXES = [
+    ("idx_comments_video_parent_sort_published",
+     "comments (video_id, parent_comment_id, COALESCE(published_ts, 0), comment_id)", None),
+    ("idx_comments_video_parent_sort_likes",
+     "comments (video_id, parent_comment_id, COALESCE(like_count, 0), comment_id)", None),
+    ("idx_comments_video_parent_sort_author",
+     "comments (video_id, parent_comment_id, COALESCE(author, ''), comment_id)", None),
+    ("idx_comments_author_sort_published",
+     "comments (author, COALESCE(published_ts, 0), comment_id)", None),
+    ("idx_videos_sort_published", "videos (COALESCE(published_ts, 0), video_id)", None),
+]
+_SUPERSEDED_BY_SORT_KEY_INDEXES = [
+    "idx_comments_top_level_like_count",
+    "idx_comments_top_level_author",
+]
+
+
+def _query_index_statements(dialect: str, indexes=_QUERY_INDEXES) -> List[str]:
+    statements = []
+    for name, target, where in indexes:
+        if isinstance(where, dict):
+            where = where[dialect]
+        sql = f"CREATE INDEX IF NOT EXISTS {name} ON {target}"
+        if where:
+            sql += f" WHERE {where}"
+        statements.append(sql)
+    return statements
+
+
+def _create_query_indexes_sqlite(conn) -> None:
+    for sql in _query_index_statements('sqlite'):
+        conn.execute(sql)
+
+
+def _create_query_indexes_postgres(cursor) -> None:
+    for sql in _query_index_statements('postgres'):
+        cursor.execute(sql)
+
+
+def _create_fulltext_index_sqlite(conn) -> None:
+    fulltext.ensure_sqlite_search_index(conn)
+
+
+def _create_fulltext_index_postgres(cursor) -> None:
+    fulltext.ensure_postgres_search_index(cursor.connection)
+
+
+def _create_meta_table_sqlite(conn) -> None:
+    data_version.create_meta_table(conn.cursor(), 'sqlite')
+
+
+def _create_meta_table_postgres(cursor) -> None:
+    data_version.create_meta_table(cursor, 'postgres')
+
+
+# Migrations 7, 9 and 10 fill the totals as they were first defined, with
+# first/last times taken from published_at; the epoch columns don't exist
+# until migration 11. The SQL is frozen here rather than shared with the
+# writers, whose aggregates have moved on. Migration 16 (_rebuild_totals)
+# recomputes the same totals from published_ts
+_V7_VIDEO_STATS_COLUMNS = [
+    'video_id', 'top_level_count', 'reply_count', 'total_likes',
+    'hearted_count', 'first_comment_at', 'last_comment_at', 'refreshed_at'
+]
+_V7_VIDEO_STATS_AGGREGATES = [
+    "SUM(CASE WHEN parent_comment_id IS NULL THEN 1 ELSE 0 END)",
+    "SUM(CASE WHEN parent_comment_id IS NULL THEN 0 ELSE 1 END)",
+    "COALESCE(SUM(like_count), 0)",
+    "SUM(CASE WHEN channel_owner_liked THEN 1 ELSE 0 END)",
+    "MIN(published_at)",
+    "MAX(published_at)",
+]
+_V9_REPLY_COUNTS_SQL = """
+    UPDATE comments SET
+        reply_count = (
+            SELECT COUNT(*) FROM comments r
+            WHERE r.video_id = comments.video_id AND r.parent_comment_id = comments.comment_id
+        ),
+        last_reply_at = (
+            SELECT MAX(r.published_at) FROM comments r
+            WHERE r.video_id = comments.video_id AND r.parent_comment_id = comments.comment_id
+        )
+    WHERE parent_comment_id IS NULL
+"""
+_V10_AUTHOR_COLUMNS = [
+    'author', 'comment_count', 'reply_count', 'total_likes',
+    'video_count', 'first_seen_at', 'last_seen_at', 'refreshed_at'
+]
+_V10_AUTHOR_AGGREGATES = [
+    "COUNT(*)",
+    "SUM(CASE WHEN parent_comment_id IS NULL THEN 0 ELSE 1 END)",
+    "COALESCE(SUM(like_count), 0)",
+    "COUNT(DISTINCT video_id)",
+    "MIN(published_at)",
+    "MAX(published_at)",
+]
+
+
+def _create_video_stats(cursor, dialect: str) -> None:
+    video_stats.create_stats_table(cursor, dialect)
+    rebuild_aggregates(cursor, 'video_stats', _V7_VIDEO_STATS_COLUMNS, _V7_VIDEO_STATS_AGGREGATES, dialect)
+
+
+def _create_video_stats_sqlite(conn) -> None:
+    _create_video_stats(conn.cursor(), 'sqlite')
+
+
+def _create_video_stats_postgres(cursor) -> None:
+    _create_video_stats(cursor, 'postgres')
+
+
+def _create_rollup_table_sqlite(conn) -> None:
+    analytics.create_rollup_table(conn.cursor(), 'sqlite')
+
+
+def _create_rollup_table_postgres(cursor) -> None:
+    analytics.create_rollup_table(cursor, 'postgres')
+
+
+def _add_reply_counts_sqlite(conn) -> None:
+    existing = _sqlite_columns(conn, 'comments')
+    for column, (sqlite_type, _) in reply_counts.REPLY_COLUMNS.items():
+        if column not in existing:
+            conn.execute(f"ALTER TABLE comments ADD COLUMN {column} {sqlite_type}")
+    fulltext.narrow_sqlite_update_triggers(conn)
+    conn.execute(_V9_REPLY_COUNTS_SQL)
+
+
+def _add_reply_counts_postgres(cursor) -> None:
+    for column, (_, postgres_type) in reply_counts.REPLY_COLUMNS.items():
+        cursor.execute(f"ALTER TABLE comments ADD COLUMN IF NOT EXISTS {column} {postgres_type}")
+    cursor.execute(_V9_REPLY_COUNTS_SQL)
+
+
+# Per-author comment pages in time order. Migration 11 replaces this with
+# idx_comments_author_published_ts once the epoch columns exist
+_AUTHOR_INDEXES = [
+    ("idx_comments_author_published",
+     "comments (author, published_at, comment_id)", None),
+]
+
+
+def _create_authors(cursor, dialect: str) -> None:
+    author_stats.create_authors_table(cursor, dialect)
+    for sql in _query_index_statements(dialect, _AUTHOR_INDEXES):
+        cursor.execute(sql)
+    rebuild_aggregates(cursor, 'authors', _V10_AUTHOR_COLUMNS, _V10_AUTHOR_AGGREGATES, dialect)
+
+
+def _create_authors_sqlite(conn) -> None:
+    _create_authors(conn.cursor(), 'sqlite')
+
+
+def _create_authors_postgres(cursor) -> None:
+    _create_authors(cursor, 'postgres')
+
+
+def _add_epoch_columns_sqlite(conn) -> None:
+    cursor = conn.cursor()
+    for table, columns in timestamps.EPOCH_COLUMNS.items():
+        existing = _sqlite_columns(conn, table)
+        for column in columns:
+            if column not in existing:
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {timestamps.EPOCH_TYPE[0]}")
+        timestamps.backfill_epoch_columns(cursor, table, 'sqlite')
+    for sql in _query_index_statements('sqlite', _EPOCH_INDEXES):
+        cursor.execute(sql)
+    for name in _SUPERSEDED_BY_EPOCH_INDEXES:
+        cursor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+def _add_epoch_columns_postgres(cursor) -> None:
+    for table, columns in timestamps.EPOCH_COLUMNS.items():
+        for column in columns:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} {timestamps.EPOCH_TYPE[1]}")
+        timestamps.backfill_epoch_columns(cursor, table, 'postgres')
+    for sql in _query_index_statements('postgres', _EPOCH_INDEXES):
+        cursor.execute(sql)
+    for name in _SUPERSEDED_BY_EPOCH_INDEXES:
+        cursor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+def _create_hearted_epoch_index_sqlite(conn) -> None:
+    for sql in _query_index_statements('sqlite', _HEARTED_EPOCH_INDEXES):
+        conn.execute(sql)
+    for name in _SUPERSEDED_BY_HEARTED_EPOCH_INDEXES:
+        conn.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+def _create_hearted_epoch_index_postgres(cursor) -> None:
+    for sql in _query_index_statements('postgres', _HEARTED_EPOCH_INDEXES):
+        cursor.execute(sql)
+    for name in _SUPERSEDED_BY_HEARTED_EPOCH_INDEXES:
+        cursor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+def _create_trigram_index_sqlite(conn) -> None:
+    trigram.ensure_sqlite_trigram_index(conn)
+
+
+def _create_trigram_index_postgres(cursor) -> None:
+    trigram.ensure_postgres_trigram_index(cursor.connection)
+
+
+def _create_change_log_sqlite(conn) -> None:
+    change_log.create_change_log(conn.cursor(), 'sqlite')
+
+
+def _create_change_log_postgres(cursor) -> None:
+    change_log.create_change_log(cursor, 'postgres')
+
+
+def _add_change_seq_sqlite(conn) -> None:
+    change_tracking.ensure_sqlite_change_tracking(conn, _sqlite_columns(conn, 'comments'))
+
+
+def _add_change_seq_postgres(cursor) -> None:
+    change_tracking.ensure_postgres_change_tracking(cursor)
+
+
+def _add_change_counters_sqlite(conn) -> None:
+    # SQLite runs one writer at a time, so the next change_seq can't be
+    # handed out twice
+    pass
+
+
+def _add_change_counters_postgres(cursor) -> None:
+    change_tracking.ensure_postgres_change_counters(cursor)
+
+
+def _clear_rollups_sqlite(conn) -> None:
+    # Rollups were tagged with the global data version; writers and readers
+    # recompute them under per-scope versions
+    conn.execute("DELETE FROM stats_rollups")
+
+
+def _clear_rollups_postgres(cursor) -> None:
+    cursor.execute("DELETE FROM stats_rollups")
+
+
+def _create_sort_key_indexes_sqlite(conn) -> None:
+    for sql in _query_index_statements('sqlite', _SORT_KEY_INDEXES):
+        conn.execute(sql)
+    for name in _SUPERSEDED_BY_SORT_KEY_INDEXES:
+        conn.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+def _create_sort_key_indexes_postgres(cursor) -> None:
+    for sql in _query_index_statements('postgres', _SORT_KEY_INDEXES):
+        cursor.execute(sql)
+    for name in _SUPERSEDED_BY_SORT_KEY_INDEXES:
+        cursor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+def _rebuild_totals(cursor, dialect: str) -> None:
+    video_stats.rebuild_video_stats(cursor, dialect)
+    reply_counts.rebuild_reply_counts(cursor, dialect)
+    author_stats.rebuild_authors(cursor, dialect)
+
+
+def _rebuild_totals_sqlite(conn) -> None:
+    _rebuild_totals(conn.cursor(), 'sqlite')
+
+
+def _rebuild_totals_postgres(cursor) -> None:
+    _rebuild_totals(cursor, 'postgres')
+
+
+MIGRATIONS = [
+    Migration(1, "Base videos and comments tables",
+              _create_base_tables_sqlite, _create_base_tables_postgres),
+    Migration(2, "Add web app columns missing from older schemas",
+              _add_missing_columns_sqlite, _add_missing_columns_postgres),
+    Migration(3, "Store top-level comments with a NULL parent",
+              _normalize_top_level_sqlite, _normalize_top_level_postgres),
+    Migration(4, "Composite and partial indexes for comment queries",
+              _create_query_indexes_sqlite, _create_query_indexes_postgres),
+    Migration(5, "Full-text search index",
+              _create_fulltext_index_sqlite, _create_fulltext_index_postgres),
+    Migration(6, "Data version counter for cache validation",
+              _create_meta_table_sqlite, _create_meta_table_postgres),
+    Migration(7, "Per-video comment totals",
+              _create_video_stats_sqlite, _create_video_stats_postgres),
+    Migration(8, "Materialized comment statistics",
+              _create_rollup_table_sqlite, _create_rollup_table_postgres),
+    Migration(9, "Denormalized reply counts on top-level comments",
+              _add_reply_counts_sqlite, _add_reply_counts_postgres),
+    Migration(10, "Author index and per-author totals",
+              _create_authors_sqlite, _create_authors_postgres),
+    Migration(11, "Epoch timestamp columns and indexes",
+              _add_epoch_columns_sqlite, _add_epoch_columns_postgres),
+    Migration(12, "Trigram indexes on video titles and author names",
+              _create_trigram_index_sqlite, _create_trigram_index_postgres),
+    Migration(13, "Append-only log of newly stored comments",
+              _create_change_log_sqlite, _create_change_log_postgres),
+    Migration(CHANGE_SEQ_VERSION, "Per-video change sequence on comments",
+              _add_change_seq_sqlite, _add_change_seq_postgres),
+    Migration(15, "Tag stats rollups with per-scope versions",
+              _clear_rollups_sqlite, _clear_rollups_postgres),
+    Migration(16, "Recompute first and last comment times from epoch columns",
+              _rebuild_totals_sqlite, _rebuild_totals_postgres),
+    Migration(17, "Per-video change counters for concurrent Postgres writers",
+              _add_change_counters_sqlite, _add_change_counters_postgres),
+    Migration(18, "Indexes on NULL-safe sort keys for cursor pages",
+              _create_sort_key_indexes_sqlite, _create_sort_key_indexes_postgres),
+    Migration(19, "Hearted comments index on epoch timestamps",
+              _create_hearted_epoch_index_sqlite, _create_hearted_epoch_index_postgres),
+]
+
+
+def latest_version() -> int:
+    """Get the schema version the code expects.
+
+    Returns:
+        Highest migration version
+    """
+    return MIGRATIONS[-1].version
+
+
+def _sqlite_current_version(conn) -> int:
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schema_version'"
+    ).fetchone()
+    if exists is None:
+        return 0
+    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] or 0
+
+
+def _postgres_current_version(cursor) -> int:
+    cursor.execute("SELECT to_regclass('schema_version')")
+    if cursor.fetchone()[0] is None:
+        return 0
+    cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+    return cursor.fetchone()[0]
+
+
+def current_version(conn, dialect: str = 'sqlite') -> int:
+    """Read the schema version a database is at, without taking any locks.
+
+    Args:
+        conn: sqlite3 or psycopg2 connection
+        dialect: 'sqlite' or 'postgres'
+
+    Returns:
+        Highest applied migration version, 0 for an unversioned database
+    """
+    if dialect == 'sqlite':
+        return _sqlite_current_version(conn)
+    cursor = conn.cursor()
+    try:
+        return _postgres_current_version(cursor)
+    finally:
+        cursor.close()
+
+
+def migrate_sqlite(conn) -> int:
+    """Bring a SQLite database up to the latest schema version.
+
+    Pending migrations run in one IMMEDIATE transaction, so concurrent
+    processes serialize on the write lock and each migration applies once.
+    An up-to-date database is detected without taking the write lock.
+
+    Args:
+        conn: sqlite3 connection
+
+    Returns:
+        Number of migrations applied
+    """
+    if _sqlite_current_version(conn) >= latest_version():
+        return 0
+
+    previous_isolation = conn.isolation_level
+    conn.isolation_level = None
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INTEGER PRIMARY KEY,
+                    description TEXT,
+                    applied_at TEXT
+                )
+            """)
+            # Re-read under the lock in case another process just migrated
+            current = _sqlite_current_version(conn)
+            pending = [m for m in MIGRATIONS if m.version > current]
+            for migration in pending:
+                logger.info(f"Applying migration {migration.version}: {migration.description}")
+                migration.sqlite(conn)
+                conn.execute(
+                    "INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)",
+                    (migration.version, migration.description, datetime.now().isoformat())
+                )
+            if pending:
+                # Schema changes can alter responses, so invalidate cached ones
+                data_version.bump_data_version(conn.cursor(), 'sqlite')
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        if pending:
+            conn.execute("ANALYZE")
+        return len(pending)
+    finally:
+        conn.isolation_level = previous_isolation
+
+
+def migrate_postgres(conn) -> int:
+    """Bring a PostgreSQL database up to the latest schema version.
+
+    Migrations run in one transaction guarded by an advisory lock.
+
+    Args:
+        conn: psycopg2 connection
+
+    Returns:
+        Number of migrations applied
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT pg_advisory_xact_lock(%s)", (POSTGRES_MIGRATION_LOCK_ID,))
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                description TEXT,
+                applied_at TIMESTAMP
+            )
+        """)
+        cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+        current = cursor.fetchone()[0]
+        pending = [m for m in MIGRATIONS if m.version > current]
+        for migration in pending:
+            logger.info(f"Applying migration {migration.version}: {migration.description}")
+            migration.postgres(cursor)
+            cursor.execute(
+                "INSERT INTO schema_version (version, description, applied_at) VALUES (%s, %s, %s)",
+                (migration.version, migration.description, datetime.now())
+            )
+        if pending:
+            data_version.bump_data_version(cursor, 'postgres')
+            cursor.execute("ANALYZE")
+        conn.commit()
+        return len(pending)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
@@ -0,0 +1,74 @@
+from typing import Dict, Iterable, List, Set
+
+from . import timestamps
+from .sql_helpers import batched, placeholder
+
+# Denormalized thread totals on top-level comments, kept current by the
+# writers so listings can show "N replies" without loading the replies
+REPLY_COLUMNS = {
+    'reply_count': ('INTEGER NOT NULL DEFAULT 0', 'INTEGER NOT NULL DEFAULT 0'),
+    'last_reply_at': ('TEXT', 'TIMESTAMP'),
+}
+
+# Correlating on video_id lets the (video_id, parent_comment_id, published_ts)
+# index find each thread's replies for both subqueries. The latest reply is
+# taken from the epoch column; the text column's formats don't sort
+_REFRESH_SQL = """
+    UPDATE comments SET
+        reply_count = (
+            SELECT COUNT(*) FROM comments r
+            WHERE r.video_id = comments.video_id AND r.parent_comment_id = comments.comment_id
+        ),
+        last_reply_at = (
+            SELECT {last_reply} FROM comments r
+            WHERE r.video_id = comments.video_id AND r.parent_comment_id = comments.comment_id
+        )
+    WHERE parent_comment_id IS NULL
+"""
+
+
+def _refresh_sql(dialect: str) -> str:
+    return _REFRESH_SQL.format(last_reply=timestamps.from_epoch_sql('MAX(r.published_ts)', dialect))
+
+
+def thread_ids(rows: Iterable[Dict]) -> Set[str]:
+    """Get the top-level comments whose threads a batch of written rows touches.
+
+    Args:
+        rows: Comment rows with comment_id and parent_comment_id
+
+    Returns:
+        IDs of the parents of written replies and of written top-level comments
+    """
+    ids = set()
+    for row in rows:
+        ids.add(row['parent_comment_id'] or row['comment_id'])
+    return ids
+
+
+def refresh_reply_counts(cursor, comment_ids: Iterable[str], dialect: str = 'sqlite') -> None:
+    """Recompute reply_count and last_reply_at for the given top-level comments.
+
+    Call inside the writer's transaction, after the comments are written.
+    IDs of replies are ignored.
+
+    Args:
+        cursor: Database cursor
+        comment_ids: Top-level comments to refresh, usually from thread_ids()
+        dialect: 'sqlite' or 'postgres'
+    """
+    p = placeholder(dialect)
+    comment_ids: List[str] = sorted(set(comment_ids))
+    for batch in batched(comment_ids):
+        placeholders = ', '.join([p] * len(batch))
+        cursor.execute(_refresh_sql(dialect) + f" AND comment_id IN ({placeholders})", batch)
+
+
+def rebuild_reply_counts(cursor, dialect: str = 'sqlite') -> None:
+    """Recompute reply_count and last_reply_at for every top-level comment.
+
+    Args:
+        cursor: Database cursor
+        dialect: 'sqlite' or 'postgres'
+    """
+    cursor.execute(_refresh_sql(dialect))
@@ -0,0 +1,90 @@
+import time
+from typing import Iterable, Iterator, List, Sequence
+
+# Most values bound in one IN (...) list. SQLite builds before 3.32 reject
+# statements with more than 999 parameters, and a statement may bind a few
+# more values beside the list, so batches stay well below that
+IN_BATCH_SIZE = 500
+
+
+def batched(values: Sequence, size: int = IN_BATCH_SIZE) -> Iterator[List]:
+    """Split values into lists short enough for one IN (...) clause.
+
+    Args:
+        values: IDs or keys, in the order they should be queried
+        size: Largest batch, IN_BATCH_SIZE unless the caller binds them otherwise
+
+    Yields:
+        Consecutive slices of values as lists
+    """
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def placeholder(dialect: str) -> str:
+    """Parameter marker of the dialect's driver: '?' for SQLite, '%s' for Postgres"""
+    return '%s' if dialect == 'postgres' else '?'
+
+
+def upsert_aggregates(cursor, table: str, columns: Sequence[str], aggregates: Sequence[str],
+                      where: str, params: Sequence, dialect: str = 'sqlite') -> None:
+    """Write one row per key of an aggregate table from a grouped comments query.
+
+    Args:
+        cursor: Database cursor
+        table: Aggregate table, keyed on columns[0]
+        columns: The key, one column per aggregate, then refreshed_at
+        aggregates: SQL expressions over comments, in column order
+        where: Condition choosing the comments to aggregate
+        params: Parameters of where
+        dialect: 'sqlite' or 'postgres'
+    """
+    key = columns[0]
+    updates = ', '.join(f"{column} = excluded.{column}" for column in columns[1:])
+    # Always a WHERE: SQLite needs one before ON CONFLICT to parse INSERT ... SELECT upserts
+    cursor.execute(
+        f"INSERT INTO {table} ({', '.join(columns)}) "
+        f"SELECT {key}, {', '.join(aggregates)}, {placeholder(dialect)} FROM comments "
+        f"WHERE {where} GROUP BY {key} "
+        f"ON CONFLICT ({key}) DO UPDATE SET {updates}",
+        [int(time.time())] + list(params)
+    )
+
+
+def refresh_aggregates(cursor, table: str, columns: Sequence[str], aggregates: Sequence[str],
+                       keys: Iterable, dialect: str = 'sqlite') -> None:
+    """Recompute the rows of the given keys from their own comments.
+
+    Rows of keys that no longer have comments are deleted. None keys are
+    skipped.
+
+    Args:
+        cursor: Database cursor
+        table: Aggregate table, keyed on columns[0]
+        columns: As for upsert_aggregates
+        aggregates: As for upsert_aggregates
+        keys: Key values whose comments were written
+        dialect: 'sqlite' or 'postgres'
+    """
+    key = columns[0]
+    p = placeholder(dialect)
+    for batch in batched(sorted(set(value for value in keys if value is not None))):
+        placeholders = ', '.join([p] * len(batch))
+        cursor.execute(f"DELETE FROM {table} WHERE {key} IN ({placeholders})", batch)
+        upsert_aggregates(cursor, table, columns, aggregates, f"{key} IN ({placeholders})", batch, dialect)
+
+
+def rebuild_aggregates(cursor, table: str, columns: Sequence[str], aggregates: Sequence[str],
+                       dialect: str = 'sqlite') -> None:
+    """Recompute every row of an aggregate table in one pass over comments.
+
+    Args:
+        cursor: Database cursor
+        table: Aggregate table, keyed on columns[0]
+        columns: As for upsert_aggregates
+        aggregates: As for upsert_aggregates
+        dialect: 'sqlite' or 'postgres'
+    """
+    cursor.execute(f"DELETE FROM {table}")
+    upsert_aggregates(cursor, table, columns, aggregates, f"{columns[0]} IS NOT NULL", [], dialect)
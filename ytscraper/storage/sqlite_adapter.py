@@ -7,6 +7,7 @@ from typing import List, Set, Dict, Any, Optional
 
 from ..models.data_models import Video, Comment
 from .storage_adapter import StorageAdapter
+from . import analytics, author_stats, change_log, data_version, fulltext, migrations, reply_counts, timestamps, video_stats
 
 
 class SQLiteAdapter(StorageAdapter):
@@ -24,6 +25,8 @@ class SQLiteAdapter(StorageAdapter):
         
         self.conn = None
         self.cursor = None
+        self._fulltext = False
+        self._touched_video_ids: Set[str] = set()
     
     def initialize(self) -> None:
         """Initialize SQLite database schema."""
@@ -83,6 +86,10 @@ class SQLiteAdapter(StorageAdapter):
         """)
         
         self.conn.commit()
+        
+        # Bring indexes and web app columns up to the shared schema version
+        migrations.migrate_sqlite(self.conn)
+        self._fulltext = fulltext.sqlite_search_index_exists(self.conn)
     
     def _video_to_row(self, video: Video) -> Dict[str, Any]:
         """Convert Video object to database row.
@@ -98,6 +105,7 @@ class SQLiteAdapter(StorageAdapter):
             'title': video.title,
             'description': video.description,
             'published_at': video.published_at,
+            'published_ts': timestamps.to_epoch(video.published_at),
             'channel_id': video.channel_id,
             'view_count': video.view_count,
             'like_count': video.like_count,
@@ -122,11 +130,33 @@ class SQLiteAdapter(StorageAdapter):
             'author_channel_id': comment.author_channel_id,
             'text': comment.text,
             'published_at': comment.published_at,
+            'published_ts': timestamps.to_epoch(comment.published_at),
             'like_count': comment.like_count,
             'is_reply': comment.is_reply,
             'scraped_at': comment.scraped_at
         }
     
+    def _upsert_sql(self, table: str, key: str, columns: List[str]) -> str:
+        """Build an INSERT ... ON CONFLICT DO UPDATE statement.
+        
+        Upserting updates rows in place, unlike INSERT OR REPLACE which deletes
+        and re-inserts them without firing the full-text index triggers.
+        
+        Args:
+            table: Table name
+            key: Primary key column
+            columns: Columns to insert
+            
+        Returns:
+            SQL statement with one placeholder per column
+        """
+        placeholders = ', '.join(['?'] * len(columns))
+        updates = ', '.join(f"{column} = excluded.{column}" for column in columns if column != key)
+        return (
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders}) "
+            f"ON CONFLICT({key}) DO UPDATE SET {updates}"
+        )
+    
     def save_videos(self, videos: List[Video]) -> None:
         """Save videos to SQLite database.
         
@@ -138,15 +168,11 @@ class SQLiteAdapter(StorageAdapter):
         
         video_rows = [self._video_to_row(video) for video in videos]
         
-        # Using INSERT OR REPLACE to update existing records
-        placeholders = ', '.join(['?'] * len(video_rows[0]))
-        columns = ', '.join(video_rows[0].keys())
-        
-        for video_row in video_rows:
-            self.cursor.execute(
-                f"INSERT OR REPLACE INTO videos ({columns}) VALUES ({placeholders})",
-                list(video_row.values())
-            )
+        self.cursor.executemany(
+            self._upsert_sql('videos', 'video_id', list(video_rows[0].keys())),
+            [list(video_row.values()) for video_row in video_rows]
+        )
+        data_version.bump_data_version(self.cursor)
         
         self.conn.commit()
     
@@ -161,15 +187,16 @@ class SQLiteAdapter(StorageAdapter):
         
         comment_rows = [self._comment_to_row(comment) for comment in comments]
         
-        # Using INSERT OR REPLACE to update existing records
-        placeholders = ', '.join(['?'] * len(comment_rows[0]))
-        columns = ', '.join(comment_rows[0].keys())
-        
-        for comment_row in comment_rows:
-            self.cursor.execute(
-                f"INSERT OR REPLACE INTO comments ({columns}) VALUES ({placeholders})",
-                list(comment_row.values())
-            )
+        change_log.log_new_comments(self.cursor, comment_rows)
+        self.cursor.executemany(
+            self._upsert_sql('comments', 'comment_id', list(comment_rows[0].keys())),
+            [list(comment_row.values()) for comment_row in comment_rows]
+        )
+        reply_counts.refresh_reply_counts(self.cursor, reply_counts.thread_ids(comment_rows))
+        video_stats.refresh_video_stats(self.cursor, (row['video_id'] for row in comment_rows))
+        author_stats.refresh_authors(self.cursor, (row['author'] for row in comment_rows))
+        data_version.bump_data_version(self.cursor)
+        self._touched_video_ids.update(row['video_id'] for row in comment_rows)
         
         self.conn.commit()
     
@@ -225,23 +252,44 @@ class SQLiteAdapter(StorageAdapter):
         Returns:
             List of matching comments with video information
         """
-        search_term = f"%{query}%"
+        match_expression = fulltext.fts5_match_expression(fulltext.parse_search_query(query))
         
-        self.cursor.execute("""
-        SELECT 
-            c.comment_id, c.video_id, c.parent_comment_id, c.author, 
-            c.text, c.published_at, c.like_count, c.is_reply,
-            v.title as video_title, v.published_at as video_published_at
-        FROM 
-            comments c
-        JOIN 
-            videos v ON c.video_id = v.video_id
-        WHERE 
-            c.text LIKE ? OR c.author LIKE ?
-        ORDER BY 
-            c.published_at DESC
-        LIMIT ?
-        """, (search_term, search_term, limit))
+        if self._fulltext and match_expression:
+            self.cursor.execute("""
+            SELECT 
+                c.comment_id, c.video_id, c.parent_comment_id, c.author, 
+                c.text, c.published_at, c.like_count, c.is_reply,
+                v.title as video_title, v.published_at as video_published_at
+            FROM 
+                comments c
+            JOIN 
+                comments_fts ON comments_fts.rowid = c.rowid
+            JOIN 
+                videos v ON c.video_id = v.video_id
+            WHERE 
+                comments_fts MATCH ?
+            ORDER BY 
+                bm25(comments_fts)
+            LIMIT ?
+            """, (match_expression, limit))
+        else:
+            search_term = f"%{query}%"
+            
+            self.cursor.execute("""
+            SELECT 
+                c.comment_id, c.video_id, c.parent_comment_id, c.author, 
+                c.text, c.published_at, c.like_count, c.is_reply,
+                v.title as video_title, v.published_at as video_published_at
+            FROM 
+                comments c
+            JOIN 
+                videos v ON c.video_id = v.video_id
+            WHERE 
+                c.text LIKE ? OR c.author LIKE ?
+            ORDER BY 
+                c.published_ts DESC, c.comment_id DESC
+            LIMIT ?
+            """, (search_term, search_term, limit))
         
         results = []
         for row in self.cursor.fetchall():
@@ -254,6 +302,11 @@ class SQLiteAdapter(StorageAdapter):
     
     def close(self) -> None:
         """Close SQLite connection."""
+        if self.conn and self._touched_video_ids:
+            # Materialize statistics once per ingest rather than per batch
+            analytics.refresh_rollups(self.cursor, self._touched_video_ids)
+            self.conn.commit()
+            self._touched_video_ids.clear()
         if self.conn:
             self.conn.close()
             self.conn = None
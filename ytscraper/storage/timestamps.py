@@ -0,0 +1,197 @@
+import calendar
+import time
+from datetime import date, datetime, timezone
+from typing import Optional
+
+# Integer copies of timestamp columns, in seconds since the epoch (UTC).
+# The text columns keep whatever format each writer stored ('Z'-suffixed
+# API strings, Python TIMESTAMP adapters, Postgres TIMESTAMP); range filters
+# and date sorts compare these numbers instead: table -> {epoch column: source}
+EPOCH_COLUMNS = {
+    'comments': {'published_ts': 'published_at'},
+    'videos': {'published_ts': 'published_at'},
+}
+
+# Column type per dialect: (SQLite, Postgres)
+EPOCH_TYPE = ('INTEGER', 'BIGINT')
+
+# SQL converting a source column to whole epoch seconds. SQLite's date
+# functions accept the 'T' and space separators, fractional seconds and 'Z'
+# or +HH:MM suffixes, and return NULL for anything else
+_EPOCH_SQL = {
+    'sqlite': "CAST(strftime('%s', {column}) AS INTEGER)",
+    'postgres': "CAST(FLOOR(EXTRACT(EPOCH FROM {column})) AS BIGINT)",
+}
+
+# SQL giving the UTC calendar month ('YYYY-MM') of an epoch column
+_MONTH_SQL = {
+    'sqlite': "strftime('%Y-%m', {column}, 'unixepoch')",
+    'postgres': "to_char(to_timestamp({column}) AT TIME ZONE 'UTC', 'YYYY-MM')",
+}
+
+# SQL turning an epoch expression back into the text (SQLite) or TIMESTAMP
+# (Postgres) form the timestamp columns hold
+_FROM_EPOCH_SQL = {
+    'sqlite': "strftime('%Y-%m-%dT%H:%M:%SZ', {expression}, 'unixepoch')",
+    'postgres': "(to_timestamp({expression}) AT TIME ZONE 'UTC')",
+}
+
+# SQL giving the UTC day ('YYYY-MM-DD') and hour (0-23) of an epoch column
+_DAY_SQL = {
+    'sqlite': "strftime('%Y-%m-%d', {column}, 'unixepoch')",
+    'postgres': "to_char(to_timestamp({column}) AT TIME ZONE 'UTC', 'YYYY-MM-DD')",
+}
+_HOUR_SQL = {
+    'sqlite': "CAST(strftime('%H', {column}, 'unixepoch') AS INTEGER)",
+    'postgres': "CAST(EXTRACT(HOUR FROM to_timestamp({column}) AT TIME ZONE 'UTC') AS INTEGER)",
+}
+
+ISO_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+
+def _parse_text(value: str) -> datetime:
+    value = value.strip()
+    if value.endswith(('Z', 'z')):
+        value = value[:-1] + '+00:00'
+    return datetime.fromisoformat(value)
+
+
+def to_epoch(value) -> Optional[int]:
+    """Convert a stored or scraped timestamp to epoch seconds.
+
+    Naive datetimes and strings without an offset are taken as UTC, the way
+    the scrapers store them.
+
+    Args:
+        value: datetime, date, ISO 8601 string, epoch number or None
+
+    Returns:
+        Seconds since the epoch, or None for empty or unparseable values
+    """
+    if value is None or value == '':
+        return None
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str):
+        try:
+            value = _parse_text(value)
+        except ValueError:
+            return None
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return int(value.timestamp())
+    if isinstance(value, date):
+        return calendar.timegm(value.timetuple())
+    return None
+
+
+def format_epoch(seconds: Optional[int], fallback=None) -> Optional[str]:
+    """Format epoch seconds as an ISO 8601 UTC string, e.g. 2025-06-06T20:08:05Z.
+
+    Args:
+        seconds: Epoch seconds, or None
+        fallback: Value to return as text when seconds is None, usually the
+            source column the epoch value couldn't be parsed from
+
+    Returns:
+        Formatted string, the fallback as a string, or None
+    """
+    if seconds is None:
+        if isinstance(fallback, (datetime, date)):
+            return fallback.isoformat()
+        return None if fallback in (None, '') else str(fallback)
+    return time.strftime(ISO_FORMAT, time.gmtime(seconds))
+
+
+def parse_date_param(value: str, end_of_day: bool = False) -> Optional[int]:
+    """Parse a start_date or end_date request parameter.
+
+    A bare date (what <input type="date"> sends) covers the whole day, so
+    with end_of_day the result is the day's last second.
+
+    Args:
+        value: YYYY-MM-DD or a full ISO 8601 timestamp
+        end_of_day: Round a bare date up to 23:59:59
+
+    Returns:
+        Epoch seconds, or None if value is empty
+
+    Raises:
+        ValueError: If the value is not a date or timestamp
+    """
+    value = (value or '').strip()
+    if not value:
+        return None
+    if len(value) == 10:
+        day = date.fromisoformat(value)
+        seconds = calendar.timegm(day.timetuple())
+        return seconds + 86399 if end_of_day else seconds
+    seconds = to_epoch(value)
+    if seconds is None:
+        raise ValueError(f"Invalid date: {value}")
+    return seconds
+
+
+def backfill_epoch_columns(cursor, table: str, dialect: str = 'sqlite') -> None:
+    """Recompute a table's epoch columns from their source columns in one UPDATE.
+
+    Used by the migration that adds the columns and by bulk imports; the
+    scrapers set the columns as they insert.
+
+    Args:
+        cursor: Database cursor
+        table: 'comments' or 'videos'
+        dialect: 'sqlite' or 'postgres'
+    """
+    columns = EPOCH_COLUMNS[table]
+    assignments = ', '.join(
+        f"{column} = " + _EPOCH_SQL[dialect].format(column=source)
+        for column, source in columns.items()
+    )
+    cursor.execute(f"UPDATE {table} SET {assignments}")
+
+
+def month_sql(column: str, dialect: str = 'sqlite') -> str:
+    """SQL expression for the UTC month of an epoch column, e.g. '2025-06'.
+
+    Args:
+        column: Epoch seconds column, e.g. 'c.published_ts'
+        dialect: 'sqlite' or 'postgres'
+    """
+    return _MONTH_SQL[dialect].format(column=column)
+
+
+def day_sql(column: str, dialect: str = 'sqlite') -> str:
+    """SQL expression for the UTC day of an epoch column, e.g. '2025-06-02'.
+
+    Args:
+        column: Epoch seconds column, e.g. 'published_ts'
+        dialect: 'sqlite' or 'postgres'
+    """
+    return _DAY_SQL[dialect].format(column=column)
+
+
+def hour_sql(column: str, dialect: str = 'sqlite') -> str:
+    """SQL expression for the UTC hour (0-23) of an epoch column.
+
+    Args:
+        column: Epoch seconds column, e.g. 'published_ts'
+        dialect: 'sqlite' or 'postgres'
+    """
+    return _HOUR_SQL[dialect].format(column=column)
+
+
+def from_epoch_sql(expression: str, dialect: str = 'sqlite') -> str:
+    """SQL converting an epoch expression to a timestamp column value.
+
+    Lets aggregates run on the epoch columns, which order correctly, and
+    store the result in a text or TIMESTAMP column.
+
+    Args:
+        expression: Epoch seconds expression, e.g. 'MAX(published_ts)'
+        dialect: 'sqlite' or 'postgres'
+    """
+    return _FROM_EPOCH_SQL[dialect].format(expression=expression)
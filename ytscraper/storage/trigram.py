@@ -0,0 +1,319 @@
+import logging
+import re
+import sqlite3
+from typing import Dict, List, Optional, Set, Tuple
+
+from . import fulltext
+
+logger = logging.getLogger(__name__)
+
+# Trigram-indexed columns for infix and fuzzy matching, which the word-based
+# full-text index can't serve: source table -> (SQLite FTS5 table, column)
+SQLITE_TRIGRAM_TABLES = {
+    'videos': ('videos_title_trgm', 'title'),
+    'authors': ('authors_trgm', 'author'),
+}
+
+# Postgres pg_trgm GIN indexes: source table -> (index name, column)
+POSTGRES_TRIGRAM_INDEXES = {
+    'videos': ('idx_videos_title_trgm', 'title'),
+    'authors': ('idx_authors_author_trgm', 'author'),
+}
+
+# The FTS5 trigram tokenizer first shipped in SQLite 3.34
+SQLITE_TRIGRAM_MIN_VERSION = (3, 34, 0)
+
+# Shorter substrings have no trigram to look up and are matched with LIKE
+MIN_SUBSTRING_LENGTH = 3
+
+# Same default as pg_trgm.similarity_threshold, so both backends agree on
+# what counts as a fuzzy match
+SIMILARITY_THRESHOLD = 0.3
+
+# Rows fetched from the SQLite trigram index before ranking by similarity
+FUZZY_CANDIDATES = 500
+
+_WORD_RE = re.compile(r'[^\W_]+', re.UNICODE)
+
+
+def trigrams(text: str) -> Set[str]:
+    """Get the trigram set of a string the way pg_trgm computes it.
+
+    Each run of letters and digits is lowercased and padded with two spaces
+    in front and one behind; punctuation and emoji are ignored.
+
+    Args:
+        text: Any string
+
+    Returns:
+        Set of three-character strings
+    """
+    grams = set()
+    for word in _WORD_RE.findall((text or '').lower()):
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def similarity(a: str, b: str) -> float:
+    """Share of trigrams two strings have in common, as pg_trgm's similarity().
+
+    Args:
+        a: First string
+        b: Second string
+
+    Returns:
+        Value from 0.0 (nothing shared) to 1.0 (same trigram set)
+    """
+    first, second = trigrams(a), trigrams(b)
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+
+def like_pattern(text: str) -> str:
+    """Build a LIKE pattern matching text anywhere, with %, _ and \\ escaped.
+
+    Use with ``ESCAPE '\\'`` on SQLite; backslash is Postgres's default escape.
+    """
+    escaped = text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'%{escaped}%'
+
+
+def _fts5_string(text: str) -> str:
+    return '"' + text.replace('"', '""') + '"'
+
+
+def substring_clause(table: str, alias: str, text: str, dialect: str) -> Optional[Tuple[str, list]]:
+    """Build a WHERE condition matching text anywhere in a trigram-indexed column.
+
+    Matching is case-insensitive on both backends. Callers must know the
+    index exists.
+
+    Args:
+        table: Source table in SQLITE_TRIGRAM_TABLES
+        alias: Alias of the source table in the query
+        text: Substring to find
+        dialect: 'sqlite' or 'postgres'
+
+    Returns:
+        (condition SQL with ? placeholders, params), or None if text is too
+        short for the index and callers should use LIKE
+    """
+    text = (text or '').strip()
+    if len(text) < MIN_SUBSTRING_LENGTH:
+        return None
+    if dialect == 'postgres':
+        column = POSTGRES_TRIGRAM_INDEXES[table][1]
+        return f"{alias}.{column} ILIKE ?", [like_pattern(text)]
+    fts_table = SQLITE_TRIGRAM_TABLES[table][0]
+    # A quoted string is a substring match under the trigram tokenizer
+    return (f"{alias}.rowid IN (SELECT rowid FROM {fts_table} WHERE {fts_table} MATCH ?)",
+            [_fts5_string(text)])
+
+
+def find_similar(cursor, table: str, text: str, columns: List[str],
+                 dialect: str = 'sqlite', limit: int = 10) -> List[Dict]:
+    """Find rows whose indexed column is similar to text, best match first.
+
+    Tolerates typos, reordered words and emoji or punctuation in the stored
+    values. Postgres ranks with pg_trgm's similarity(); SQLite fetches rows
+    sharing a trigram with text from the FTS5 index and ranks them with
+    similarity() here.
+
+    Args:
+        cursor: Database cursor
+        table: Source table in SQLITE_TRIGRAM_TABLES
+        text: Value to look up
+        columns: Columns to return, including the indexed one
+        dialect: 'sqlite' or 'postgres'
+        limit: Maximum rows returned
+
+    Returns:
+        Row dicts with an added 'similarity' score, at least SIMILARITY_THRESHOLD
+    """
+    select = ', '.join(columns)
+    if dialect == 'postgres':
+        column = POSTGRES_TRIGRAM_INDEXES[table][1]
+        # `%` is pg_trgm's indexed similarity operator, escaped for psycopg2
+        cursor.execute(
+            f"SELECT {select}, similarity({column}, %s) AS similarity FROM {table} "
+            f"WHERE {column} %% %s ORDER BY similarity DESC, {column} LIMIT %s",
+            (text, text, limit)
+        )
+        return [dict(zip(columns + ['similarity'], row)) for row in cursor.fetchall()]
+
+    fts_table, column = SQLITE_TRIGRAM_TABLES[table]
+    # Unpadded trigrams of each word; the FTS5 tokenizer doesn't pad
+    grams = sorted({word[i:i + 3] for word in _WORD_RE.findall((text or '').lower())
+                    for i in range(len(word) - 2)})
+    if not grams:
+        return []
+    cursor.execute(
+        f"SELECT {select} FROM {table} WHERE rowid IN ("
+        f"SELECT rowid FROM {fts_table} WHERE {fts_table} MATCH ? ORDER BY rank LIMIT ?)",
+        (' OR '.join(_fts5_string(gram) for gram in grams), FUZZY_CANDIDATES)
+    )
+    matches = []
+    for row in cursor.fetchall():
+        match = dict(zip(columns, row))
+        match['similarity'] = similarity(text, match[column])
+        if match['similarity'] >= SIMILARITY_THRESHOLD:
+            matches.append(match)
+    matches.sort(key=lambda match: (-match['similarity'], match[column]))
+    return matches[:limit]
+
+
+def sqlite_trigram_available(conn) -> bool:
+    """Check whether the SQLite library has FTS5 with the trigram tokenizer.
+
+    Args:
+        conn: sqlite3 connection
+
+    Returns:
+        True if trigram FTS5 tables can be created
+    """
+    return (sqlite3.sqlite_version_info >= SQLITE_TRIGRAM_MIN_VERSION
+            and fulltext.sqlite_fts5_available(conn))
+
+
+def sqlite_trigram_index_exists(conn, table: str = 'authors') -> bool:
+    """Check whether the trigram index for a table has been created.
+
+    Args:
+        conn: sqlite3 connection
+        table: Source table name
+
+    Returns:
+        True if the FTS5 table exists
+    """
+    fts_table = SQLITE_TRIGRAM_TABLES[table][0]
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+        (fts_table,)
+    ).fetchone()
+    return row is not None
+
+
+def ensure_sqlite_trigram_index(conn) -> bool:
+    """Create trigram FTS5 external-content tables and sync triggers if missing.
+
+    As with the full-text index, writers must upsert rather than
+    ``INSERT OR REPLACE``, and rebuild_sqlite_trigram_index() must run after
+    every VACUUM. The caller owns the transaction and commits.
+
+    Args:
+        conn: sqlite3 connection
+
+    Returns:
+        True if the index is available, False if the tokenizer is not supported
+    """
+    if not sqlite_trigram_available(conn):
+        logger.warning("SQLite trigram tokenizer not available - substring matches fall back to LIKE")
+        return False
+
+    for table, (fts_table, column) in SQLITE_TRIGRAM_TABLES.items():
+        source = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+            (table,)
+        ).fetchone()
+        if source is None or sqlite_trigram_index_exists(conn, table):
+            continue
+
+        conn.execute(f"""
+            CREATE VIRTUAL TABLE {fts_table} USING fts5(
+                {column},
+                content='{table}',
+                content_rowid='rowid',
+                tokenize='trigram'
+            )
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {table} BEGIN
+                INSERT INTO {fts_table}(rowid, {column}) VALUES (new.rowid, new.{column});
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {table} BEGIN
+                INSERT INTO {fts_table}({fts_table}, rowid, {column})
+                VALUES ('delete', old.rowid, old.{column});
+            END
+        """)
+        # Only fires when the indexed column changes, not on counter updates
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE OF {column} ON {table} BEGIN
+                INSERT INTO {fts_table}({fts_table}, rowid, {column})
+                VALUES ('delete', old.rowid, old.{column});
+                INSERT INTO {fts_table}(rowid, {column}) VALUES (new.rowid, new.{column});
+            END
+        """)
+        # Index rows that existed before the table was created
+        conn.execute(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')")
+        logger.info(f"Created trigram index {fts_table} on {table}.{column}")
+
+    return True
+
+
+def rebuild_sqlite_trigram_index(conn) -> None:
+    """Re-index every existing trigram table from its source table.
+
+    Like the full-text index, these tables follow the implicit rowids of
+    tables with TEXT primary keys, which VACUUM may renumber. The caller
+    owns the transaction and commits.
+
+    Args:
+        conn: sqlite3 connection
+    """
+    for table, (fts_table, _) in SQLITE_TRIGRAM_TABLES.items():
+        if sqlite_trigram_index_exists(conn, table):
+            conn.execute(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')")
+
+
+def ensure_postgres_trigram_index(conn) -> bool:
+    """Enable pg_trgm and add GIN trigram indexes if missing.
+
+    Creating the extension needs the CREATE privilege on the database, which
+    managed hosts such as Heroku grant. Runs inside a savepoint so a failure
+    leaves the caller's transaction usable; the caller commits.
+
+    Args:
+        conn: psycopg2 connection
+
+    Returns:
+        True if the index is available
+    """
+    cursor = conn.cursor()
+    cursor.execute("SAVEPOINT trigram_index")
+    try:
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for table, (index, column) in POSTGRES_TRIGRAM_INDEXES.items():
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {index} ON {table} USING GIN ({column} gin_trgm_ops)"
+            )
+        cursor.execute("RELEASE SAVEPOINT trigram_index")
+        return True
+    except Exception as e:
+        cursor.execute("ROLLBACK TO SAVEPOINT trigram_index")
+        logger.warning(f"Postgres trigram index unavailable - substring matches fall back to LIKE: {e}")
+        return False
+    finally:
+        cursor.close()
+
+
+def postgres_trigram_index_exists(conn, table: str = 'authors') -> bool:
+    """Check whether the GIN trigram index for a table exists.
+
+    Args:
+        conn: psycopg2 connection
+        table: Source table name
+
+    Returns:
+        True if the index exists
+    """
+    index = POSTGRES_TRIGRAM_INDEXES[table][0]
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT 1 FROM pg_indexes WHERE indexname = %s", (index,))
+        return cursor.fetchone() is not None
+    finally:
+        cursor.close()
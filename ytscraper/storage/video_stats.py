@@ -0,0 +1,115 @@
+from typing import Dict, Iterable, List, Optional
+
+from . import timestamps
+from .sql_helpers import placeholder, rebuild_aggregates, refresh_aggregates
+
+# Per-video comment totals, kept current by the writers so readers don't
+# have to COUNT(*) the comments table
+VIDEO_STATS_TABLE_SQL = {
+    'sqlite': """
+        CREATE TABLE IF NOT EXISTS video_stats (
+            video_id TEXT PRIMARY KEY,
+            top_level_count INTEGER NOT NULL DEFAULT 0,
+            reply_count INTEGER NOT NULL DEFAULT 0,
+            total_likes INTEGER NOT NULL DEFAULT 0,
+            hearted_count INTEGER NOT NULL DEFAULT 0,
+            first_comment_at TEXT,
+            last_comment_at TEXT,
+            refreshed_at INTEGER
+        )
+    """,
+    'postgres': """
+        CREATE TABLE IF NOT EXISTS video_stats (
+            video_id VARCHAR(255) PRIMARY KEY,
+            top_level_count BIGINT NOT NULL DEFAULT 0,
+            reply_count BIGINT NOT NULL DEFAULT 0,
+            total_likes BIGINT NOT NULL DEFAULT 0,
+            hearted_count BIGINT NOT NULL DEFAULT 0,
+            first_comment_at TIMESTAMP,
+            last_comment_at TIMESTAMP,
+            refreshed_at BIGINT
+        )
+    """,
+}
+
+STATS_COLUMNS = [
+    'video_id', 'top_level_count', 'reply_count', 'total_likes',
+    'hearted_count', 'first_comment_at', 'last_comment_at', 'refreshed_at'
+]
+
+
+
+def _aggregates(dialect: str) -> List[str]:
+    # CASE keeps the hearted test valid for both SQLite integers and
+    # Postgres booleans. First and last times are taken from the epoch
+    # column, since the text column's mixed formats don't sort
+    return [
+        "SUM(CASE WHEN parent_comment_id IS NULL THEN 1 ELSE 0 END)",
+        "SUM(CASE WHEN parent_comment_id IS NULL THEN 0 ELSE 1 END)",
+        "COALESCE(SUM(like_count), 0)",
+        "SUM(CASE WHEN channel_owner_liked THEN 1 ELSE 0 END)",
+        timestamps.from_epoch_sql('MIN(published_ts)', dialect),
+        timestamps.from_epoch_sql('MAX(published_ts)', dialect),
+    ]
+
+
+def create_stats_table(cursor, dialect: str = 'sqlite') -> None:
+    """Create the video_stats table.
+
+    Args:
+        cursor: Database cursor
+        dialect: 'sqlite' or 'postgres'
+    """
+    cursor.execute(VIDEO_STATS_TABLE_SQL[dialect])
+
+
+def refresh_video_stats(cursor, video_ids: Iterable[str], dialect: str = 'sqlite') -> None:
+    """Recompute totals for the given videos; call inside the writer's transaction.
+
+    Each video is re-aggregated from its own rows, which the
+    (video_id, parent_comment_id, published_ts) index serves without a
+    table scan, so the cost follows the size of the touched videos rather
+    than the whole table. Recomputing instead of applying deltas keeps the
+    totals right when an upsert updates an existing comment.
+
+    Args:
+        cursor: Database cursor
+        video_ids: Videos whose comments were written
+        dialect: 'sqlite' or 'postgres'
+    """
+    refresh_aggregates(cursor, 'video_stats', STATS_COLUMNS, _aggregates(dialect), video_ids, dialect)
+
+
+def rebuild_video_stats(cursor, dialect: str = 'sqlite') -> None:
+    """Recompute totals for every video in one pass over the comments table.
+
+    Args:
+        cursor: Database cursor
+        dialect: 'sqlite' or 'postgres'
+    """
+    rebuild_aggregates(cursor, 'video_stats', STATS_COLUMNS, _aggregates(dialect), dialect)
+
+
+def get_video_stats(cursor, video_id: str, dialect: str = 'sqlite') -> Optional[Dict]:
+    """Read the stored totals for a video.
+
+    Args:
+        cursor: Database cursor
+        video_id: Video ID
+        dialect: 'sqlite' or 'postgres'
+
+    Returns:
+        Dict of totals, or None if the video has no row or the table is missing
+    """
+    p = placeholder(dialect)
+    try:
+        cursor.execute(
+            f"SELECT {', '.join(STATS_COLUMNS)} FROM video_stats WHERE video_id = {p}",
+            (video_id,)
+        )
+        row = cursor.fetchone()
+    except Exception:
+        return None
+    if row is None:
+        return None
+    return dict(zip(STATS_COLUMNS, row))